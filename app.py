@@ -2,14 +2,23 @@
 Main entry point for the dashboard application.
 """
 
+import os
 import dash
 from components.layout import create_layout
 from callbacks import register_callbacks
+from callbacks.background import get_background_manager
+from data.api import get_data_source
+from data.detail_index import start_detail_indexing
+from data.search import start_place_index_build
+from data.snapshot import register_snapshot_route
+from utils.cascade import CascadeRecorder
 
 # Initialize the Dash application
 app = dash.Dash(
     __name__,
     suppress_callback_exceptions=True,
+    # Runs slow callbacks as background jobs when diskcache is installed
+    background_callback_manager=get_background_manager(),
     meta_tags=[
         {"name": "viewport", "content": "width=device-width, initial-scale=1"}
     ]
@@ -21,6 +30,18 @@ app.layout = create_layout(app)
 # Register all callbacks
 register_callbacks(app)
 
+# Set DASHAPP_RECORD_CASCADES=1 to record the callback requests of each user
+# action, served as JSON from /_cascades
+if os.environ.get('DASHAPP_RECORD_CASCADES') == '1':
+    CascadeRecorder(app)
+
+# Serve the versioned hierarchy snapshot used by the clientside dropdown cascade
+register_snapshot_route(app)
+
+# Build the place search and detail attribute indexes in the background
+start_place_index_build()
+start_detail_indexing(get_data_source())
+
 # Add CSS for animations
 app.index_string = '''
 <!DOCTYPE html>
@@ -42,6 +63,12 @@ app.index_string = '''
                 }
             }
 
+            @keyframes spin {
+                to {
+                    transform: rotate(360deg);
+                }
+            }
+
             @keyframes fadeOut {
                 from {
                     opacity: 1;
@@ -7,6 +7,9 @@ from callbacks.dropdown_callbacks import register_dropdown_callbacks
 from callbacks.table_callbacks import register_table_callbacks
 from callbacks.chart_callbacks import register_chart_callbacks
 from callbacks.error_callbacks import register_error_callbacks
+from callbacks.browse_callbacks import register_browse_callbacks
+from callbacks.search_callbacks import register_search_callbacks
+from callbacks.detail_search_callbacks import register_detail_search_callbacks
 
 def register_callbacks(app):
     """Register all callbacks for the application"""
@@ -14,4 +17,7 @@ def register_callbacks(app):
     register_dropdown_callbacks(app)
     register_table_callbacks(app)
     register_chart_callbacks(app)
-    register_error_callbacks(app)
\ No newline at end of file
+    register_error_callbacks(app)
+    register_browse_callbacks(app)
+    register_search_callbacks(app)
+    register_detail_search_callbacks(app)
\ No newline at end of file
@@ -0,0 +1,77 @@
+"""
+Background execution of slow callbacks.
+When diskcache (with psutil and multiprocess) is installed, callbacks
+registered through background_callback() run as Dash background jobs in a
+forked process, polled by the browser and cancelled when the selection
+changes again. Otherwise they run in the request as ordinary callbacks.
+Jobs write the data they fetch to the shared cache tier, so the server
+process sees it too.
+"""
+
+import functools
+import os
+import tempfile
+from dash import DiskcacheManager, Input
+from data.cache import enable_shared_cache
+
+# Directory of the diskcache holding background job state and results
+BACKGROUND_CACHE_DIR = os.environ.get('DASHAPP_BACKGROUND_CACHE_DIR',
+                                      os.path.join(tempfile.gettempdir(), 'dashapp-background'))
+
+# Milliseconds between the browser's polls of a running job
+BACKGROUND_POLL_INTERVAL = 250
+
+# Set DASHAPP_BACKGROUND_CALLBACKS=0 to run every callback in the request
+BACKGROUND_ENABLED = os.environ.get('DASHAPP_BACKGROUND_CALLBACKS', '1') != '0'
+
+_manager = None
+_manager_created = False
+
+
+def get_background_manager():
+    """Return the shared job manager for background callbacks, or None when it is unavailable"""
+    global _manager, _manager_created
+    if not _manager_created:
+        _manager_created = True
+        if BACKGROUND_ENABLED:
+            try:
+                import diskcache
+                _manager = DiskcacheManager(diskcache.Cache(BACKGROUND_CACHE_DIR))
+                # Data fetched in a job would otherwise die with its process
+                enable_shared_cache(os.path.join(BACKGROUND_CACHE_DIR, 'data-cache.sqlite'))
+            except ImportError:
+                # The job manager is optional; fall back to running in the request
+                _manager = None
+    return _manager
+
+
+def _discard_progress(*values):
+    pass
+
+
+def background_callback(app, outputs, inputs, state, progress, **kwargs):
+    """Decorator registering a callback that runs as a background job when possible
+
+    The decorated function takes a set_progress function as its first
+    argument, whose value(s) are written to the progress outputs while the
+    job runs. Jobs are cancelled when selections-store changes again. Without
+    a job manager the callback runs in the request and progress is dropped.
+    """
+    def decorator(function):
+        if get_background_manager() is not None:
+            return app.callback(
+                outputs, inputs, state,
+                background=True,
+                progress=progress,
+                cancel=[Input('selections-store', 'data')],
+                interval=BACKGROUND_POLL_INTERVAL,
+                **kwargs
+            )(function)
+
+        @functools.wraps(function)
+        def in_request(*args):
+            return function(_discard_progress, *args)
+
+        return app.callback(outputs, inputs, state, **kwargs)(in_request)
+
+    return decorator
@@ -0,0 +1,125 @@
+"""
+Browse table callbacks for the dashboard application.
+"""
+
+from dash import Output, Input, State, MATCH, no_update
+from callbacks.table_callbacks import mark_rendered
+from data.browse import LevelTooLarge, load_level_frame, get_rows
+from data.sources import LEVEL_LABELS, LEVELS
+from components.tables import (
+    create_browse_table, create_empty_table_message, create_error_table_message, create_too_large_table_message
+)
+import json
+import uuid
+
+def get_browse_scope(selections):
+    """Return the (level, name) of the deepest selection, or (None, None) if nothing is selected"""
+    for level in reversed(LEVELS):
+        if selections and selections.get(level):
+            return level, selections[level]
+    return None, None
+
+def register_browse_callbacks(app):
+    """Register browse table callbacks"""
+    
+    # Callback to offer the levels below the current selection while the
+    # Browse tab is shown (it only reshapes store data, so it runs in the browser)
+    app.clientside_callback(
+        """
+        function(selections, active_tab, current_level) {
+            const no_update = window.dash_clientside.no_update;
+            // A hidden Browse tab is brought up to date when it is activated
+            if (active_tab !== 'browse-tab') {
+                return [no_update, no_update];
+            }
+            
+            const levels = %s;
+            const labels = %s;
+            selections = selections || {};
+            
+            // Levels below the deepest selection (get_browse_scope)
+            let scope = -1;
+            levels.forEach(function(level, index) {
+                if (selections[level]) {
+                    scope = index;
+                }
+            });
+            const below = levels.slice(scope + 1);
+            const options = below.map(function(level) { return {label: labels[level], value: level}; });
+            
+            // Keep the browsed level while it is still below the selection
+            const value = below.includes(current_level) ? current_level : (below[0] ?? null);
+            return [options, value];
+        }
+        """ % (json.dumps(LEVELS), json.dumps(LEVEL_LABELS)),
+        [Output('browse-level-dropdown', 'options'),
+         Output('browse-level-dropdown', 'value')],
+        [Input('selections-store', 'data'),
+         Input('geo-tabs', 'value')],
+        [State('browse-level-dropdown', 'value')]
+    )
+    
+    # Callback to create the browse table for the selected level, only while
+    # the Browse tab is shown and only when its view changed
+    @app.callback(
+        [Output('browse-table-container', 'children'),
+         Output('error-store', 'data', allow_duplicate=True),
+         Output('tab-render-store', 'data', allow_duplicate=True)],
+        [Input('browse-level-dropdown', 'value'),
+         Input('geo-tabs', 'value')],
+        [State('selections-store', 'data'),
+         State('tab-render-store', 'data')],
+        prevent_initial_call=True
+    )
+    def update_browse_table(level, active_tab, selections, rendered):
+        scope_level, scope_name = get_browse_scope(selections)
+        view = [level, scope_level, scope_name]
+        if active_tab != 'browse-tab' or (rendered or {}).get('browse-tab') == view:
+            return no_update, no_update, no_update
+        
+        if not level:
+            return (create_empty_table_message("level with entries below the current selection"),
+                    no_update, mark_rendered('browse-tab', view))
+        
+        try:
+            # Load the level once; row blocks are then served from it
+            frame = load_level_frame(level, scope_level, scope_name)
+            
+            # The view is encoded in the grid id, so each view gets a fresh grid
+            view_id = {'type': 'browse-grid', 'view': json.dumps(view)}
+            return (create_browse_table(view_id, LEVEL_LABELS[level], list(frame.columns), len(frame)),
+                    no_update, mark_rendered('browse-tab', view))
+        
+        except LevelTooLarge as e:
+            # Not an error: the user narrows the level down with the dropdowns
+            return (create_too_large_table_message(LEVEL_LABELS[level], e.row_count),
+                    no_update, mark_rendered('browse-tab', view))
+        
+        except Exception as e:
+            error_id = str(uuid.uuid4())
+            return create_error_table_message(scope_name or "all locations"), {
+                'show': True,
+                'message': f"Error loading {LEVEL_LABELS[level].lower()} list: {str(e)}",
+                'type': 'error',
+                'id': error_id
+            }, no_update
+    
+    # Callback to answer row block requests of the browse table
+    @app.callback(
+        Output({'type': 'browse-grid', 'view': MATCH}, 'getRowsResponse'),
+        [Input({'type': 'browse-grid', 'view': MATCH}, 'getRowsRequest')],
+        [State({'type': 'browse-grid', 'view': MATCH}, 'id')],
+        prevent_initial_call=True
+    )
+    def update_browse_rows(request, view_id):
+        if not request:
+            return no_update
+        
+        level, scope_level, scope_name = json.loads(view_id['view'])
+        
+        try:
+            frame = load_level_frame(level, scope_level, scope_name)
+            return get_rows(frame, request, view_key=view_id['view'])
+        except Exception:
+            # The table callback reports load errors; show an empty grid here
+            return {'rowData': [], 'rowCount': 0}
@@ -2,52 +2,74 @@
 Chart update callbacks for the dashboard application.
 """
 
-from dash import callback, Output, Input, no_update
+from dash import Output, Input, State, no_update
 from components.charts import create_climate_chart, create_empty_chart_message, create_error_chart_message
+from callbacks.background import background_callback
+from callbacks.table_callbacks import mark_rendered
+from data.deadline import selection_cancelled
 import uuid
 
+# Tabs that chart the selected entity of their level; other tabs, such as
+# Browse, keep showing the last chart
+CHART_TABS = ['continent-tab', 'country-tab', 'state-tab', 'city-tab']
+
 def register_chart_callbacks(app):
     """Register chart update callbacks"""
     
     # Callback to update scatter plot
-    @app.callback(
+    # (as a background job, cancelled when the selection changes again)
+    @background_callback(
+        app,
         [Output('scatter-plot-container', 'children'),
-         Output('error-store', 'data', allow_duplicate=True)],
+         Output('error-store', 'data', allow_duplicate=True),
+         Output('tab-render-store', 'data', allow_duplicate=True)],
         [Input('selections-store', 'data'),
          Input('geo-tabs', 'value')],
+        [State('tab-render-store', 'data')],
+        progress=Output('chart-progress', 'children'),
         prevent_initial_call=True
     )
-    def update_scatter_plot(selections, active_tab):
-        if not selections:
-            return create_empty_chart_message(), no_update
+    def update_scatter_plot(set_progress, selections, active_tab, rendered):
+        selections = selections or {}
+        if active_tab not in CHART_TABS:
+            return no_update, no_update, no_update
         
+        cancelled = selection_cancelled(selections)
         continent = selections.get('continent')
         country = selections.get('country')
         state = selections.get('state')
         city = selections.get('city')
         
-        # Generate sample data for scatter plot based on current selection
-        if not any([continent, country, state, city]):
-            return create_empty_chart_message(), no_update
+        # Determine the currently selected entity
+        if active_tab == 'city-tab' and city:
+            entity, entity_type = city, "City"
+        elif active_tab == 'state-tab' and state:
+            entity, entity_type = state, "State"
+        elif active_tab == 'country-tab' and country:
+            entity, entity_type = country, "Country"
+        elif active_tab == 'continent-tab' and continent:
+            entity, entity_type = continent, "Continent"
+        else:
+            entity, entity_type = None, None
+        
+        # Only rebuild the chart when the charted entity changed
+        chart_key = [entity_type, entity] if entity else None
+        if (rendered or {}).get('chart', False) == chart_key:
+            return no_update, no_update, no_update
+        
+        if not entity:
+            return create_empty_chart_message(), no_update, mark_rendered('chart', None)
+        
+        # Skip building a chart the user has already moved on from
+        if cancelled():
+            return no_update, no_update, no_update
         
         try:
-            # Determine the currently selected entity
-            if active_tab == 'city-tab' and city:
-                entity = city
-                entity_type = "City"
-            elif active_tab == 'state-tab' and state:
-                entity = state
-                entity_type = "State"
-            elif active_tab == 'country-tab' and country:
-                entity = country
-                entity_type = "Country"
-            elif active_tab == 'continent-tab' and continent:
-                entity = continent
-                entity_type = "Continent"
-            else:
-                return create_empty_chart_message(), no_update
-            
-            return create_climate_chart(entity, entity_type), no_update
+            set_progress(f"Building chart for {entity}...")
+            chart = create_climate_chart(entity, entity_type)
+            if cancelled():
+                return no_update, no_update, no_update
+            return chart, no_update, mark_rendered('chart', chart_key)
         
         except Exception as e:
             error_id = str(uuid.uuid4())
@@ -56,4 +78,4 @@ def register_chart_callbacks(app):
                 'message': f"Error generating chart: {str(e)}",
                 'type': 'error',
                 'id': error_id
-            }
+            }, no_update
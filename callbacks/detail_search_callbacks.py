@@ -0,0 +1,76 @@
+"""
+Detail attribute search callbacks for the dashboard application.
+"""
+
+from dash import html, Output, Input, State, MATCH, no_update
+from data.detail_index import search_details
+from data.sources import LEVEL_LABELS
+from components.tables import create_search_results_table
+from utils.styles import colors
+import json
+import uuid
+
+def create_result_row(result):
+    """Create a results table row for one detail search match"""
+    return {
+        'Name': result['name'],
+        'Level': LEVEL_LABELS[result['level']],
+        'Matches': '; '.join(f"{field}: {value}" for field, value in result['matches'].items()),
+        'Score': round(result['score'], 2),
+    }
+
+def register_detail_search_callbacks(app):
+    """Register detail attribute search callbacks"""
+    
+    # Callback to create the results table for a query
+    @app.callback(
+        [Output('detail-search-container', 'children'),
+         Output('error-store', 'data', allow_duplicate=True)],
+        [Input('detail-search-input', 'value'),
+         Input('detail-search-level', 'value')],
+        prevent_initial_call=True
+    )
+    def update_detail_search(query, level):
+        if not query or not query.strip():
+            return html.Div("Enter words to search place details, e.g. a landmark, language or currency.",
+                            style={'padding': '20px', 'color': colors['light_text'], 'fontStyle': 'italic'}), no_update
+        
+        try:
+            # The first page also tells how many matches there are
+            total = search_details(query, level, page=0)['total']
+            
+            # The query is encoded in the grid id, so each query gets a fresh grid
+            view_id = {'type': 'detail-search-grid', 'view': json.dumps([query, level])}
+            return create_search_results_table(view_id, query, total), no_update
+        
+        except Exception as e:
+            error_id = str(uuid.uuid4())
+            return html.Div(), {
+                'show': True,
+                'message': f"Error searching details: {str(e)}",
+                'type': 'error',
+                'id': error_id
+            }
+    
+    # Callback to answer page requests of the results table
+    @app.callback(
+        Output({'type': 'detail-search-grid', 'view': MATCH}, 'getRowsResponse'),
+        [Input({'type': 'detail-search-grid', 'view': MATCH}, 'getRowsRequest')],
+        [State({'type': 'detail-search-grid', 'view': MATCH}, 'id')],
+        prevent_initial_call=True
+    )
+    def update_detail_search_rows(request, view_id):
+        if not request:
+            return no_update
+        
+        query, level = json.loads(view_id['view'])
+        start = int(request.get('startRow', 0))
+        page_size = int(request.get('endRow', start + 20)) - start
+        
+        try:
+            found = search_details(query, level, page=start // page_size, page_size=page_size)
+            return {'rowData': [create_result_row(result) for result in found['results']],
+                    'rowCount': found['total']}
+        except Exception:
+            # The results callback reports search errors; show an empty grid here
+            return {'rowData': [], 'rowCount': 0}
@@ -2,15 +2,139 @@
 Dropdown interaction callbacks for the dashboard application.
 """
 
-from dash import callback, Output, Input, State, no_update
-from data.cache import fetch_data_with_cache
+from dash import Output, Input, State, no_update
+from data.cache import fetch_many_with_cache
+from data.deadline import selection_deadline
+from data.search import SEARCH_LIMIT, search_children
+from data.sources import LEVELS
 import uuid
 
+# Latency budget (in seconds) for all option lookups of one dropdown update
+DROPDOWN_FETCH_BUDGET = 3.0
+
+# Dropdowns whose options are loaded and searched on the server: (level, data type, parent level)
+SEARCHABLE_DROPDOWNS = [
+    ('country', 'countries', 'continent'),
+    ('state', 'states', 'country'),
+    ('city', 'cities', 'state'),
+]
+
+def create_options(names, selected=None):
+    """Create dropdown options for at most SEARCH_LIMIT names, always keeping the selected one"""
+    names = list(names[:SEARCH_LIMIT])
+    if selected and selected not in names:
+        names.append(selected)
+    return [{'label': i, 'value': i} for i in names]
+
+def update_selection(selections, level, value):
+    """Return the selections after value is picked at level, as the server-side callbacks did
+
+    Reference for the clientside selection callbacks. Those also number
+    every selection, and skip values written back from the store.
+    """
+    selections = dict(selections or {})
+    
+    # If the value changed, reset dependent fields
+    if value != selections.get(level):
+        selections[level] = value
+        for below in LEVELS[LEVELS.index(level) + 1:]:
+            selections[below] = None
+    else:
+        selections[level] = value
+    
+    selections['initialized'] = True
+    return selections
+
+def get_active_tab(selections):
+    """Return the tab of the deepest selected level. Reference for the clientside tab callback."""
+    if not selections:
+        return 'continent-tab'
+    
+    if selections.get('city'):
+        return 'city-tab'
+    elif selections.get('state'):
+        return 'state-tab'
+    elif selections.get('country'):
+        return 'country-tab'
+    elif selections.get('continent'):
+        return 'continent-tab'
+    return 'continent-tab'
+
 def register_dropdown_callbacks(app):
     """Register dropdown interaction callbacks"""
     
-    # Callback to update dropdown values from selections store
-    @app.callback(
+    # Callback to load the hierarchy snapshot; its URL names a content
+    # version, so the browser serves repeat loads from its HTTP cache
+    app.clientside_callback(
+        """
+        function(url) {
+            if (!url) {
+                return null;
+            }
+            return fetch(url)
+                .then(function(response) { return response.ok ? response.json() : null; })
+                .catch(function() { return null; });
+        }
+        """,
+        Output('hierarchy-snapshot', 'data'),
+        [Input('hierarchy-snapshot-url', 'data')],
+        prevent_initial_call=True
+    )
+    
+    # Callback to update dropdown values from selections store. Option lists
+    # in the snapshot are cascaded in the browser; the others (cities, and
+    # lists too long for the snapshot) are requested from the server.
+    app.clientside_callback(
+        """
+        function(selections, snapshot) {
+            const no_update = window.dash_clientside.no_update;
+            if (!selections || Object.keys(selections).length === 0) {
+                return [null, [], null, [], null, [], null, no_update];
+            }
+            
+            const children = (snapshot && snapshot.children) || {};
+            const limit = (snapshot && snapshot.option_limit) || 50;
+            const requested = [];
+            
+            function options(level, parentLevel) {
+                const parent = selections[parentLevel];
+                if (!parent) {
+                    return [];
+                }
+                const names = (children[parentLevel] || {})[parent];
+                if (!names) {
+                    // Keep only the selection until the server sends the list
+                    requested.push(level);
+                    return selections[level] ? [{label: selections[level], value: selections[level]}] : [];
+                }
+                // Only the first few options are sent; typing searches the rest
+                const shown = names.slice(0, limit);
+                if (selections[level] && !shown.includes(selections[level])) {
+                    shown.push(selections[level]);
+                }
+                return shown.map(function(name) { return {label: name, value: name}; });
+            }
+            
+            const countryOptions = options('country', 'continent');
+            const stateOptions = options('state', 'country');
+            const cityOptions = options('city', 'state');
+            
+            const request = requested.length === 0 ? no_update : {
+                levels: requested,
+                continent: selections.continent ?? null,
+                country: selections.country ?? null,
+                state: selections.state ?? null,
+                city: selections.city ?? null,
+                session: selections.session ?? null,
+                generation: selections.generation ?? null
+            };
+            return [selections.continent ?? null,
+                    countryOptions, selections.country ?? null,
+                    stateOptions, selections.state ?? null,
+                    cityOptions, selections.city ?? null,
+                    request];
+        }
+        """,
         [Output('continent-dropdown', 'value'),
          Output('country-dropdown', 'options'),
          Output('country-dropdown', 'value'),
@@ -18,146 +142,199 @@ def register_dropdown_callbacks(app):
          Output('state-dropdown', 'value'),
          Output('city-dropdown', 'options'),
          Output('city-dropdown', 'value'),
-         Output('error-store', 'data', allow_duplicate=True)],
-        [Input('selections-store', 'data')],
+         Output('dropdown-options-request', 'data')],
+        [Input('selections-store', 'data'),
+         Input('hierarchy-snapshot', 'data')],
         prevent_initial_call=True
     )
-    def update_dropdowns_from_store(selections):
-        if not selections:
-            return None, [], None, [], None, [], None, no_update
+    
+    # Callback to load the option lists the browser could not resolve
+    @app.callback(
+        [Output(f'{level}-dropdown', 'options', allow_duplicate=True)
+         for level, _, _ in SEARCHABLE_DROPDOWNS]
+        + [Output('error-store', 'data', allow_duplicate=True)],
+        [Input('dropdown-options-request', 'data')],
+        prevent_initial_call=True
+    )
+    def update_dropdowns_from_server(request):
+        if not request:
+            return [no_update] * (len(SEARCHABLE_DROPDOWNS) + 1)
         
-        continent = selections.get('continent')
-        country = selections.get('country')
-        state = selections.get('state')
-        city = selections.get('city')
+        requested = [(level, data_type, request.get(parent_level))
+                     for level, data_type, parent_level in SEARCHABLE_DROPDOWNS
+                     if level in request.get('levels', []) and request.get(parent_level)]
         
-        try:
-            # Set country options based on continent
-            country_options = []
-            if continent:
-                # Fetch countries data with caching
-                countries_list = fetch_data_with_cache('countries', continent)
-                country_options = [{'label': i, 'value': i} for i in countries_list]
-            
-            # Set state options based on country
-            state_options = []
-            if country:
-                # Fetch states data with caching
-                states_list = fetch_data_with_cache('states', country)
-                state_options = [{'label': i, 'value': i} for i in states_list]
-            
-            # Set city options based on state
-            city_options = []
-            if state:
-                # Fetch cities data with caching
-                cities_list = fetch_data_with_cache('cities', state)
-                city_options = [{'label': i, 'value': i} for i in cities_list]
-            
-            return continent, country_options, country, state_options, state, city_options, city, no_update
+        # Fetch every requested option list concurrently, with caching;
+        # the fetches stop early if the user selects something else meanwhile
+        deadline = selection_deadline(DROPDOWN_FETCH_BUDGET, request)
+        results = fetch_many_with_cache(
+            [(data_type, parent) for _, data_type, parent in requested],
+            deadline=deadline,
+            return_exceptions=True
+        )
+        if deadline.cancelled():
+            return [no_update] * (len(SEARCHABLE_DROPDOWNS) + 1)
+        fetched = {level: result for (level, _, _), result in zip(requested, results)}
         
-        except Exception as e:
-            error_id = str(uuid.uuid4())
-            # Return what we can and show error
-            return continent, [], country, [], state, [], city, {
-                'show': True,
-                'message': f"Error loading dropdown options: {str(e)}",
-                'type': 'error',
-                'id': error_id
-            }
+        options = []
+        error = no_update
+        for level, _, _ in SEARCHABLE_DROPDOWNS:
+            names = fetched.get(level)
+            if level not in fetched:
+                options.append(no_update)
+            elif isinstance(names, Exception):
+                options.append([])
+                error = {
+                    'show': True,
+                    'message': f"Error loading dropdown options: {str(names)}",
+                    'type': 'error',
+                    'id': str(uuid.uuid4())
+                }
+            else:
+                options.append(create_options(names, request.get(level)))
+        return options + [error]
     
-    # Callbacks to update selections store based on dropdown changes
-    @app.callback(
+    # Callbacks to serve dropdown options matching the typed search text
+    for level, data_type, parent_level in SEARCHABLE_DROPDOWNS:
+        register_option_search(app, f'{level}-dropdown', data_type, parent_level)
+    
+    # Callbacks to update selections store based on dropdown changes.
+    # These only reshape store data, so they run in the browser (update_selection).
+    app.clientside_callback(
+        """
+        function(continent, selections) {
+            selections = Object.assign({}, selections || {});
+            // Values written back from the store are not a new selection
+            if (continent === (selections.continent ?? null) && selections.initialized) {
+                return window.dash_clientside.no_update;
+            }
+            // If the continent changed, reset dependent fields
+            if (continent !== (selections.continent ?? null)) {
+                selections.country = null;
+                selections.state = null;
+                selections.city = null;
+            }
+            selections.continent = continent;
+            selections.initialized = true;
+            // Number every selection, so the server can drop work for older ones
+            selections.generation = (selections.generation || 0) + 1;
+            return selections;
+        }
+        """,
         Output('selections-store', 'data', allow_duplicate=True),
         [Input('continent-dropdown', 'value')],
         [State('selections-store', 'data')],
         prevent_initial_call=True
     )
-    def update_continent_selection(continent, selections):
-        if selections is None:
-            selections = {}
-        
-        # If continent changed, reset dependent fields
-        if continent != selections.get('continent'):
-            selections['continent'] = continent
-            selections['country'] = None
-            selections['state'] = None
-            selections['city'] = None
-        else:
-            selections['continent'] = continent
-        
-        selections['initialized'] = True
-        return selections
     
-    @app.callback(
+    app.clientside_callback(
+        """
+        function(country, selections) {
+            selections = Object.assign({}, selections || {});
+            // Values written back from the store are not a new selection
+            if (country === (selections.country ?? null) && selections.initialized) {
+                return window.dash_clientside.no_update;
+            }
+            // If the country changed, reset dependent fields
+            if (country !== (selections.country ?? null)) {
+                selections.state = null;
+                selections.city = null;
+            }
+            selections.country = country;
+            selections.initialized = true;
+            // Number every selection, so the server can drop work for older ones
+            selections.generation = (selections.generation || 0) + 1;
+            return selections;
+        }
+        """,
         Output('selections-store', 'data', allow_duplicate=True),
         [Input('country-dropdown', 'value')],
         [State('selections-store', 'data')],
         prevent_initial_call=True
     )
-    def update_country_selection(country, selections):
-        if selections is None:
-            selections = {}
-        
-        # If country changed, reset dependent fields
-        if country != selections.get('country'):
-            selections['country'] = country
-            selections['state'] = None
-            selections['city'] = None
-        else:
-            selections['country'] = country
-        
-        selections['initialized'] = True
-        return selections
     
-    @app.callback(
+    app.clientside_callback(
+        """
+        function(state, selections) {
+            selections = Object.assign({}, selections || {});
+            // Values written back from the store are not a new selection
+            if (state === (selections.state ?? null) && selections.initialized) {
+                return window.dash_clientside.no_update;
+            }
+            // If the state changed, reset dependent fields
+            if (state !== (selections.state ?? null)) {
+                selections.city = null;
+            }
+            selections.state = state;
+            selections.initialized = true;
+            // Number every selection, so the server can drop work for older ones
+            selections.generation = (selections.generation || 0) + 1;
+            return selections;
+        }
+        """,
         Output('selections-store', 'data', allow_duplicate=True),
         [Input('state-dropdown', 'value')],
         [State('selections-store', 'data')],
         prevent_initial_call=True
     )
-    def update_state_selection(state, selections):
-        if selections is None:
-            selections = {}
-        
-        # If state changed, reset dependent fields
-        if state != selections.get('state'):
-            selections['state'] = state
-            selections['city'] = None
-        else:
-            selections['state'] = state
-        
-        selections['initialized'] = True
-        return selections
     
-    @app.callback(
+    app.clientside_callback(
+        """
+        function(city, selections) {
+            selections = Object.assign({}, selections || {});
+            // Values written back from the store are not a new selection
+            if (city === (selections.city ?? null) && selections.initialized) {
+                return window.dash_clientside.no_update;
+            }
+            selections.city = city;
+            selections.initialized = true;
+            // Number every selection, so the server can drop work for older ones
+            selections.generation = (selections.generation || 0) + 1;
+            return selections;
+        }
+        """,
         Output('selections-store', 'data', allow_duplicate=True),
         [Input('city-dropdown', 'value')],
         [State('selections-store', 'data')],
         prevent_initial_call=True
     )
-    def update_city_selection(city, selections):
-        if selections is None:
-            selections = {}
-        
-        selections['city'] = city
-        selections['initialized'] = True
-        return selections
     
-    # Callback to update active tab based on dropdown selections
-    @app.callback(
+    # Callback to update active tab based on dropdown selections (get_active_tab)
+    app.clientside_callback(
+        """
+        function(selections) {
+            selections = selections || {};
+            if (selections.city) {
+                return 'city-tab';
+            } else if (selections.state) {
+                return 'state-tab';
+            } else if (selections.country) {
+                return 'country-tab';
+            }
+            return 'continent-tab';
+        }
+        """,
         Output('geo-tabs', 'value'),
         [Input('selections-store', 'data')]
     )
-    def update_active_tab(selections):
-        if not selections:
-            return 'continent-tab'
+
+def register_option_search(app, dropdown_id, data_type, parent_level):
+    """Register a callback answering searches in a dropdown from the server-side prefix index"""
+    
+    @app.callback(
+        Output(dropdown_id, 'options', allow_duplicate=True),
+        [Input(dropdown_id, 'search_value')],
+        [State('selections-store', 'data'),
+         State(dropdown_id, 'value')],
+        prevent_initial_call=True
+    )
+    def update_options_from_search(search_value, selections, value):
+        parent = (selections or {}).get(parent_level)
+        if search_value is None or not parent:
+            return no_update
         
-        if selections.get('city'):
-            return 'city-tab'
-        elif selections.get('state'):
-            return 'state-tab'
-        elif selections.get('country'):
-            return 'country-tab'
-        elif selections.get('continent'):
-            return 'continent-tab'
-        return 'continent-tab'
+        try:
+            return create_options(search_children(data_type, parent, search_value), value)
+        except Exception:
+            # Keep the current options; the server options callback reports fetch errors
+            return no_update
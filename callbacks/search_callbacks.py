@@ -0,0 +1,74 @@
+"""
+Place search callbacks for the dashboard application.
+"""
+
+from dash import Output, Input, State, no_update
+from data.search import search_places
+from data.sources import LEVEL_LABELS, LEVELS
+import json
+import uuid
+
+# Maximum number of places offered per search
+PLACE_SEARCH_LIMIT = 10
+
+def create_place_option(place, search_value):
+    """Create a search dropdown option for a matched place, carrying its full path"""
+    parents = [place['path'][level] for level in reversed(LEVELS) if level in place['path']][1:]
+    label = f"{place['name']} · {LEVEL_LABELS[place['level']]}"
+    if parents:
+        label += f" in {', '.join(parents)}"
+    # The dropdown filters options against the typed text in the browser, which
+    # would hide fuzzy matches; each option is found by that text instead
+    return {'label': label, 'value': json.dumps(place['path']), 'search': search_value}
+
+def register_search_callbacks(app):
+    """Register place search callbacks"""
+    
+    # Callback to offer the places matching the typed search text
+    @app.callback(
+        [Output('place-search-dropdown', 'options'),
+         Output('error-store', 'data', allow_duplicate=True)],
+        [Input('place-search-dropdown', 'search_value')],
+        prevent_initial_call=True
+    )
+    def update_place_options(search_value):
+        if not search_value:
+            return no_update, no_update
+        
+        try:
+            places = search_places(search_value, PLACE_SEARCH_LIMIT)
+            return [create_place_option(place, search_value) for place in places], no_update
+        except Exception as e:
+            error_id = str(uuid.uuid4())
+            return [], {
+                'show': True,
+                'message': f"Error searching places: {str(e)}",
+                'type': 'error',
+                'id': error_id
+            }
+    
+    # Callback to select a found place at every level in one step
+    # (the option value carries the whole path, so this runs in the browser)
+    app.clientside_callback(
+        """
+        function(value, selections) {
+            if (!value) {
+                return [window.dash_clientside.no_update, window.dash_clientside.no_update];
+            }
+            
+            const path = JSON.parse(value);
+            selections = Object.assign({}, selections || {});
+            %s.forEach(function(level) {
+                selections[level] = path[level] ?? null;
+            });
+            selections.initialized = true;
+            selections.generation = (selections.generation || 0) + 1;
+            return [selections, null];
+        }
+        """ % json.dumps(LEVELS),
+        [Output('selections-store', 'data', allow_duplicate=True),
+         Output('place-search-dropdown', 'value')],
+        [Input('place-search-dropdown', 'value')],
+        [State('selections-store', 'data')],
+        prevent_initial_call=True
+    )
@@ -2,134 +2,121 @@
 Table update callbacks for the dashboard application.
 """
 
-from dash import callback, Output, Input, no_update
-from data.cache import fetch_data_with_cache
+from dash import Output, Input, State, Patch, ALL, no_update
+from callbacks.background import background_callback
+from data.cache import fetch_many_with_cache
+from data.deadline import selection_cancelled, selection_deadline
+from data.prefetch import prefetch_selection
 from components.tables import create_data_table, create_empty_table_message, create_error_table_message
 import uuid
 
+# Latency budget (in seconds) for the data fetches of one table update
+TABLE_FETCH_BUDGET = 2.5
+
+# Per-level table settings: (data type, entity type label, name used in messages)
+TABLE_LEVELS = {
+    'continent': ('continent_data', "Continent", "continent"),
+    'country': ('country_data', "Country", "country"),
+    'state': ('state_data', "State/Province", "state/province"),
+    'city': ('city_data', "City", "city"),
+}
+
+def mark_rendered(tab, entity):
+    """Record in tab-render-store that tab now shows entity"""
+    rendered = Patch()
+    rendered[tab] = entity
+    return rendered
+
 def register_table_callbacks(app):
     """Register table update callbacks"""
     
-    # Callback to update continent table
+    # Callback to warm the cache for the children of the deepest selection,
+    # since that is most likely what the user picks next. It runs in the
+    # server process, whose cache background jobs inherit when they start.
     @app.callback(
-        [Output('continent-table-container', 'children'),
-         Output('error-store', 'data', allow_duplicate=True)],
-        [Input('selections-store', 'data')],
+        Input('selections-store', 'data'),
         prevent_initial_call=True
     )
-    def update_continent_table(selections):
-        if not selections or not selections.get('continent'):
-            return create_empty_table_message("continent"), no_update
-        
-        selected_continent = selections.get('continent')
-        
-        try:
-            # Fetch continent data with caching
-            data = fetch_data_with_cache('continent_data', selected_continent)
-            
-            if not data:
-                return create_empty_table_message(f"No data available for {selected_continent}"), no_update
-            
-            return create_data_table(data, "Continent", selected_continent), no_update
-        
-        except Exception as e:
-            error_id = str(uuid.uuid4())
-            return create_error_table_message(selected_continent), {
-                'show': True,
-                'message': f"Error loading continent data: {str(e)}",
-                'type': 'error',
-                'id': error_id
-            }
-    
-    # Callback to update country table
-    @app.callback(
-        [Output('country-table-container', 'children'),
-         Output('error-store', 'data', allow_duplicate=True)],
-        [Input('selections-store', 'data')],
-        prevent_initial_call=True
-    )
-    def update_country_table(selections):
-        if not selections or not selections.get('country'):
-            return create_empty_table_message("country"), no_update
-        
-        selected_country = selections.get('country')
-        
-        try:
-            # Fetch country data with caching
-            data = fetch_data_with_cache('country_data', selected_country)
-            
-            if not data:
-                return create_empty_table_message(f"No data available for {selected_country}"), no_update
-            
-            return create_data_table(data, "Country", selected_country), no_update
-        
-        except Exception as e:
-            error_id = str(uuid.uuid4())
-            return create_error_table_message(selected_country), {
-                'show': True,
-                'message': f"Error loading country data: {str(e)}",
-                'type': 'error',
-                'id': error_id
-            }
+    def prefetch_next_selection(selections):
+        selections = selections or {}
+        # Record the new selection generation, so work for older ones stops early
+        selection_cancelled(selections)
+        deepest = next((level for level in ['city', 'state', 'country', 'continent']
+                        if selections.get(level)), None)
+        prefetch_selection(selections.get('session'), deepest, selections.get(deepest))
     
-    # Callback to update state table
-    @app.callback(
-        [Output('state-table-container', 'children'),
-         Output('error-store', 'data', allow_duplicate=True)],
-        [Input('selections-store', 'data')],
+    # Callback to update every level's table in one request
+    # (as a background job, cancelled when the selection changes again)
+    @background_callback(
+        app,
+        [Output({'type': 'table-container', 'level': ALL}, 'children'),
+         Output('error-store', 'data', allow_duplicate=True),
+         Output('tab-render-store', 'data', allow_duplicate=True)],
+        [Input('selections-store', 'data'),
+         Input('geo-tabs', 'value')],
+        [State('tab-render-store', 'data'),
+         State({'type': 'table-container', 'level': ALL}, 'id')],
+        progress=[Output(f'{level}-table-progress', 'children') for level in TABLE_LEVELS],
         prevent_initial_call=True
     )
-    def update_state_table(selections):
-        if not selections or not selections.get('state'):
-            return create_empty_table_message("state/province"), no_update
+    def update_tables(set_progress, selections, active_tab, rendered, container_ids):
+        selections = selections or {}
+        rendered = rendered or {}
         
-        selected_state = selections.get('state')
+        # Skip the work entirely if the user has already selected something else
+        deadline = selection_deadline(TABLE_FETCH_BUDGET, selections)
+        if deadline.cancelled():
+            return [no_update] * len(container_ids), no_update, no_update
         
-        try:
-            # Fetch state data with caching
-            data = fetch_data_with_cache('state_data', selected_state)
-            
-            if not data:
-                return create_empty_table_message(f"No data available for {selected_state}"), no_update
-            
-            return create_data_table(data, "State/Province", selected_state), no_update
+        # Hidden tabs are rendered when activated; the visible one only when its entity changed
+        levels = [container_id['level'] for container_id in container_ids
+                  if active_tab == f"{container_id['level']}-tab"
+                  and rendered.get(active_tab, False) != selections.get(container_id['level'])]
+        if not levels:
+            return [no_update] * len(container_ids), no_update, no_update
         
-        except Exception as e:
-            error_id = str(uuid.uuid4())
-            return create_error_table_message(selected_state), {
-                'show': True,
-                'message': f"Error loading state data: {str(e)}",
-                'type': 'error',
-                'id': error_id
-            }
-    
-    # Callback to update city table
-    @app.callback(
-        [Output('city-table-container', 'children'),
-         Output('error-store', 'data', allow_duplicate=True)],
-        [Input('selections-store', 'data')],
-        prevent_initial_call=True
-    )
-    def update_city_table(selections):
-        if not selections or not selections.get('city'):
-            return create_empty_table_message("city"), no_update
-        
-        selected_city = selections.get('city')
+        # Fetch the data of every table to render concurrently, with caching
+        selected = [level for level in levels if selections.get(level)]
+        if selected:
+            set_progress([f"Loading {', '.join(selections[level] for level in selected)}..."] * len(TABLE_LEVELS))
+        results = fetch_many_with_cache(
+            [(TABLE_LEVELS[level][0], selections[level]) for level in selected],
+            deadline=deadline,
+            return_exceptions=True
+        )
+        if deadline.cancelled():
+            return [no_update] * len(container_ids), no_update, no_update
+        fetched = dict(zip(selected, results))
+        set_progress(["Building table..."] * len(TABLE_LEVELS))
         
-        try:
-            # Fetch city data with caching
-            data = fetch_data_with_cache('city_data', selected_city)
-            
-            if not data:
-                return create_empty_table_message(f"No data available for {selected_city}"), no_update
+        children = {}
+        render_updates = Patch()
+        marked = False
+        error = no_update
+        for level in levels:
+            _, entity_type, entity_name = TABLE_LEVELS[level]
+            entity = selections.get(level)
+            data = fetched.get(level)
             
-            return create_data_table(data, "City", selected_city), no_update
+            if not entity:
+                children[level] = create_empty_table_message(entity_name)
+                render_updates[f"{level}-tab"] = None
+                marked = True
+            elif isinstance(data, Exception):
+                children[level] = create_error_table_message(entity)
+                error = {
+                    'show': True,
+                    'message': f"Error loading {level} data: {str(data)}",
+                    'type': 'error',
+                    'id': str(uuid.uuid4())
+                }
+            elif not data:
+                # Not memoized, so the table is fetched again when next shown
+                children[level] = create_empty_table_message(f"No data available for {entity}")
+            else:
+                children[level] = create_data_table(data, entity_type, entity)
+                render_updates[f"{level}-tab"] = entity
+                marked = True
         
-        except Exception as e:
-            error_id = str(uuid.uuid4())
-            return create_error_table_message(selected_city), {
-                'show': True,
-                'message': f"Error loading city data: {str(e)}",
-                'type': 'error',
-                'id': error_id
-            }
+        return ([children.get(container_id['level'], no_update) for container_id in container_ids],
+                error, render_updates if marked else no_update)
@@ -2,45 +2,84 @@
 URL and navigation callbacks for the dashboard application.
 """
 
-from dash import callback, Output, Input, State, no_update
+from dash import Output, Input, State, no_update
 from urllib.parse import parse_qs, urlencode
-from data.cache import fetch_data_with_cache
+from data.cache import fetch_data_with_cache, fetch_hierarchy_path_with_cache
+from data.deadline import Deadline
+from data.snapshot import SNAPSHOT_ENABLED, get_snapshot_version, snapshot_path
 import uuid
 
+# Latency budget (in seconds) for loading the continents dropdown
+CONTINENTS_FETCH_BUDGET = 2.0
+
+# Latency budget (in seconds) for loading the whole path of a deep link
+PATH_FETCH_BUDGET = 2.0
+
+def get_url_search(selections):
+    """Return the URL query string of the selections. Reference for the clientside URL callback."""
+    if not selections or not selections.get('initialized', False):
+        return no_update
+    
+    params = {}
+    if selections.get('continent'):
+        params['continent'] = selections['continent']
+    if selections.get('country'):
+        params['country'] = selections['country']
+    if selections.get('state'):
+        params['state'] = selections['state']
+    if selections.get('city'):
+        params['city'] = selections['city']
+    
+    return f"?{urlencode(params)}" if params else ""
+
 def register_url_callbacks(app):
     """Register URL and navigation callbacks"""
     
-    # Callback to initialize continents dropdown
+    # Callback to initialize continents dropdown and the hierarchy snapshot
     @app.callback(
         [Output('continent-dropdown', 'options'),
+         Output('hierarchy-snapshot-url', 'data'),
          Output('error-store', 'data', allow_duplicate=True)],
         Input('url', 'pathname'),
         prevent_initial_call=True
     )
     def initialize_continents_dropdown(pathname):
+        # Point the browser at the current snapshot version; without one,
+        # every dropdown level is loaded from the server
+        snapshot_url = None
+        if SNAPSHOT_ENABLED:
+            try:
+                snapshot_url = app.get_relative_path(snapshot_path(get_snapshot_version()))
+            except Exception:
+                pass
+        
         try:
             # Fetch continents data with caching
-            continents = fetch_data_with_cache('continents')
-            return [{'label': i, 'value': i} for i in continents], no_update
+            continents = fetch_data_with_cache('continents', deadline=Deadline(CONTINENTS_FETCH_BUDGET))
+            return [{'label': i, 'value': i} for i in continents], snapshot_url, no_update
         except Exception as e:
             error_id = str(uuid.uuid4())
-            return [], {
+            return [], snapshot_url, {
                 'show': True,
                 'message': f"Error loading continents: {str(e)}",
                 'type': 'error',
                 'id': error_id
             }
     
-    # Callback to initialize from URL and update selections store
+    # Callback to initialize from URL and update selections store.
+    # It reads the query string on page load only: update_url rewrites it on
+    # every selection, and listening to it would add a server round-trip
+    # that every selections-store callback has to wait for.
     @app.callback(
         Output('selections-store', 'data'),
-        [Input('url', 'search')],
-        [State('selections-store', 'data')]
+        [Input('url', 'pathname')],
+        [State('url', 'search'),
+         State('selections-store', 'data')]
     )
-    def initialize_from_url(search, current_selections):
+    def initialize_from_url(pathname, search, current_selections):
         # If this is not the initial load (selections exist), don't update from URL
         if current_selections and 'initialized' in current_selections and current_selections['initialized']:
-            return current_selections
+            return no_update
         
         # Default empty selections
         selections = {
@@ -48,7 +87,11 @@ def register_url_callbacks(app):
             'country': None,
             'state': None,
             'city': None,
-            'initialized': True
+            'initialized': True,
+            # Identifies this browser session, e.g. to scope background prefetches
+            'session': str(uuid.uuid4()),
+            # Incremented on every selection, so work for older ones can be dropped
+            'generation': 0
         }
         
         # Parse URL parameters if they exist
@@ -62,26 +105,50 @@ def register_url_callbacks(app):
                 selections['state'] = parsed['state'][0]
             if 'city' in parsed:
                 selections['city'] = parsed['city'][0]
+            
+            # Complete deep links such as ?city=Paris from the deepest selected level;
+            # the levels given above it pick the right place when names are shared
+            path = tuple(selections[level] for level in ['continent', 'country', 'state', 'city'])
+            if any(path):
+                try:
+                    selections.update(fetch_data_with_cache('ancestors', path,
+                                                            deadline=Deadline(PATH_FETCH_BUDGET)))
+                except Exception:
+                    # Keep the levels given in the URL if the lookup fails
+                    pass
+                
+                # Load every option list and detail record of the linked path in one
+                # request, so the dropdowns and tables that follow hit the cache
+                try:
+                    fetch_hierarchy_path_with_cache(
+                        selections['continent'], selections['country'], selections['state'], selections['city'],
+                        deadline=Deadline(PATH_FETCH_BUDGET)
+                    )
+                except Exception:
+                    # They are fetched level by level instead
+                    pass
         
         return selections
     
-    # Callback to update URL based on selections store
-    @app.callback(
+    # Callback to update URL based on selections store (runs in the browser, get_url_search)
+    app.clientside_callback(
+        """
+        function(selections) {
+            if (!selections || !selections.initialized) {
+                return window.dash_clientside.no_update;
+            }
+            
+            const params = new URLSearchParams();
+            ['continent', 'country', 'state', 'city'].forEach(function(level) {
+                if (selections[level]) {
+                    params.append(level, selections[level]);
+                }
+            });
+            
+            const search = params.toString();
+            return search ? '?' + search : '';
+        }
+        """,
         Output('url', 'search'),
         [Input('selections-store', 'data')]
     )
-    def update_url(selections):
-        if not selections or not selections.get('initialized', False):
-            return no_update
-        
-        params = {}
-        if selections.get('continent'):
-            params['continent'] = selections['continent']
-        if selections.get('country'):
-            params['country'] = selections['country']
-        if selections.get('state'):
-            params['state'] = selections['state']
-        if selections.get('city'):
-            params['city'] = selections['city']
-        
-        return f"?{urlencode(params)}" if params else ""
@@ -4,7 +4,7 @@ Layout components for the dashboard application.
 
 from dash import html, dcc
 import dash_ag_grid as dag
-from utils.styles import colors, tab_style, tab_selected_style, card_style, header_style
+from utils.styles import colors, tab_style, tab_selected_style, card_style, header_style, spinner_style
 
 def create_header():
     """Create the header component"""
@@ -18,6 +18,17 @@ def create_header():
 def create_dropdown_section():
     """Create the dropdown selection section"""
     return html.Div([
+        html.Div([
+            html.H3("Jump to Place",
+                    style={'marginTop': '0', 'marginBottom': '20px', 'color': colors['primary']}),
+            dcc.Dropdown(
+                id='place-search-dropdown',
+                options=[],
+                search_order='original',
+                placeholder="Search any continent, country, state or city"
+            ),
+        ], style=card_style),
+        
         html.Div([
             html.H3("Location Selection", 
                     style={'marginTop': '0', 'marginBottom': '20px', 'color': colors['primary']}),
@@ -98,6 +109,13 @@ def create_dropdown_section():
         ], style=card_style),
     ], style={'width': '30%', 'display': 'inline-block', 'verticalAlign': 'top'})
 
+def create_progress_spinner(progress_id):
+    """Create a loading spinner with a progress message updated by background callbacks"""
+    return html.Div([
+        html.Div(style=spinner_style),
+        html.Div("Loading...", id=progress_id, style={'color': colors['light_text']})
+    ], style={'textAlign': 'center', 'padding': '20px'})
+
 def create_tabs_section():
     """Create the tabs section with tables"""
     return html.Div([
@@ -115,7 +133,8 @@ def create_tabs_section():
                             dcc.Loading(
                                 id="loading-continent-table",
                                 type="default",
-                                children=[html.Div(id='continent-table-container', style={'padding': '20px'})]
+                                custom_spinner=create_progress_spinner('continent-table-progress'),
+                                children=[html.Div(id={'type': 'table-container', 'level': 'continent'}, style={'padding': '20px'})]
                             )
                         ]
                     ),
@@ -128,7 +147,8 @@ def create_tabs_section():
                             dcc.Loading(
                                 id="loading-country-table",
                                 type="default",
-                                children=[html.Div(id='country-table-container', style={'padding': '20px'})]
+                                custom_spinner=create_progress_spinner('country-table-progress'),
+                                children=[html.Div(id={'type': 'table-container', 'level': 'country'}, style={'padding': '20px'})]
                             )
                         ]
                     ),
@@ -141,7 +161,8 @@ def create_tabs_section():
                             dcc.Loading(
                                 id="loading-state-table",
                                 type="default",
-                                children=[html.Div(id='state-table-container', style={'padding': '20px'})]
+                                custom_spinner=create_progress_spinner('state-table-progress'),
+                                children=[html.Div(id={'type': 'table-container', 'level': 'state'}, style={'padding': '20px'})]
                             )
                         ]
                     ),
@@ -154,7 +175,64 @@ def create_tabs_section():
                             dcc.Loading(
                                 id="loading-city-table",
                                 type="default",
-                                children=[html.Div(id='city-table-container', style={'padding': '20px'})]
+                                custom_spinner=create_progress_spinner('city-table-progress'),
+                                children=[html.Div(id={'type': 'table-container', 'level': 'city'}, style={'padding': '20px'})]
+                            )
+                        ]
+                    ),
+                    dcc.Tab(
+                        label='Browse',
+                        value='browse-tab',
+                        style=tab_style,
+                        selected_style=tab_selected_style,
+                        children=[
+                            html.Div([
+                                html.Label('Browse all:',
+                                           style={'fontWeight': '500', 'marginBottom': '8px', 'display': 'block'}),
+                                dcc.Dropdown(
+                                    id='browse-level-dropdown',
+                                    options=[],
+                                    clearable=False,
+                                    placeholder="Select a level to browse"
+                                ),
+                            ], style={'padding': '20px 20px 0 20px'}),
+                            dcc.Loading(
+                                id="loading-browse-table",
+                                type="default",
+                                children=[html.Div(id='browse-table-container', style={'padding': '20px'})]
+                            )
+                        ]
+                    ),
+                    dcc.Tab(
+                        label='Search Details',
+                        value='detail-search-tab',
+                        style=tab_style,
+                        selected_style=tab_selected_style,
+                        children=[
+                            html.Div([
+                                dcc.Input(
+                                    id='detail-search-input',
+                                    type='search',
+                                    debounce=True,
+                                    placeholder='e.g. Hollywood, Euro, Spanish',
+                                    style={'width': '60%', 'marginRight': '10px', 'padding': '8px'}
+                                ),
+                                dcc.Dropdown(
+                                    id='detail-search-level',
+                                    options=[
+                                        {'label': 'Continents', 'value': 'continent'},
+                                        {'label': 'Countries', 'value': 'country'},
+                                        {'label': 'States/Provinces', 'value': 'state'},
+                                        {'label': 'Cities', 'value': 'city'},
+                                    ],
+                                    placeholder="All levels",
+                                    style={'width': '35%', 'display': 'inline-block', 'verticalAlign': 'middle'}
+                                ),
+                            ], style={'padding': '20px 20px 0 20px'}),
+                            dcc.Loading(
+                                id="loading-detail-search",
+                                type="default",
+                                children=[html.Div(id='detail-search-container', style={'padding': '20px'})]
                             )
                         ]
                     ),
@@ -172,6 +250,7 @@ def create_tabs_section():
             dcc.Loading(
                 id="loading-scatter-plot",
                 type="default",
+                custom_spinner=create_progress_spinner('chart-progress'),
                 children=[html.Div(id='scatter-plot-container')]
             )
         ], style={
@@ -220,6 +299,17 @@ def create_layout(app):
             'chart': False
         }),
         
+        # Store of the entity each tab last rendered, so tabs are only rendered when shown
+        dcc.Store(id='tab-render-store', data={}),
+        
+        # Versioned snapshot of the continent -> country -> state option lists,
+        # so those dropdowns cascade in the browser
+        dcc.Store(id='hierarchy-snapshot-url'),
+        dcc.Store(id='hierarchy-snapshot'),
+        
+        # Dropdown option lists the snapshot does not cover, requested from the server
+        dcc.Store(id='dropdown-options-request'),
+        
         # Store for error messages
         dcc.Store(id='error-store', data={'show': False, 'message': '', 'type': 'error', 'id': None}),
         
@@ -4,19 +4,39 @@ Table components for the dashboard application.
 
 from dash import html
 import dash_ag_grid as dag
+import json
 import pandas as pd
+from data.normalize import normalize_details, value_field, VALUE_SUFFIX
 from utils.styles import colors, default_col_def
 
+def create_column_defs(columns):
+    """Create AG Grid column definitions, using numeric companion fields where present"""
+    column_defs = []
+    for col in columns:
+        if col.endswith(VALUE_SUFFIX):
+            continue
+        column_def = {"field": col, "headerName": col.replace('_', ' ').title()}
+        if value_field(col) in columns:
+            # Sort and filter on the number, but keep showing the formatted value
+            column_def.update({
+                "field": value_field(col),
+                "type": "numericColumn",
+                "filter": "agNumberColumnFilter",
+                "valueFormatter": {"function": f"params.data[{json.dumps(col)}]"},
+            })
+        column_defs.append(column_def)
+    return column_defs
+
 def create_data_table(data, entity_type, entity_name):
     """Create a data table for the given entity"""
     if not data:
         return html.Div(f"No data available for {entity_name}.",
                        style={'padding': '20px', 'color': colors['light_text'], 'fontStyle': 'italic'})
     
-    df = pd.DataFrame([data])
+    df = pd.DataFrame(normalize_details([data]))
     df.insert(0, entity_type, entity_name)
     
-    column_defs = [{"field": col, "headerName": col.replace('_', ' ').title()} for col in df.columns]
+    column_defs = create_column_defs(list(df.columns))
     
     return html.Div([
         html.H3(f"{entity_name} Information", style={'marginTop': '0', 'color': colors['primary']}),
@@ -30,11 +50,64 @@ def create_data_table(data, entity_type, entity_name):
         )
     ])
 
+def create_browse_table(view_id, level_label, columns, row_count):
+    """Create a table that loads rows block by block from the server (infinite row model)"""
+    return html.Div([
+        html.H3(f"{row_count:,} {level_label} Entries", style={'marginTop': '0', 'color': colors['primary']}),
+        dag.AgGrid(
+            id=view_id,
+            rowModelType="infinite",
+            columnDefs=create_column_defs(columns),
+            defaultColDef=default_col_def,
+            dashGridOptions={
+                "cacheBlockSize": 100,
+                "maxBlocksInCache": 10,
+                "infiniteInitialRowCount": 100,
+                "rowBuffer": 0,
+            },
+            className="ag-theme-alpine",
+            style={'height': '500px'},
+        )
+    ])
+
+def create_search_results_table(view_id, query, total):
+    """Create a table of ranked detail search results, loaded page by page from the server"""
+    column_defs = [
+        {"field": "Name", "headerName": "Name"},
+        {"field": "Level", "headerName": "Level", "maxWidth": 160},
+        {"field": "Matches", "headerName": "Matching Attributes", "flex": 2},
+        {"field": "Score", "headerName": "Score", "type": "numericColumn", "maxWidth": 120},
+    ]
+    return html.Div([
+        html.H3(f"{total:,} Matches for \"{query}\"", style={'marginTop': '0', 'color': colors['primary']}),
+        dag.AgGrid(
+            id=view_id,
+            rowModelType="infinite",
+            columnDefs=column_defs,
+            # Results are ranked by the server, so client-side sorting and filtering are off
+            defaultColDef=dict(default_col_def, sortable=False, filter=False),
+            dashGridOptions={
+                "cacheBlockSize": 20,
+                "maxBlocksInCache": 10,
+                "infiniteInitialRowCount": 20,
+                "rowBuffer": 0,
+            },
+            className="ag-theme-alpine",
+            style={'height': '500px'},
+        )
+    ])
+
 def create_empty_table_message(entity_type):
     """Create a message for when no entity is selected"""
     return html.Div(f"Please select a {entity_type.lower()} to view information.",
                    style={'padding': '20px', 'color': colors['light_text'], 'fontStyle': 'italic'})
 
+def create_too_large_table_message(level_label, row_count):
+    """Create a message for when a level has too many entries to browse"""
+    return html.Div(f"There are {row_count:,} {level_label.lower()} entries here, too many to browse at once. "
+                    f"Please select a location above to narrow them down.",
+                   style={'padding': '20px', 'color': colors['light_text'], 'fontStyle': 'italic'})
+
 def create_error_table_message(entity_name):
     """Create a message for when there's an error loading data"""
     return html.Div(f"Error loading data for {entity_name}.",
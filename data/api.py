@@ -3,190 +3,249 @@ Data API functions for the dashboard application.
 These functions simulate API calls to fetch geographic data.
 """
 
+import os
 import time
 import numpy as np
+from data.sources import LEVELS, InMemoryDataSource, create_data_source
+from data.geo_index import GeoIndexDataSource
+
+# Static datasets served by the simulated API
+CONTINENTS = ['North America', 'Europe', 'Asia', 'Africa', 'South America', 'Oceania']
+
+COUNTRIES = {
+    'North America': ['USA', 'Canada', 'Mexico'],
+    'Europe': ['Germany', 'France', 'UK', 'Italy', 'Spain'],
+    'Asia': ['China', 'Japan', 'India', 'South Korea'],
+    'Africa': ['South Africa', 'Egypt', 'Nigeria', 'Kenya'],
+    'South America': ['Brazil', 'Argentina', 'Colombia', 'Chile'],
+    'Oceania': ['Australia', 'New Zealand']
+}
+
+STATES = {
+    'USA': ['California', 'New York', 'Texas', 'Florida'],
+    'Canada': ['Ontario', 'Quebec', 'British Columbia', 'Alberta'],
+    'Germany': ['Bavaria', 'Hesse', 'Berlin'],
+    'France': ['Île-de-France', 'Provence', 'Normandy'],
+    'UK': ['England', 'Scotland', 'Wales', 'Northern Ireland']
+}
+
+CITIES = {
+    'California': ['Los Angeles', 'San Francisco', 'San Diego'],
+    'New York': ['New York City', 'Buffalo', 'Albany'],
+    'Ontario': ['Toronto', 'Ottawa', 'Hamilton'],
+    'Bavaria': ['Munich', 'Nuremberg', 'Augsburg'],
+    'Île-de-France': ['Paris', 'Versailles', 'Saint-Denis'],
+    'England': ['London', 'Manchester', 'Liverpool']
+}
+
+CONTINENT_DATA = {
+    'North America': {'Population': '579 million', 'Area': '24.71 million km²',
+                     'Countries': '23', 'Major Languages': 'English, Spanish, French'},
+    'Europe': {'Population': '746 million', 'Area': '10.18 million km²',
+              'Countries': '44', 'Major Languages': 'English, German, French, Italian, Spanish'},
+    'Asia': {'Population': '4.7 billion', 'Area': '44.58 million km²',
+            'Countries': '48', 'Major Languages': 'Mandarin, Hindi, Arabic, Russian'}
+}
+
+COUNTRY_DATA = {
+    'USA': {'Capital': 'Washington D.C.', 'Population': '331 million',
+           'GDP': '$21.4 trillion', 'Currency': 'USD', 'Official Language': 'English'},
+    'Canada': {'Capital': 'Ottawa', 'Population': '38 million',
+          'GDP': '$1.6 trillion', 'Currency': 'CAD', 'Official Languages': 'English, French'},
+    'Germany': {'Capital': 'Berlin', 'Population': '83 million',
+           'GDP': '$3.8 trillion', 'Currency': 'Euro', 'Official Language': 'German'}
+}
+
+STATE_DATA = {
+    'California': {'Capital': 'Sacramento', 'Population': '39.5 million',
+                  'Largest City': 'Los Angeles', 'Area': '423,970 km²', 'Year Founded': '1850'},
+    'New York': {'Capital': 'Albany', 'Population': '19.5 million',
+            'Largest City': 'New York City', 'Area': '141,297 km²', 'Year Founded': '1788'},
+    'Ontario': {'Capital': 'Toronto', 'Population': '14.5 million',
+               'Largest City': 'Toronto', 'Area': '1,076,395 km²', 'Year Founded': '1867'}
+}
+
+CITY_DATA = {
+    'Los Angeles': {'Population': '3.9 million', 'Area': '1,302 km²',
+                   'Mayor': 'Karen Bass', 'Founded': '1781', 'Famous For': 'Hollywood'},
+    'New York City': {'Population': '8.4 million', 'Area': '783.8 km²',
+                     'Mayor': 'Eric Adams', 'Founded': '1624', 'Famous For': 'Wall Street'},
+    'London': {'Population': '8.9 million', 'Area': '1,572 km²',
+              'Mayor': 'Sadiq Khan', 'Founded': '43 AD', 'Famous For': 'Big Ben'}
+}
+
+# Hierarchy level and kind of lookup behind each data type
+DATA_TYPE_LEVELS = {
+    'countries': ('continent', 'children'),
+    'states': ('country', 'children'),
+    'cities': ('state', 'children'),
+    'continent_data': ('continent', 'details'),
+    'country_data': ('country', 'details'),
+    'state_data': ('state', 'details'),
+    'city_data': ('city', 'details'),
+}
+
+# Backend answering the API calls. Set DASHAPP_DATA_SOURCE to use another
+# store, e.g. 'sqlite:///gazetteer.db' or 'http://127.0.0.1:8060'.
+DATA_SOURCE = os.environ.get('DASHAPP_DATA_SOURCE')
+
+# The demo data is served from an array-backed index of the hierarchy
+demo_source = GeoIndexDataSource.from_source(InMemoryDataSource(
+    CONTINENTS,
+    {'continent': COUNTRIES, 'country': STATES, 'state': CITIES},
+    {'continent': CONTINENT_DATA, 'country': COUNTRY_DATA,
+     'state': STATE_DATA, 'city': CITY_DATA}
+))
+_source = create_data_source(DATA_SOURCE, demo_source)
+
+# Other sources are indexed the same way, so hierarchy lookups are array
+# slices instead of queries against the store
+if _source is not demo_source:
+    _source = GeoIndexDataSource.from_source(_source)
+
+# Network delay and random errors are only simulated for the built-in demo data
+SIMULATE_NETWORK = not DATA_SOURCE
+
+def get_data_source():
+    """Return the data source currently answering API calls"""
+    return _source
+
+def set_data_source(source):
+    """Point the API at another data source, e.g. to benchmark backends"""
+    global _source
+    _source = source
+
+def _simulate_request(delay, error_message):
+    """Simulate network delay and a 5% error rate (for demonstration)"""
+    if not SIMULATE_NETWORK:
+        return
+
+    time.sleep(delay)
+    if np.random.random() < 0.05:  # 5% chance of error
+        raise Exception(error_message)
 
 def get_continents():
     """Fetch list of continents from server"""
-    # Simulate network delay
-    time.sleep(0.5)
-
-    # Simulate random error (for demonstration)
-    if np.random.random() < 0.05:  # 5% chance of error
-        raise Exception("Network error while fetching continents data")
-
-    return ['North America', 'Europe', 'Asia', 'Africa', 'South America', 'Oceania']
+    _simulate_request(0.5, "Network error while fetching continents data")
+    return _source.continents()
 
 def get_countries(continent):
     """Fetch countries for a given continent from server"""
     if not continent:
         return []
 
-    # Simulate network delay
-    time.sleep(0.8)
-
-    # Simulate random error (for demonstration)
-    if np.random.random() < 0.05:  # 5% chance of error
-        raise Exception(f"Database error while fetching countries for {continent}")
-
-    countries_data = {
-        'North America': ['USA', 'Canada', 'Mexico'],
-        'Europe': ['Germany', 'France', 'UK', 'Italy', 'Spain'],
-        'Asia': ['China', 'Japan', 'India', 'South Korea'],
-        'Africa': ['South Africa', 'Egypt', 'Nigeria', 'Kenya'],
-        'South America': ['Brazil', 'Argentina', 'Colombia', 'Chile'],
-        'Oceania': ['Australia', 'New Zealand']
-    }
-
-    return countries_data.get(continent, [])
+    _simulate_request(0.8, f"Database error while fetching countries for {continent}")
+    return _source.children_of('continent', continent)
 
 def get_states(country):
     """Fetch states/provinces for a given country from server"""
     if not country:
         return []
 
-    # Simulate network delay
-    time.sleep(0.7)
-
-    # Simulate random error (for demonstration)
-    if np.random.random() < 0.05:  # 5% chance of error
-        raise Exception(f"API timeout while fetching states for {country}")
-
-    states_data = {
-        'USA': ['California', 'New York', 'Texas', 'Florida'],
-        'Canada': ['Ontario', 'Quebec', 'British Columbia', 'Alberta'],
-        'Germany': ['Bavaria', 'Hesse', 'Berlin'],
-        'France': ['Île-de-France', 'Provence', 'Normandy'],
-        'UK': ['England', 'Scotland', 'Wales', 'Northern Ireland']
-    }
-
-    return states_data.get(country, [])
+    _simulate_request(0.7, f"API timeout while fetching states for {country}")
+    return _source.children_of('country', country)
 
 def get_cities(state):
     """Fetch cities for a given state/province from server"""
     if not state:
         return []
 
-    # Simulate network delay
-    time.sleep(0.6)
-
-    # Simulate random error (for demonstration)
-    if np.random.random() < 0.05:  # 5% chance of error
-        raise Exception(f"Server error while fetching cities for {state}")
-
-    cities_data = {
-        'California': ['Los Angeles', 'San Francisco', 'San Diego'],
-        'New York': ['New York City', 'Buffalo', 'Albany'],
-        'Ontario': ['Toronto', 'Ottawa', 'Hamilton'],
-        'Bavaria': ['Munich', 'Nuremberg', 'Augsburg'],
-        'Île-de-France': ['Paris', 'Versailles', 'Saint-Denis'],
-        'England': ['London', 'Manchester', 'Liverpool']
-    }
-
-    return cities_data.get(state, [])
+    _simulate_request(0.6, f"Server error while fetching cities for {state}")
+    return _source.children_of('state', state)
 
 def get_continent_data(continent):
     """Fetch detailed data for a specific continent"""
     if not continent:
         return {}
 
-    # Simulate network delay
-    time.sleep(1.0)
-
-    # Simulate random error (for demonstration)
-    if np.random.random() < 0.05:  # 5% chance of error
-        raise Exception(f"Data service unavailable for {continent} information")
-
-    continent_data = {
-        'North America': {'Population': '579 million', 'Area': '24.71 million km²',
-                         'Countries': '23', 'Major Languages': 'English, Spanish, French'},
-        'Europe': {'Population': '746 million', 'Area': '10.18 million km²',
-                  'Countries': '44', 'Major Languages': 'English, German, French, Italian, Spanish'},
-        'Asia': {'Population': '4.7 billion', 'Area': '44.58 million km²',
-                'Countries': '48', 'Major Languages': 'Mandarin, Hindi, Arabic, Russian'}
-    }
-
-    return continent_data.get(continent, {})
+    _simulate_request(1.0, f"Data service unavailable for {continent} information")
+    return _source.details_of('continent', continent)
 
 def get_country_data(country):
     """Fetch detailed data for a specific country"""
     if not country:
         return {}
 
-    # Simulate network delay
-    time.sleep(0.9)
-
-    # Simulate random error (for demonstration)
-    if np.random.random() < 0.05:  # 5% chance of error
-        raise Exception(f"Authentication error while fetching data for {country}")
-
-    country_data = {
-        'USA': {'Capital': 'Washington D.C.', 'Population': '331 million',
-               'GDP': '$21.4 trillion', 'Currency': 'USD', 'Official Language': 'English'},
-        'Canada': {'Capital': 'Ottawa', 'Population': '38 million',
-              'GDP': '$1.6 trillion', 'Currency': 'CAD', 'Official Languages': 'English, French'},
-        'Germany': {'Capital': 'Berlin', 'Population': '83 million',
-               'GDP': '$3.8 trillion', 'Currency': 'Euro', 'Official Language': 'German'}
-    }
-
-    return country_data.get(country, {})
+    _simulate_request(0.9, f"Authentication error while fetching data for {country}")
+    return _source.details_of('country', country)
 
 def get_state_data(state):
     """Fetch detailed data for a specific state/province"""
     if not state:
         return {}
 
-    # Simulate network delay
-    time.sleep(0.8)
-
-    # Simulate random error (for demonstration)
-    if np.random.random() < 0.05:  # 5% chance of error
-        raise Exception(f"Connection error while fetching data for {state}")
-
-    state_data = {
-        'California': {'Capital': 'Sacramento', 'Population': '39.5 million',
-                      'Largest City': 'Los Angeles', 'Area': '423,970 km²', 'Year Founded': '1850'},
-        'New York': {'Capital': 'Albany', 'Population': '19.5 million',
-                'Largest City': 'New York City', 'Area': '141,297 km²', 'Year Founded': '1788'},
-        'Ontario': {'Capital': 'Toronto', 'Population': '14.5 million',
-                   'Largest City': 'Toronto', 'Area': '1,076,395 km²', 'Year Founded': '1867'}
-    }
-
-    return state_data.get(state, {})
+    _simulate_request(0.8, f"Connection error while fetching data for {state}")
+    return _source.details_of('state', state)
 
 def get_city_data(city):
     """Fetch detailed data for a specific city"""
     if not city:
         return {}
 
-    # Simulate network delay
-    time.sleep(0.7)
+    _simulate_request(0.7, f"Rate limit exceeded while fetching data for {city}")
+    return _source.details_of('city', city)
 
-    # Simulate random error (for demonstration)
-    if np.random.random() < 0.05:  # 5% chance of error
-        raise Exception(f"Rate limit exceeded while fetching data for {city}")
+def get_many(data_type, parents):
+    """Fetch one type of data for many parents in a single request, keyed by parent"""
+    level, kind = DATA_TYPE_LEVELS[data_type]
+    _simulate_request(1.0, f"Gateway error while fetching {data_type} in bulk")
+    if kind == 'children':
+        return _source.children_of_many(level, parents)
+    return _source.details_of_many(level, parents)
+
+def get_ancestors(level, name, within=None):
+    """Fetch {level: name} for every ancestor of an entity, e.g. to complete a deep link"""
+    if not name:
+        return {}
+
+    _simulate_request(0.3, f"Lookup error while resolving the location of {name}")
+    return _source.ancestors_of(level, name, within)
+
+def get_path_ancestors(path):
+    """Fetch the ancestors of the deepest named level of a (continent, country, state, city) path
+
+    The levels named above it pick the entity when several share its name.
+    """
+    level, name, within = split_path(path)
+    return get_ancestors(level, name, within)
+
+def split_path(path):
+    """Return the deepest named level of a path, its name and {level: name} of the levels above"""
+    names = dict(zip(LEVELS, path))
+    level = next((level for level in reversed(LEVELS) if names[level]), None)
+    if level is None:
+        return None, None, {}
+    within = {above: names[above] for above in LEVELS[:LEVELS.index(level)] if names[above]}
+    return level, names[level], within
+
+def get_level_entities(level, scope_level=None, scope_name=None):
+    """Fetch the names of every entity at a level, optionally within one selected ancestor"""
+    _simulate_request(1.0, f"Gateway error while listing {level} entities")
+    return _source.entities_at(level, scope_level, scope_name)
+
+def get_scoped_level_entities(scope):
+    """Fetch the names of every entity at a level for a (level, scope level, scope name) tuple"""
+    return get_level_entities(*scope)
 
-    city_data = {
-        'Los Angeles': {'Population': '3.9 million', 'Area': '1,302 km²',
-                       'Mayor': 'Karen Bass', 'Founded': '1781', 'Famous For': 'Hollywood'},
-        'New York City': {'Population': '8.4 million', 'Area': '783.8 km²',
-                         'Mayor': 'Eric Adams', 'Founded': '1624', 'Famous For': 'Wall Street'},
-        'London': {'Population': '8.9 million', 'Area': '1,572 km²',
-                  'Mayor': 'Sadiq Khan', 'Founded': '43 AD', 'Famous For': 'Big Ben'}
-    }
+def get_hierarchy_path(continent=None, country=None, state=None, city=None):
+    """Fetch option lists and detail records for a whole selection path in one request"""
+    _simulate_request(1.0, "Gateway error while fetching hierarchy path")
+    return resolve_hierarchy_path(_source, continent, country, state, city)
 
-    return city_data.get(city, {})
+def resolve_hierarchy_path(source, continent, country, state, city):
+    """Collect the datasets of every selected level from source, keyed by data type"""
+    return source.hierarchy_path(continent, country, state, city)
 
 def get_data_fallback(data_type, parent=None):
     """Fallback data in case of errors"""
     if data_type == 'continents':
-        return ['North America', 'Europe', 'Asia', 'Africa', 'South America', 'Oceania']
+        return list(CONTINENTS)
     elif data_type == 'countries':
         return []
     elif data_type == 'states':
         return []
     elif data_type == 'cities':
         return []
-    elif data_type in ['continent_data', 'country_data', 'state_data', 'city_data']:
+    elif data_type in ['continent_data', 'country_data', 'state_data', 'city_data', 'ancestors']:
         return {}
     return None
@@ -0,0 +1,126 @@
+"""
+Asynchronous data API functions for the dashboard application.
+These coroutines simulate the same API calls as data.api, but wait on the
+event loop instead of blocking a worker thread, so they can be awaited from
+async callbacks.
+"""
+
+import asyncio
+import numpy as np
+from data import api
+
+async def _simulate_request(delay, error_message):
+    """Simulate network delay and a 5% error rate (for demonstration)"""
+    if not api.SIMULATE_NETWORK:
+        return
+
+    await asyncio.sleep(delay)
+    if np.random.random() < 0.05:  # 5% chance of error
+        raise Exception(error_message)
+
+async def _query(method, *args):
+    """Run a data source lookup, off the event loop if the source may block"""
+    source = api.get_data_source()
+    if source.blocking:
+        return await asyncio.to_thread(getattr(source, method), *args)
+    return getattr(source, method)(*args)
+
+async def get_continents():
+    """Fetch list of continents from server"""
+    await _simulate_request(0.5, "Network error while fetching continents data")
+    return await _query('continents')
+
+async def get_countries(continent):
+    """Fetch countries for a given continent from server"""
+    if not continent:
+        return []
+
+    await _simulate_request(0.8, f"Database error while fetching countries for {continent}")
+    return await _query('children_of', 'continent', continent)
+
+async def get_states(country):
+    """Fetch states/provinces for a given country from server"""
+    if not country:
+        return []
+
+    await _simulate_request(0.7, f"API timeout while fetching states for {country}")
+    return await _query('children_of', 'country', country)
+
+async def get_cities(state):
+    """Fetch cities for a given state/province from server"""
+    if not state:
+        return []
+
+    await _simulate_request(0.6, f"Server error while fetching cities for {state}")
+    return await _query('children_of', 'state', state)
+
+async def get_continent_data(continent):
+    """Fetch detailed data for a specific continent"""
+    if not continent:
+        return {}
+
+    await _simulate_request(1.0, f"Data service unavailable for {continent} information")
+    return await _query('details_of', 'continent', continent)
+
+async def get_country_data(country):
+    """Fetch detailed data for a specific country"""
+    if not country:
+        return {}
+
+    await _simulate_request(0.9, f"Authentication error while fetching data for {country}")
+    return await _query('details_of', 'country', country)
+
+async def get_state_data(state):
+    """Fetch detailed data for a specific state/province"""
+    if not state:
+        return {}
+
+    await _simulate_request(0.8, f"Connection error while fetching data for {state}")
+    return await _query('details_of', 'state', state)
+
+async def get_city_data(city):
+    """Fetch detailed data for a specific city"""
+    if not city:
+        return {}
+
+    await _simulate_request(0.7, f"Rate limit exceeded while fetching data for {city}")
+    return await _query('details_of', 'city', city)
+
+async def get_many(data_type, parents):
+    """Fetch one type of data for many parents in a single request, keyed by parent"""
+    level, kind = api.DATA_TYPE_LEVELS[data_type]
+    await _simulate_request(1.0, f"Gateway error while fetching {data_type} in bulk")
+    if kind == 'children':
+        return await _query('children_of_many', level, parents)
+    return await _query('details_of_many', level, parents)
+
+async def get_ancestors(level, name, within=None):
+    """Fetch {level: name} for every ancestor of an entity, e.g. to complete a deep link"""
+    if not name:
+        return {}
+
+    await _simulate_request(0.3, f"Lookup error while resolving the location of {name}")
+    return await _query('ancestors_of', level, name, within)
+
+async def get_path_ancestors(path):
+    """Fetch the ancestors of the deepest named level of a (continent, country, state, city) path"""
+    level, name, within = api.split_path(path)
+    return await get_ancestors(level, name, within)
+
+async def get_level_entities(level, scope_level=None, scope_name=None):
+    """Fetch the names of every entity at a level, optionally within one selected ancestor"""
+    await _simulate_request(1.0, f"Gateway error while listing {level} entities")
+    return await _query('entities_at', level, scope_level, scope_name)
+
+async def get_scoped_level_entities(scope):
+    """Fetch the names of every entity at a level for a (level, scope level, scope name) tuple"""
+    return await get_level_entities(*scope)
+
+async def get_hierarchy_path(continent=None, country=None, state=None, city=None):
+    """Fetch option lists and detail records for a whole selection path in one request"""
+    await _simulate_request(1.0, "Gateway error while fetching hierarchy path")
+    source = api.get_data_source()
+    if source.blocking:
+        return await asyncio.to_thread(api.resolve_hierarchy_path,
+                                       source, continent, country, state, city)
+    return api.resolve_hierarchy_path(source, continent, country, state, city)
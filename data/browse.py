@@ -0,0 +1,178 @@
+"""
+Server-side row queries for browsing whole levels of the hierarchy.
+A level (e.g. every city of a country) is loaded once into a DataFrame;
+block requests from an AG Grid infinite row model are then answered by
+filtering, sorting and slicing it on the server, so the browser only holds
+the rows it displays. Levels too large to hold in memory are refused, so
+the user narrows them down by selecting an ancestor first. Entity lists and
+detail records are fetched through the data cache.
+"""
+
+import json
+import os
+import numpy as np
+import pandas as pd
+from data.cache import SingleFlight, TTLCache, estimate_size, fetch_bulk_with_cache, fetch_data_with_cache
+from data.normalize import normalize_details
+
+# Memory budget for loaded levels, and for the row orders of sorted/filtered
+# views. Set DASHAPP_BROWSE_MAX_BYTES to change it; a level that does not
+# fit in it on its own is refused.
+BROWSE_MAX_BYTES = int(os.environ.get('DASHAPP_BROWSE_MAX_BYTES', 256 * 1024 * 1024))
+
+# Levels with more entities than this are refused before their details are fetched
+BROWSE_MAX_ROWS = 500000
+
+# Time-to-live (in seconds) of a loaded level
+BROWSE_TTL = 10 * 60
+
+# Entities whose detail records are fetched per bulk request
+DETAILS_CHUNK = 5000
+
+_frames = TTLCache(BROWSE_MAX_BYTES)
+_flight = SingleFlight()
+
+
+class LevelTooLarge(Exception):
+    """Raised when a level has more entities than BROWSE_MAX_ROWS, or does not fit in BROWSE_MAX_BYTES"""
+
+    def __init__(self, level, row_count):
+        super().__init__(f"{row_count:,} {level} entries are too many to browse at once")
+        self.level = level
+        self.row_count = row_count
+
+
+def load_level_frame(level, scope_level=None, scope_name=None):
+    """Return a DataFrame with one row per entity at level, within an optional ancestor
+
+    Raises LevelTooLarge instead of loading a level with more than
+    BROWSE_MAX_ROWS entities, or one too large for BROWSE_MAX_BYTES.
+    """
+    key = ('frame', level, scope_level, scope_name)
+    frame = _frames.get(key, None)
+    if frame is not None:
+        return frame
+
+    def load():
+        names = fetch_data_with_cache('level_entities', (level, scope_level, scope_name))
+        if names is None:
+            raise Exception(f"Could not list the {level} entries")
+        if len(names) > BROWSE_MAX_ROWS:
+            raise LevelTooLarge(level, len(names))
+        records = []
+        for start in range(0, len(names), DETAILS_CHUNK):
+            chunk = names[start:start + DETAILS_CHUNK]
+            details = fetch_bulk_with_cache(f'{level}_data', chunk)
+            records.extend(details.get(name) for name in chunk)
+
+        frame = pd.DataFrame.from_records(normalize_details(records), index=range(len(names)))
+        frame.insert(0, level.title(), names)
+        # A frame larger than the whole budget would be reloaded for every row block
+        if estimate_size(frame) > _frames.max_bytes:
+            raise LevelTooLarge(level, len(names))
+        _frames.set(key, frame, BROWSE_TTL)
+        return frame
+
+    return _flight.do(key, load)
+
+
+def get_rows(frame, request, view_key=None):
+    """Answer an AG Grid getRowsRequest from frame with {'rowData', 'rowCount'}
+
+    view_key identifies the frame, so the row order of each sort and filter
+    combination is computed once and reused for every block of the view.
+    """
+    request = request or {}
+    sort_model = request.get('sortModel') or []
+    filter_model = request.get('filterModel') or {}
+
+    order = None
+    order_key = None
+    if view_key is not None:
+        order_key = ('order', view_key, json.dumps([sort_model, filter_model], sort_keys=True))
+        order = _frames.get(order_key, None)
+    if order is None:
+        order = _sorted_positions(frame, sort_model, _filter_mask(frame, filter_model))
+        if order_key is not None:
+            _frames.set(order_key, order, BROWSE_TTL)
+
+    # Only the requested block is converted to records
+    start = int(request.get('startRow', 0))
+    end = int(request.get('endRow', start + 100))
+    block = frame.iloc[order[start:end]]
+    return {'rowData': _to_records(block), 'rowCount': len(order)}
+
+
+def _filter_mask(frame, filter_model):
+    mask = np.ones(len(frame), dtype=bool)
+    for column, model in filter_model.items():
+        if column not in frame:
+            continue
+        mask &= _condition_mask(frame[column], model)
+    return mask
+
+
+def _condition_mask(values, model):
+    # Combined filters ({'operator': 'AND', 'conditions': [...]})
+    if 'conditions' in model:
+        masks = [_condition_mask(values, dict(condition, filterType=model.get('filterType')))
+                 for condition in model['conditions']]
+        if model.get('operator') == 'OR':
+            return np.logical_or.reduce(masks)
+        return np.logical_and.reduce(masks)
+
+    kind = model.get('type')
+    if kind == 'blank':
+        return values.isna().to_numpy()
+    if kind == 'notBlank':
+        return values.notna().to_numpy()
+
+    if model.get('filterType') == 'number':
+        numbers = pd.to_numeric(values, errors='coerce')
+        value = model.get('filter')
+        comparisons = {
+            'equals': lambda: numbers == value,
+            'notEqual': lambda: numbers != value,
+            'lessThan': lambda: numbers < value,
+            'lessThanOrEqual': lambda: numbers <= value,
+            'greaterThan': lambda: numbers > value,
+            'greaterThanOrEqual': lambda: numbers >= value,
+            'inRange': lambda: numbers.between(value, model.get('filterTo')),
+        }
+        result = comparisons.get(kind, lambda: numbers.notna())()
+        return result.fillna(False).to_numpy(dtype=bool)
+
+    text = values.astype('string').str.lower()
+    value = str(model.get('filter') or '').lower()
+    comparisons = {
+        'contains': lambda: text.str.contains(value, regex=False),
+        'notContains': lambda: ~text.str.contains(value, regex=False),
+        'equals': lambda: text == value,
+        'notEqual': lambda: text != value,
+        'startsWith': lambda: text.str.startswith(value),
+        'endsWith': lambda: text.str.endswith(value),
+    }
+    result = comparisons.get(kind, lambda: text.notna())()
+    return result.fillna(False).to_numpy(dtype=bool)
+
+
+def _sorted_positions(frame, sort_model, mask):
+    positions = np.flatnonzero(mask)
+    sort_model = [sort for sort in sort_model if sort.get('colId') in frame]
+    if not sort_model or len(positions) == 0:
+        return positions
+
+    # Frames are indexed by row position, so the sorted index is the row order
+    columns = [sort['colId'] for sort in sort_model]
+    view = frame[columns].iloc[positions].sort_values(
+        by=columns,
+        ascending=[sort.get('sort') != 'desc' for sort in sort_model],
+        kind='stable', na_position='last'
+    )
+    return view.index.to_numpy()
+
+
+def _to_records(block):
+    # NaN is not valid JSON, and missing fields should render as empty cells
+    return [{key: value for key, value in record.items() if not pd.isna(value)}
+            for record in block.to_dict('records')]
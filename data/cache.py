@@ -2,39 +2,752 @@
 Caching mechanism for data fetching functions.
 """
 
-from functools import lru_cache
+import asyncio
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FuturesTimeoutError
 import numpy as np
 from data.api import (
     get_continents, get_countries, get_states, get_cities,
     get_continent_data, get_country_data, get_state_data, get_city_data,
-    get_data_fallback
+    get_path_ancestors, get_scoped_level_entities, get_many, get_hierarchy_path, get_data_fallback, DATA_TYPE_LEVELS
 )
+from data import async_api
+from data.deadline import share_selection_generations
+from data.detail_index import index_details
+from data.hedging import get_hedging_stats, hedged_call, hedged_call_async
+from data.resilience import (
+    CircuitOpenError, call_with_resilience, call_with_resilience_async, get_circuit_states
+)
+from data.shared_cache import SQLiteCache
+
+# Time-to-live (in seconds) of successfully fetched data, per data type.
+# Upper hierarchy levels barely change, so they are kept much longer.
+CACHE_TTLS = {
+    'continents': 24 * 60 * 60,
+    'countries': 12 * 60 * 60,
+    'states': 6 * 60 * 60,
+    'cities': 60 * 60,
+    'continent_data': 24 * 60 * 60,
+    'country_data': 12 * 60 * 60,
+    'state_data': 6 * 60 * 60,
+    'city_data': 60 * 60,
+    'ancestors': 24 * 60 * 60,
+    'level_entities': 60 * 60,
+}
+DEFAULT_TTL = 10 * 60
+
+# Stale-while-revalidate: once the TTL of these data types passes, the old
+# value is still served immediately while a background refresh runs. The
+# value hard-expires this many seconds after it was fetched.
+HARD_EXPIRY_TTLS = {
+    'continents': 7 * 24 * 60 * 60,
+    'countries': 3 * 24 * 60 * 60,
+    'states': 2 * 24 * 60 * 60,
+    'cities': 12 * 60 * 60,
+    'continent_data': 7 * 24 * 60 * 60,
+    'country_data': 3 * 24 * 60 * 60,
+    'state_data': 2 * 24 * 60 * 60,
+    'city_data': 12 * 60 * 60,
+    'ancestors': 7 * 24 * 60 * 60,
+    'level_entities': 12 * 60 * 60,
+}
+
+# Fallback results produced after a failed fetch are only cached briefly,
+# so a transient error does not hide real data until the process restarts
+NEGATIVE_TTL = 30
+
+# Memory budget for all cached values, in bytes
+CACHE_MAX_BYTES = 32 * 1024 * 1024
+
+# Optional cache shared by every worker process on this host. Set
+# DASHAPP_SHARED_CACHE to the path of an SQLite file to enable it.
+SHARED_CACHE_PATH = os.environ.get('DASHAPP_SHARED_CACHE')
+
+# Data types resolved for a selection path, with the selection level that parents them
+PATH_DATA_TYPES = [
+    ('continents', None),
+    ('countries', 'continent'),
+    ('continent_data', 'continent'),
+    ('states', 'country'),
+    ('country_data', 'country'),
+    ('cities', 'state'),
+    ('state_data', 'state'),
+    ('city_data', 'city'),
+]
+
+# Number of worker threads used to issue independent fetches concurrently
+FETCH_WORKERS = 16
+
+_MISSING = object()
+
+
+def estimate_size(value):
+    """Estimate the memory footprint of a cached value in bytes"""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(estimate_size(item) for item in value)
+    return size
+
+
+class _CacheEntry:
+    """A single cached value with its expiry times and size"""
+
+    __slots__ = ('value', 'expires_at', 'stale_until', 'size', 'negative')
+
+    def __init__(self, value, expires_at, stale_until, size, negative):
+        self.value = value
+        self.expires_at = expires_at
+        self.stale_until = stale_until
+        self.size = size
+        self.negative = negative
+
+
+class TTLCache:
+    """Thread-safe LRU cache bounded by total size in bytes, with per-entry expiry"""
+
+    def __init__(self, max_bytes, clock=time.monotonic):
+        self.max_bytes = max_bytes
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.negative_hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key, default=_MISSING):
+        """Return the cached value for key, or default if it is missing or expired"""
+        value, stale = self.lookup(key, default)
+        return default if stale else value
+
+    def lookup(self, key, default=_MISSING):
+        """Return (value, stale) for key, or (default, False) if it is missing or hard-expired
+
+        A value is stale once its TTL has passed but its hard expiry has not.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default, False
+
+            now = self._clock()
+            if entry.stale_until <= now:
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return default, False
+
+            # Mark as most recently used
+            self._entries.move_to_end(key)
+            if entry.expires_at <= now:
+                self.stale_hits += 1
+                return entry.value, True
+            if entry.negative:
+                self.negative_hits += 1
+            else:
+                self.hits += 1
+            return entry.value, False
+
+    def set(self, key, value, ttl, negative=False, hard_ttl=None):
+        """Store value under key for ttl seconds, evicting old entries to stay in budget
+
+        If hard_ttl is longer than ttl, the value may still be served as stale
+        until hard_ttl seconds have passed.
+        """
+        size = estimate_size(value)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            # Values larger than the whole budget are never cached
+            if size > self.max_bytes:
+                return
+
+            now = self._clock()
+            stale_until = now + max(ttl, hard_ttl or 0)
+            self._entries[key] = _CacheEntry(value, now + ttl, stale_until, size, negative)
+            self._bytes += size
+
+            # Evict least recently used entries until we are back within budget
+            while self._bytes > self.max_bytes:
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                self.evictions += 1
+
+    def invalidate(self, key):
+        """Remove key from the cache if present"""
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self):
+        """Remove all entries from the cache"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """Return a snapshot of the cache counters"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'negative_hits': self.negative_hits,
+                'stale_hits': self.stale_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+            }
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+
+
+class _Call:
+    """An in-flight call whose outcome is shared by every waiting caller"""
+
+    __slots__ = ('event', 'result', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesce concurrent calls for the same key into a single execution"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.coalesced = 0
+
+    def do(self, key, fn):
+        """Run fn for key, or wait for the call already in flight and share its outcome"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+        return call.result
+
+    def do_many(self, keys, fn):
+        """Run fn once on behalf of several keys and return a dict of key -> result
+
+        fn must return a dict covering every key. Keys that already have a call
+        in flight are not claimed; their outcome is awaited instead.
+        """
+        owned = {}
+        joined = {}
+        with self._lock:
+            for key in keys:
+                call = self._calls.get(key)
+                if call is None:
+                    call = _Call()
+                    self._calls[key] = call
+                    owned[key] = call
+                else:
+                    joined[key] = call
+                    self.coalesced += 1
+
+        results = {}
+        if owned:
+            try:
+                values = fn()
+                for key, call in owned.items():
+                    call.result = results[key] = values.get(key)
+            except BaseException as e:
+                for call in owned.values():
+                    call.error = e
+                raise
+            finally:
+                with self._lock:
+                    for key in owned:
+                        del self._calls[key]
+                for call in owned.values():
+                    call.event.set()
+
+        for key, call in joined.items():
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            results[key] = call.result
+        return results
+
+
+# Shared cache instance used by fetch_data_with_cache
+_cache = TTLCache(CACHE_MAX_BYTES)
+
+# Second cache tier shared across worker processes, if configured
+_shared_cache = SQLiteCache(SHARED_CACHE_PATH) if SHARED_CACHE_PATH else None
+share_selection_generations(_shared_cache)
+
+# Concurrent misses for the same key wait on a single upstream call
+_flight = SingleFlight()
+
+# In-flight async fetches, keyed by (event loop, cache key)
+_async_calls = {}
+
+# Worker pool for fanning out independent fetches
+_executor = ThreadPoolExecutor(max_workers=FETCH_WORKERS, thread_name_prefix='data-fetch')
+
+# Worker pool for loads whose caller may stop waiting once its deadline
+# passes; the load then finishes in the background and warms the cache
+_load_executor = ThreadPoolExecutor(max_workers=FETCH_WORKERS, thread_name_prefix='data-load')
+
+# Keys whose stale value is being refreshed in the background
+_revalidating = set()
+_revalidating_lock = threading.Lock()
+_revalidations = 0
+
+
+def _reset_after_fork():
+    """Give a forked child process, such as a background callback job, its own pools and locks
+
+    The parent's worker threads do not exist in the child, so inherited pools
+    would never run a task, and the parent's in-flight calls never finish.
+    """
+    global _flight, _executor, _load_executor, _revalidating, _revalidating_lock
+    _cache._lock = threading.Lock()
+    _flight = SingleFlight()
+    _executor = ThreadPoolExecutor(max_workers=FETCH_WORKERS, thread_name_prefix='data-fetch')
+    _load_executor = ThreadPoolExecutor(max_workers=FETCH_WORKERS, thread_name_prefix='data-load')
+    _revalidating = set()
+    _revalidating_lock = threading.Lock()
+    if _shared_cache is not None:
+        _shared_cache.reset_connections()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def enable_shared_cache(path):
+    """Share cached data through the SQLite file at path, unless a shared cache is already configured"""
+    global _shared_cache
+    if _shared_cache is None:
+        _shared_cache = SQLiteCache(path)
+        share_selection_generations(_shared_cache)
+    return _shared_cache
+
+
+def _cache_get(key):
+    """Look key up in the in-process cache, then in the shared cache
+
+    Stale values are returned as they are, and refreshed in the background.
+    """
+    value, stale = _cache.lookup(key)
+    if value is _MISSING and _shared_cache is not None:
+        entry = _shared_cache.get_entry(key)
+        if entry is not None:
+            # Keep a local copy until the shared entry expires
+            value, fresh_left, stale_left, negative = entry
+            _cache.set(key, value, max(fresh_left, 0), negative=negative, hard_ttl=stale_left)
+            stale = fresh_left <= 0
+
+    if stale:
+        _revalidate(key)
+    return value
+
+
+def _cache_set(key, value, ttl, negative=False, hard_ttl=None):
+    """Store value in the in-process cache and, if configured, the shared cache"""
+    _cache.set(key, value, ttl, negative=negative, hard_ttl=hard_ttl)
+    if _shared_cache is not None:
+        _shared_cache.set(key, value, ttl, negative=negative, hard_ttl=hard_ttl)
+
+
+def _store(key, value):
+    """Cache a successfully fetched value with the TTLs of its data type"""
+    data_type = key[0]
+    ttl = CACHE_TTLS.get(data_type, DEFAULT_TTL)
+    _cache_set(key, value, ttl, hard_ttl=HARD_EXPIRY_TTLS.get(data_type, ttl))
+
+    # Keep the full-text index of detail attributes up to date as records load
+    level, kind = DATA_TYPE_LEVELS.get(data_type, (None, None))
+    if kind == 'details':
+        index_details(level, key[1], value)
+
+
+def _revalidate(key):
+    """Refresh a stale entry in the background, unless a refresh is already running"""
+    global _revalidations
+    with _revalidating_lock:
+        if key in _revalidating:
+            return
+        _revalidating.add(key)
+        _revalidations += 1
+    _executor.submit(_run_revalidation, key)
+
+
+def _run_revalidation(key):
+    try:
+        _flight.do(key, lambda: _refresh(key))
+    except Exception:
+        # Keep serving the stale value; the next lookup will try again
+        pass
+    finally:
+        with _revalidating_lock:
+            _revalidating.discard(key)
+
+
+def _refresh(key):
+    """Fetch a fresh value for a stale entry, leaving the stale value in place on failure"""
+    value = _call_upstream(*key)
+    _store(key, value)
+    return value
+
+
+def _call_upstream(data_type, parent):
+    """Call the data API for one key with retries, circuit breaking and hedging"""
+    return call_with_resilience(data_type, hedged_call, data_type, _fetch_data, data_type, parent)
+
+
+async def _call_upstream_async(data_type, parent):
+    """Async variant of _call_upstream"""
+    return await call_with_resilience_async(data_type, hedged_call_async,
+                                            data_type, _fetch_data_async, data_type, parent)
+
+
+# Data API function behind each data type
+_FETCHERS = {
+    'continents': lambda parent: get_continents(),
+    'countries': get_countries,
+    'states': get_states,
+    'cities': get_cities,
+    'continent_data': get_continent_data,
+    'country_data': get_country_data,
+    'state_data': get_state_data,
+    'city_data': get_city_data,
+    # The parent of an ancestors lookup is a (continent, country, state, city) path
+    'ancestors': get_path_ancestors,
+    # The parent of a level listing is a (level, scope level, scope name) tuple
+    'level_entities': get_scoped_level_entities,
+}
+
+_ASYNC_FETCHERS = {
+    'continents': lambda parent: async_api.get_continents(),
+    'countries': async_api.get_countries,
+    'states': async_api.get_states,
+    'cities': async_api.get_cities,
+    'continent_data': async_api.get_continent_data,
+    'country_data': async_api.get_country_data,
+    'state_data': async_api.get_state_data,
+    'city_data': async_api.get_city_data,
+    'ancestors': async_api.get_path_ancestors,
+    'level_entities': async_api.get_scoped_level_entities,
+}
+
+
+def get_cached(data_type, parent=None):
+    """Return the cached value for (data_type, parent), or None if it is not cached, without fetching it"""
+    value = _cache_get((data_type, parent))
+    return None if value is _MISSING else value
+
+
+def _fetch_data(data_type, parent=None):
+    """Dispatch a fetch to the matching data API function"""
+    fetcher = _FETCHERS.get(data_type)
+    return fetcher(parent) if fetcher else None
+
+
+async def _fetch_data_async(data_type, parent=None):
+    """Dispatch a fetch to the matching async data API function"""
+    fetcher = _ASYNC_FETCHERS.get(data_type)
+    return await fetcher(parent) if fetcher else None
+
+
+def fetch_data_with_cache(data_type, parent=None, deadline=None):
+    """Generic caching wrapper for data fetching functions
+
+    Data types listed in HARD_EXPIRY_TTLS are served stale-while-revalidate:
+    an expired value is returned immediately and refreshed in the background.
 
-# Cache system for data fetching functions
-# Using lru_cache with maxsize to limit memory usage
-@lru_cache(maxsize=128)
-def fetch_data_with_cache(data_type, parent=None):
-    """Generic caching wrapper for data fetching functions"""
-    try:
-        if data_type == 'continents':
-            return get_continents()
-        elif data_type == 'countries':
-            return get_countries(parent)
-        elif data_type == 'states':
-            return get_states(parent)
-        elif data_type == 'cities':
-            return get_cities(parent)
-        elif data_type == 'continent_data':
-            return get_continent_data(parent)
-        elif data_type == 'country_data':
-            return get_country_data(parent)
-        elif data_type == 'state_data':
-            return get_state_data(parent)
-        elif data_type == 'city_data':
-            return get_city_data(parent)
-        return None
+    If a Deadline is given and it passes before the fetch completes, fallback
+    data is returned instead; the fetch carries on in the background. If its
+    selection is superseded, Cancelled is raised without waiting any longer,
+    and no fetch is started if none has been yet.
+    """
+    key = (data_type, parent)
+    value = _cache_get(key)
+    if value is not _MISSING:
+        return value
+
+    if deadline is None:
+        return _flight.do(key, lambda: _load(key, data_type, parent))
+
+    deadline.check()
+    future = _load_executor.submit(_flight.do, key, lambda: _load(key, data_type, parent))
+    try:
+        return deadline.wait(future)
+    except FuturesTimeoutError:
+        return get_data_fallback(data_type, parent)
+
+
+def _load(key, data_type, parent):
+    """Fetch a value from the data API and store it in the cache"""
+    try:
+        value = _call_upstream(data_type, parent)
     except Exception as e:
-        # Simulate random errors for demonstration purposes
-        if np.random.random() < 0.1:  # 10% chance of error
-            raise Exception(f"Error fetching {data_type} data: {str(e)}")
+        return _load_fallback(key, data_type, parent, e)
+
+    _store(key, value)
+    return value
+
+
+def _load_fallback(key, data_type, parent, error):
+    """Return (and briefly cache) fallback data after a failed fetch"""
+    # Simulate random errors for demonstration purposes; an open circuit
+    # always fails fast to the fallback instead
+    if not isinstance(error, CircuitOpenError) and np.random.random() < 0.1:  # 10% chance of error
+        raise Exception(f"Error fetching {data_type} data: {str(error)}")
+
+    return _store_fallback(key, data_type, parent)
+
+
+def _store_fallback(key, data_type, parent):
+    """Return fallback data for key, cached only briefly so the real data is retried soon"""
+    fallback = get_data_fallback(data_type, parent)
+    _cache_set(key, fallback, NEGATIVE_TTL, negative=True)
+    return fallback
+
+
+async def fetch_data_with_cache_async(data_type, parent=None, deadline=None):
+    """Async variant of fetch_data_with_cache for use from async callbacks
+
+    Shares the cache with fetch_data_with_cache. Concurrent misses for the
+    same key on one event loop await a single upstream call.
+    """
+    key = (data_type, parent)
+    value = _cache_get(key)
+    if value is not _MISSING:
+        return value
+
+    if deadline is not None:
+        deadline.check()
+
+    loop = asyncio.get_running_loop()
+    flight_key = (loop, key)
+    task = _async_calls.get(flight_key)
+    if task is None:
+        task = loop.create_task(_load_async(key, data_type, parent))
+        _async_calls[flight_key] = task
+        task.add_done_callback(lambda _: _async_calls.pop(flight_key, None))
+    else:
+        _flight.coalesced += 1
+
+    # Shield the shared call so one cancelled caller does not cancel the others
+    if deadline is None:
+        return await asyncio.shield(task)
+    try:
+        return await asyncio.wait_for(asyncio.shield(task), deadline.remaining())
+    except asyncio.TimeoutError:
         return get_data_fallback(data_type, parent)
+
+
+async def _load_async(key, data_type, parent):
+    """Fetch a value from the async data API and store it in the cache"""
+    try:
+        value = await _call_upstream_async(data_type, parent)
+    except Exception as e:
+        return _load_fallback(key, data_type, parent, e)
+
+    _store(key, value)
+    return value
+
+
+def fetch_many_with_cache(requests, deadline=None, return_exceptions=False):
+    """Fetch several (data_type, parent) pairs concurrently, returning results in order
+
+    All lookups share the same Deadline; any that are still running when it
+    passes degrade to fallback data. With return_exceptions, a failed lookup
+    yields its exception in place of a result instead of raising it.
+    """
+    requests = list(requests)
+    if len(requests) <= 1:
+        futures = []
+        for data_type, parent in requests:
+            future = Future()
+            try:
+                future.set_result(fetch_data_with_cache(data_type, parent, deadline))
+            except Exception as e:
+                future.set_exception(e)
+            futures.append(future)
+    else:
+        futures = [_executor.submit(fetch_data_with_cache, data_type, parent, deadline)
+                   for data_type, parent in requests]
+        wait(futures)
+
+    if return_exceptions:
+        return [future.exception() or future.result() for future in futures]
+    return [future.result() for future in futures]
+
+
+def fetch_bulk_with_cache(data_type, parents, deadline=None):
+    """Fetch one type of data for many parents, returning a dict keyed by parent
+
+    Cached entries are served directly; the rest are resolved with a single
+    bulk upstream request and stored under their individual cache keys.
+    """
+    results = {}
+    missing = []
+    for parent in dict.fromkeys(parents):
+        value = _cache_get((data_type, parent))
+        if value is _MISSING:
+            missing.append((data_type, parent))
+        else:
+            results[parent] = value
+
+    if len(missing) == 1:
+        parent = missing[0][1]
+        results[parent] = fetch_data_with_cache(data_type, parent, deadline)
+    elif missing:
+        loaded = _load_detached(missing, lambda: _load_many(data_type, missing), deadline)
+        results.update((parent, value) for (_, parent), value in loaded.items())
+    return results
+
+
+def _load_many(data_type, keys):
+    """Resolve several keys of one data type with one bulk request"""
+    try:
+        values = call_with_resilience(data_type, get_many, data_type, [key[1] for key in keys])
+    except Exception:
+        # Resolve each key on its own, with the usual fallback handling
+        futures = {key: _executor.submit(_load, key, *key) for key in keys}
+        return {key: future.result() for key, future in futures.items()}
+
+    loaded = {}
+    for key in keys:
+        if key[1] in values:
+            loaded[key] = values[key[1]]
+            _store(key, loaded[key])
+        else:
+            # Missing from the bulk response: cache the fallback as a negative entry
+            loaded[key] = _store_fallback(key, *key)
+    return loaded
+
+
+def _load_detached(keys, fn, deadline):
+    """Load several keys through the single-flight layer, bounded by deadline
+
+    Keys still loading when the deadline passes degrade to fallback data,
+    while the load finishes in the background.
+    """
+    def load():
+        return _flight.do_many(keys, fn)
+
+    if deadline is None:
+        return load()
+    deadline.check()
+    try:
+        return deadline.wait(_load_executor.submit(load))
+    except FuturesTimeoutError:
+        return {key: get_data_fallback(*key) for key in keys}
+
+
+def fetch_hierarchy_path_with_cache(continent=None, country=None, state=None, city=None,
+                                    deadline=None):
+    """Fetch every option list and detail record of a selection path, keyed by data type
+
+    Cached entries are served directly. When more than one entry is missing,
+    they are resolved together in a single bulk upstream request, and each
+    result is stored under its individual (data_type, parent) cache key.
+    Entries still missing when the Deadline passes degrade to fallback data.
+    """
+    selection = {'continent': continent, 'country': country, 'state': state, 'city': city}
+    keys = {data_type: (data_type, selection[level] if level else None)
+            for data_type, level in PATH_DATA_TYPES
+            if level is None or selection[level]}
+
+    results = {}
+    missing = []
+    for data_type, key in keys.items():
+        value = _cache_get(key)
+        if value is _MISSING:
+            missing.append(key)
+        else:
+            results[data_type] = value
+
+    if len(missing) == 1:
+        data_type, parent = missing[0]
+        results[data_type] = fetch_data_with_cache(data_type, parent, deadline)
+    elif missing:
+        loaded = _load_detached(missing, lambda: _load_path(selection, missing), deadline)
+        results.update((data_type, value) for (data_type, _), value in loaded.items())
+    return results
+
+
+def _load_path(selection, keys):
+    """Resolve several cache keys with one bulk request, falling back to per-key fetches"""
+    try:
+        # No retries here: on failure the keys are retried one by one below
+        path = call_with_resilience('hierarchy_path', get_hierarchy_path,
+                                    *selection.values(), max_attempts=1)
+    except Exception:
+        # The bulk request failed; resolve each key on its own so a single
+        # error does not turn the whole path into fallback data
+        futures = {key: _executor.submit(_load, key, *key) for key in keys}
+        return {key: future.result() for key, future in futures.items()}
+
+    values = {}
+    for key in keys:
+        data_type = key[0]
+        if data_type in path:
+            values[key] = path[data_type]
+            _store(key, values[key])
+        else:
+            # Missing from the path response: cache the fallback as a negative entry
+            values[key] = _store_fallback(key, *key)
+    return values
+
+
+def get_cache_stats():
+    """Return cache counters and memory usage, plus circuit breaker and hedging state"""
+    stats = _cache.stats()
+    stats['coalesced'] = _flight.coalesced
+    stats['revalidations'] = _revalidations
+    stats['circuits'] = get_circuit_states()
+    stats['hedging'] = get_hedging_stats()
+    if _shared_cache is not None:
+        stats['shared'] = _shared_cache.stats()
+    return stats
+
+
+def clear_cache():
+    """Drop every cached data entry"""
+    _cache.clear()
+    if _shared_cache is not None:
+        _shared_cache.clear()
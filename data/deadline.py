@@ -0,0 +1,135 @@
+"""
+Latency budgets for callbacks and the data fetches they trigger.
+A budget can also be tied to the generation of the selection it serves, so
+work for a selection the user has already moved on from is abandoned early,
+also in other worker processes and background jobs when a shared store is set.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+
+# Seconds between cancellation checks while waiting for a fetch
+CANCEL_POLL_INTERVAL = 0.05
+
+# Maximum number of sessions whose selection generations are tracked at once
+MAX_TRACKED_SESSIONS = 4096
+
+# Seconds a session's latest generation is kept in the shared store after its last selection
+SHARED_GENERATION_TTL = 60 * 60
+
+
+class Cancelled(Exception):
+    """Raised when work is abandoned because its selection has been superseded"""
+
+
+class Deadline:
+    """A latency budget, started when created and passed down to the data layer
+
+    cancelled is an optional zero-argument function returning True once the
+    work the budget bounds is no longer wanted.
+    """
+
+    def __init__(self, budget, clock=time.monotonic, cancelled=None):
+        self.budget = budget
+        self._clock = clock
+        self._cancelled = cancelled
+        self.expires_at = clock() + budget
+
+    def remaining(self):
+        """Return the seconds left in the budget, never less than zero"""
+        return max(0.0, self.expires_at - self._clock())
+
+    def expired(self):
+        """Return True once the budget is used up"""
+        return self.remaining() <= 0
+
+    def cancelled(self):
+        """Return True once the work this budget bounds is no longer wanted"""
+        return self._cancelled is not None and self._cancelled()
+
+    def check(self):
+        """Raise Cancelled if the work this budget bounds is no longer wanted"""
+        if self.cancelled():
+            raise Cancelled()
+
+    def wait(self, future):
+        """Return the result of future, waiting at most for the rest of the budget
+
+        Raises TimeoutError when the budget runs out first, and Cancelled as
+        soon as the work is no longer wanted.
+        """
+        while True:
+            self.check()
+            try:
+                return future.result(timeout=min(self.remaining(), CANCEL_POLL_INTERVAL))
+            except FuturesTimeoutError:
+                if self.expired():
+                    raise
+
+
+class SelectionGenerations:
+    """Latest selection generation seen from each session
+
+    The browser numbers every change of selections-store. Work for a lower
+    generation than the latest one seen from the same session is stale.
+    Requests of one session may reach different processes, so with a shared
+    store (an SQLiteCache) every generation seen is also recorded there.
+    """
+
+    def __init__(self, max_sessions=MAX_TRACKED_SESSIONS, shared=None):
+        self._lock = threading.Lock()
+        self._latest = OrderedDict()
+        self._max_sessions = max_sessions
+        self.shared = shared
+
+    def observe(self, session, generation):
+        """Record that session has reached generation"""
+        with self._lock:
+            if generation > self._latest.get(session, -1):
+                self._latest[session] = generation
+            self._latest.move_to_end(session)
+
+            # Forget the least recently active sessions
+            while len(self._latest) > self._max_sessions:
+                self._latest.popitem(last=False)
+
+        if self.shared is not None:
+            self.shared.set_max(('generation', session), generation, SHARED_GENERATION_TTL)
+
+    def is_stale(self, session, generation):
+        """Return True if session has moved on past generation"""
+        with self._lock:
+            if self._latest.get(session, generation) > generation:
+                return True
+
+        if self.shared is None:
+            return False
+        latest = self.shared.peek(('generation', session))
+        return latest is not None and latest > generation
+
+
+_generations = SelectionGenerations()
+
+
+def share_selection_generations(store):
+    """Record selection generations in store too, so every process sharing it sees the latest"""
+    _generations.shared = store
+
+
+def selection_cancelled(selections):
+    """Record the generation of selections, returning a function that reports when it is superseded"""
+    selections = selections or {}
+    session = selections.get('session')
+    generation = selections.get('generation')
+    if session is None or generation is None:
+        return lambda: False
+
+    _generations.observe(session, generation)
+    return lambda: _generations.is_stale(session, generation)
+
+
+def selection_deadline(budget, selections):
+    """Return a Deadline for work on selections, cancelled once a newer selection arrives"""
+    return Deadline(budget, cancelled=selection_cancelled(selections))
@@ -0,0 +1,224 @@
+"""
+Full-text index over the text attributes of detail records.
+Records are added as they are loaded (by the cache, and by a background
+pass over the data source at startup), so questions like "which cities are
+famous for Hollywood" are answered from posting lists instead of scanning
+every detail record.
+"""
+
+import json
+import math
+import re
+import threading
+from array import array
+from collections import OrderedDict
+import numpy as np
+from data.normalize import NUMERIC_FIELDS
+from data.sources import LEVELS
+
+# Results per page of a query
+PAGE_SIZE = 20
+
+# Number of ranked result lists kept for paging through recent queries
+RESULT_CACHE_SIZE = 128
+
+# Entities whose records are fetched per request by the startup indexing pass
+INDEX_CHUNK = 5000
+
+_TOKEN_PATTERN = re.compile(r'\w+')
+
+# Encodes the text attributes of a record for storage; sorted keys make equal records encode equally
+_ENCODER = json.JSONEncoder(ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+
+
+def tokenize(text):
+    """Split text into lower-case word tokens"""
+    return _TOKEN_PATTERN.findall(str(text).lower())
+
+
+def _field_tokens(fields):
+    # Distinct tokens of every value of a {field: value} dict
+    return frozenset(token for value in fields.values() for token in tokenize(value))
+
+
+def text_fields(record):
+    """Return the {field: value} text attributes of a detail record"""
+    return {field: value for field, value in (record or {}).items()
+            if isinstance(value, str) and field not in NUMERIC_FIELDS}
+
+
+class DetailIndex:
+    """Thread-safe inverted index from attribute tokens to entities
+
+    Entities are interned as integer ids. Each token maps to a compact array
+    of ids that is appended to as records are added; a NumPy copy of it is
+    made lazily after changes, so queries rank candidates with vectorized
+    operations. The text attributes themselves are kept JSON-encoded in one
+    shared buffer, to report which values matched.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ids = {}
+        self._entities = []
+        self._levels = array('b')
+        self._text = bytearray()
+        self._text_starts = array('q')
+        self._text_ends = array('q')
+        self._postings = {}
+        self._arrays = {}
+        self._results = OrderedDict()
+
+    def __len__(self):
+        return len(self._entities)
+
+    def add(self, level, name, record):
+        """Index (or re-index) the text attributes of one entity's detail record"""
+        self.add_many(level, {name: record})
+
+    def add_many(self, level, records):
+        """Index the {name: record} detail records of several entities at level"""
+        # Encode and tokenize outside the lock, so searches are not held up
+        entries = []
+        for name, record in records.items():
+            fields = text_fields(record)
+            text = _ENCODER.encode(fields).encode('utf-8')
+            entries.append((name, text, _field_tokens(fields)))
+
+        with self._lock:
+            changed = False
+            for name, text, tokens in entries:
+                changed = self._add(level, name, text, tokens) or changed
+            # Ranked results may now be out of date
+            if changed:
+                self._results.clear()
+
+    def _add(self, level, name, text, tokens):
+        # Index one encoded record, returning False if it was indexed unchanged
+        level_ids = self._ids.setdefault(level, {})
+        entity_id = level_ids.get(name)
+        if entity_id is None:
+            entity_id = level_ids[name] = len(self._entities)
+            self._entities.append(name)
+            self._levels.append(LEVELS.index(level))
+            self._text_starts.append(0)
+            self._text_ends.append(0)
+            previous = frozenset()
+        else:
+            if self._text_of(entity_id) == text:
+                return False
+            previous = _field_tokens(self.fields(entity_id))
+
+        for token in previous - tokens:
+            self._postings[token].remove(entity_id)
+            self._arrays.pop(token, None)
+        for token in tokens - previous if previous else tokens:
+            posting = self._postings.get(token)
+            if posting is None:
+                posting = self._postings[token] = array('i')
+            posting.append(entity_id)
+            self._arrays.pop(token, None)
+
+        # A re-indexed record is appended; its old text is left unused
+        self._text_starts[entity_id] = len(self._text)
+        self._text += text
+        self._text_ends[entity_id] = len(self._text)
+        return True
+
+    def fields(self, entity_id):
+        """Return the indexed {field: value} text attributes of an entity"""
+        text = self._text_of(entity_id)
+        return json.loads(text) if text else {}
+
+    def _text_of(self, entity_id):
+        return bytes(self._text[self._text_starts[entity_id]:self._text_ends[entity_id]])
+
+    def search(self, query, level=None, page=0, page_size=PAGE_SIZE):
+        """Return one page of entities whose attributes match query, best first
+
+        Entities are ranked by the summed inverse document frequency of the
+        query tokens they contain. The result is a dict with the matching
+        'total' and the page's 'results', each with the entity's level, name,
+        score and the attribute values that matched.
+        """
+        tokens = list(dict.fromkeys(tokenize(query)))
+        key = (tuple(tokens), level)
+
+        with self._lock:
+            ranked = self._results.get(key)
+            if ranked is None:
+                ranked = self._rank(tokens, level)
+                self._results[key] = ranked
+                while len(self._results) > RESULT_CACHE_SIZE:
+                    self._results.popitem(last=False)
+            else:
+                self._results.move_to_end(key)
+
+            ids, scores = ranked
+            start = page * page_size
+            results = []
+            for entity_id, score in zip(ids[start:start + page_size], scores[start:start + page_size]):
+                fields = self.fields(entity_id)
+                matches = {field: value for field, value in fields.items()
+                           if set(tokenize(value)) & set(tokens)}
+                results.append({'level': LEVELS[self._levels[entity_id]], 'name': self._entities[entity_id],
+                                'score': float(score), 'matches': matches})
+        return {'total': len(ids), 'results': results}
+
+    def _rank(self, tokens, level):
+        postings = [self._array(token) for token in tokens]
+        postings = [posting for posting in postings if len(posting)]
+        if not postings:
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+
+        # Sum the token weights of every entity in any of the postings
+        weights = [math.log(1 + len(self._entities) / len(posting)) for posting in postings]
+        ids, inverse = np.unique(np.concatenate(postings), return_inverse=True)
+        scores = np.bincount(inverse, weights=np.repeat(weights, [len(posting) for posting in postings]))
+        if level is not None:
+            keep = np.frombuffer(self._levels, dtype=np.int8)[ids] == LEVELS.index(level)
+            ids, scores = ids[keep], scores[keep]
+
+        order = np.lexsort((ids, -scores))
+        return ids[order], scores[order]
+
+    def _array(self, token):
+        postings = self._arrays.get(token)
+        if postings is None:
+            postings = self._arrays[token] = np.array(self._postings.get(token, ()), dtype=np.int64)
+        return postings
+
+
+_index = DetailIndex()
+
+
+def get_detail_index():
+    """Return the shared detail index"""
+    return _index
+
+
+def index_details(level, name, record):
+    """Add one loaded detail record to the shared index"""
+    _index.add(level, name, record)
+
+
+def index_source_details(source):
+    """Index every detail record of source, level by level in chunks"""
+    for level in LEVELS:
+        names = source.entities_at(level)
+        for start in range(0, len(names), INDEX_CHUNK):
+            chunk = names[start:start + INDEX_CHUNK]
+            _index.add_many(level, source.details_of_many(level, chunk))
+
+
+def start_detail_indexing(source):
+    """Index the detail records of source on a background thread"""
+    thread = threading.Thread(target=index_source_details, args=(source,),
+                              name='detail-index', daemon=True)
+    thread.start()
+    return thread
+
+
+def search_details(query, level=None, page=0, page_size=PAGE_SIZE):
+    """Search the text attributes of every indexed detail record, see DetailIndex.search()"""
+    return _index.search(query, level, page, page_size)
@@ -0,0 +1,260 @@
+"""
+Synthetic gazetteer generator for load and scale testing.
+Produces a deterministic continent -> country -> state -> city hierarchy of
+any size, with detail records shaped like the built-in demo data, and
+writes it to an SQLite file for SQLiteDataSource.
+
+Usage: python -m data.gazetteer gazetteer.db --cities 2000000
+"""
+
+import argparse
+import math
+import numpy as np
+from data.sources import LEVELS, DataSource, write_sqlite
+
+# Default number of entities generated per level
+DEFAULT_COUNTS = {'continent': 6, 'country': 200, 'state': 5000, 'city': 2000000}
+
+# Command line option for the count of each level
+_COUNT_OPTIONS = {'continent': '--continents', 'country': '--countries',
+                  'state': '--states', 'city': '--cities'}
+
+# Names are built from two-letter syllables, one syllable per base-80 digit
+# of the entity index, so every name maps back to its index
+_CONSONANTS = 'bdfghklmnprstvwz'
+_VOWELS = 'aeiou'
+_SYLLABLES = [c + v for c in _CONSONANTS for v in _VOWELS]
+
+# Suffix appended to the names at each level
+NAME_SUFFIXES = {'continent': 'ea', 'country': 'ia', 'state': 'shire', 'city': 'ton'}
+
+_FIRST_NAMES = ['Ana', 'Ben', 'Chen', 'Dara', 'Emil', 'Fatima', 'Goran', 'Hana',
+                'Ivan', 'Jun', 'Kofi', 'Lena', 'Mateo', 'Nia', 'Omar', 'Priya']
+_LAST_NAMES = ['Silva', 'Okafor', 'Tanaka', 'Novak', 'Haddad', 'Larsen', 'Reyes',
+               'Kowalski', 'Mensah', 'Ibrahim', 'Costa', 'Weber', 'Singh', 'Moreau']
+_LANGUAGES = ['English', 'Spanish', 'French', 'German', 'Mandarin', 'Hindi',
+              'Arabic', 'Portuguese', 'Russian', 'Swahili', 'Japanese', 'Italian']
+_CURRENCY_CODES = ['USD', 'EUR', 'GBP', 'JPY', 'INR', 'BRL', 'ZAR', 'AUD', 'CAD', 'MXN']
+_LANDMARKS = ['Cathedral', 'Harbour', 'Old Town', 'University', 'Market', 'Bridge',
+              'Museum', 'Castle', 'Stadium', 'Festival', 'Gardens', 'Waterfront']
+
+
+class SyntheticGazetteer(DataSource):
+    """Data source that computes a synthetic hierarchy on demand
+
+    Nothing is stored: names, parents and detail records are pure functions
+    of the entity index and the seed, so even millions of cities cost no
+    memory until they are written out. The children of each parent form a
+    contiguous, evenly sized range of indices.
+    """
+
+    blocking = False
+
+    def __init__(self, counts=None, seed=0):
+        self.counts = dict(DEFAULT_COUNTS, **(counts or {}))
+        self.seed = seed
+
+        # Seeded syllable order per level, and its inverse for parsing names
+        self._syllables = {}
+        self._syllable_digits = {}
+        for code, level in enumerate(LEVELS):
+            order = np.random.default_rng([seed, code]).permutation(len(_SYLLABLES))
+            syllables = [_SYLLABLES[i] for i in order]
+            self._syllables[level] = syllables
+            self._syllable_digits[level] = {syllable: digit for digit, syllable in enumerate(syllables)}
+        self._widths = {level: max(2, math.ceil(math.log(max(count, 2), len(_SYLLABLES))))
+                        for level, count in self.counts.items()}
+
+    def name(self, level, index):
+        """Return the name of the entity with this index at level"""
+        syllables = self._syllables[level]
+        parts = []
+        for _ in range(self._widths[level]):
+            index, digit = divmod(index, len(syllables))
+            parts.append(syllables[digit])
+        # Least significant syllable first, so neighbouring names differ up front
+        return ''.join(parts).capitalize() + NAME_SUFFIXES[level]
+
+    def index(self, level, name):
+        """Return the index of the entity with this name at level, or -1 if there is none"""
+        suffix = NAME_SUFFIXES[level]
+        stem = name[:-len(suffix)].lower() if name.endswith(suffix) else ''
+        if len(stem) != 2 * self._widths[level]:
+            return -1
+
+        digits = self._syllable_digits[level]
+        index = 0
+        for start in range(len(stem) - 2, -1, -2):
+            digit = digits.get(stem[start:start + 2])
+            if digit is None:
+                return -1
+            index = index * len(digits) + digit
+        return index if index < self.counts[level] else -1
+
+    def child_range(self, level, index):
+        """Return the range of child indices of the entity with this index at level"""
+        child_level = LEVELS[LEVELS.index(level) + 1]
+        parents, children = self.counts[level], self.counts[child_level]
+        return range(index * children // parents, (index + 1) * children // parents)
+
+    def parent_index(self, level, index):
+        """Return the index of the parent of the entity with this index at level"""
+        parent_level = LEVELS[LEVELS.index(level) - 1]
+        parents, children = self.counts[parent_level], self.counts[level]
+        parent = index * parents // children
+        # Integer division can land one parent short of the owning range
+        while (parent + 1) * children // parents <= index:
+            parent += 1
+        return parent
+
+    def continents(self):
+        return [self.name('continent', i) for i in range(self.counts['continent'])]
+
+    def children_of_many(self, level, parents):
+        if level == LEVELS[-1]:
+            return {parent: [] for parent in parents}
+
+        child_level = LEVELS[LEVELS.index(level) + 1]
+        result = {}
+        for parent in parents:
+            index = self.index(level, parent)
+            children = self.child_range(level, index) if index >= 0 else []
+            result[parent] = [self.name(child_level, child) for child in children]
+        return result
+
+    def details_of_many(self, level, names):
+        indices = np.array([self.index(level, name) for name in names], dtype=np.int64)
+        records = _DETAIL_BUILDERS[level](self, np.maximum(indices, 0))
+        return {name: record if index >= 0 else {}
+                for name, index, record in zip(names, indices, records)}
+
+    def ancestors_of(self, level, name, within=None):
+        # Generated names are unique per level, so within never changes the result
+        index = self.index(level, name)
+        if index < 0:
+            return {}
+
+        ancestors = {}
+        for parent_level in reversed(LEVELS[:LEVELS.index(level)]):
+            index = self.parent_index(LEVELS[LEVELS.index(parent_level) + 1], index)
+            ancestors[parent_level] = self.name(parent_level, index)
+        return ancestors
+
+    def _random(self, level, indices, field):
+        # Deterministic uniform [0, 1) values per (seed, level, field, index), via splitmix64
+        key = np.uint64((self.seed * 1000003 + LEVELS.index(level) * 101 + field) & 0xFFFFFFFFFFFFFFFF)
+        with np.errstate(over='ignore'):
+            x = indices.astype(np.uint64) * np.uint64(0x9E3779B97F4A7C15) + key
+            x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+            x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+            x = x ^ (x >> np.uint64(31))
+        return (x >> np.uint64(11)).astype(np.float64) / float(1 << 53)
+
+    def _pick(self, level, indices, field, choices):
+        return [choices[i] for i in (self._random(level, indices, field) * len(choices)).astype(np.int64)]
+
+    def _child_name(self, level, indices, field):
+        # A random child, e.g. the capital of a country or state
+        child_level = LEVELS[LEVELS.index(level) + 1]
+        names = []
+        for index, r in zip(indices, self._random(level, indices, field)):
+            children = self.child_range(level, int(index))
+            names.append(self.name(child_level, children[int(r * len(children))]) if children else '')
+        return names
+
+
+def _format_population(value):
+    if value >= 1e9:
+        return f"{value / 1e9:.1f} billion"
+    if value >= 1e6:
+        return f"{value / 1e6:.1f} million"
+    return f"{value:,.0f}"
+
+
+def _format_area(value):
+    if value >= 1e6:
+        return f"{value / 1e6:.2f} million km²"
+    return f"{value:,.0f} km²"
+
+
+def _log_uniform(r, low, high):
+    return np.exp(np.log(low) + r * (np.log(high) - np.log(low)))
+
+
+def _continent_details(gazetteer, indices):
+    population = _log_uniform(gazetteer._random('continent', indices, 0), 4e7, 5e9)
+    area = _log_uniform(gazetteer._random('continent', indices, 1), 8e6, 4.5e7)
+    languages = [gazetteer._pick('continent', indices, field, _LANGUAGES) for field in (2, 3, 4)]
+    return [{'Population': _format_population(population[i]), 'Area': _format_area(area[i]),
+             'Countries': str(len(gazetteer.child_range('continent', int(index)))),
+             'Major Languages': ', '.join(dict.fromkeys(language[i] for language in languages))}
+            for i, index in enumerate(indices)]
+
+
+def _country_details(gazetteer, indices):
+    population = _log_uniform(gazetteer._random('country', indices, 0), 1e5, 1.4e9)
+    gdp = population * _log_uniform(gazetteer._random('country', indices, 1), 500, 80000)
+    capitals = gazetteer._child_name('country', indices, 2)
+    currencies = gazetteer._pick('country', indices, 3, _CURRENCY_CODES)
+    languages = gazetteer._pick('country', indices, 4, _LANGUAGES)
+    return [{'Capital': capitals[i], 'Population': _format_population(population[i]),
+             'GDP': f"${gdp[i] / 1e12:.1f} trillion" if gdp[i] >= 1e12 else f"${gdp[i] / 1e9:.1f} billion",
+             'Currency': currencies[i], 'Official Language': languages[i]}
+            for i in range(len(indices))]
+
+
+def _state_details(gazetteer, indices):
+    population = _log_uniform(gazetteer._random('state', indices, 0), 5e4, 4e7)
+    area = _log_uniform(gazetteer._random('state', indices, 1), 1e3, 1.5e6)
+    founded = 1500 + (gazetteer._random('state', indices, 2) * 500).astype(np.int64)
+    capitals = gazetteer._child_name('state', indices, 3)
+    largest = gazetteer._child_name('state', indices, 4)
+    return [{'Capital': capitals[i], 'Population': _format_population(population[i]),
+             'Largest City': largest[i], 'Area': _format_area(area[i]),
+             'Year Founded': str(founded[i])}
+            for i in range(len(indices))]
+
+
+def _city_details(gazetteer, indices):
+    population = _log_uniform(gazetteer._random('city', indices, 0), 1e3, 2e7)
+    area = _log_uniform(gazetteer._random('city', indices, 1), 5, 5e3)
+    founded = 800 + (gazetteer._random('city', indices, 2) * 1200).astype(np.int64)
+    first_names = gazetteer._pick('city', indices, 3, _FIRST_NAMES)
+    last_names = gazetteer._pick('city', indices, 4, _LAST_NAMES)
+    landmarks = gazetteer._pick('city', indices, 5, _LANDMARKS)
+    return [{'Population': _format_population(population[i]), 'Area': _format_area(area[i]),
+             'Mayor': f"{first_names[i]} {last_names[i]}", 'Founded': str(founded[i]),
+             'Famous For': landmarks[i]}
+            for i in range(len(indices))]
+
+
+# Detail record builder per level, vectorized over entity indices
+_DETAIL_BUILDERS = {
+    'continent': _continent_details,
+    'country': _country_details,
+    'state': _state_details,
+    'city': _city_details,
+}
+
+
+def write_gazetteer(path, counts=None, seed=0):
+    """Generate a gazetteer and write it to path as an SQLite file for SQLiteDataSource ('sqlite:///path')"""
+    gazetteer = SyntheticGazetteer(counts, seed)
+    write_sqlite(gazetteer, path)
+    return gazetteer
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('path', help="output SQLite file, e.g. gazetteer.db")
+    for level in LEVELS:
+        parser.add_argument(_COUNT_OPTIONS[level], dest=level, type=int, default=DEFAULT_COUNTS[level],
+                            help=f"number of {level} entities (default {DEFAULT_COUNTS[level]})")
+    parser.add_argument('--seed', type=int, default=0, help="random seed (default 0)")
+    args = parser.parse_args(argv)
+
+    write_gazetteer(args.path, {level: getattr(args, level) for level in LEVELS}, args.seed)
+
+
+if __name__ == '__main__':
+    main()
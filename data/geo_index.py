@@ -0,0 +1,282 @@
+"""
+Array-backed index of the geographic hierarchy.
+Entities are interned as integer ids and navigated with NumPy arrays, so
+children-of is an array slice and ancestors-of is a short walk up parent
+pointers, with a small, flat memory footprint even for millions of places.
+"""
+
+import hashlib
+import numpy as np
+from data.sources import LEVELS, DataSource, is_within
+
+# Level codes stored in the level array
+LEVEL_CODES = {level: code for code, level in enumerate(LEVELS)}
+
+# (children, details) data types of each level of a path
+_PATH_DATA_TYPES = [
+    ('countries', 'continent_data'),
+    ('states', 'country_data'),
+    ('cities', 'state_data'),
+    (None, 'city_data'),
+]
+
+
+def name_hash(level, name):
+    """Return a stable 64-bit hash of a (level, name) pair"""
+    digest = hashlib.blake2b(f"{level}\x00{name}".encode('utf-8'), digest_size=8).digest()
+    return np.frombuffer(digest, dtype=np.int64)[0]
+
+
+class GeoIndex:
+    """Compact index of the continent -> country -> state -> city hierarchy
+
+    Ids are assigned breadth first, so the children of every entity occupy a
+    contiguous id range: the children of entity i are the ids from
+    child_offsets[i] to child_offsets[i + 1] (a CSR layout without the
+    indirection array). Names are stored as one UTF-8 buffer plus offsets,
+    and looked up through a sorted array of 64-bit (level, name) hashes.
+    """
+
+    def __init__(self, name_buffer, name_offsets, levels, parents, child_offsets,
+                 hash_order=None, sorted_hashes=None):
+        self.name_buffer = name_buffer
+        self.name_offsets = name_offsets
+        self.levels = levels
+        self.parents = parents
+        self.child_offsets = child_offsets
+
+        # Sorted hash table for name -> id lookups
+        if hash_order is None:
+            hashes = np.fromiter(
+                (name_hash(LEVELS[code], self.name(i)) for i, code in enumerate(levels)),
+                dtype=np.int64, count=len(levels)
+            )
+            hash_order = np.argsort(hashes, kind='stable').astype(np.int32)
+            sorted_hashes = hashes[hash_order]
+        self._hash_order = hash_order
+        self._sorted_hashes = sorted_hashes
+
+    def __len__(self):
+        return len(self.levels)
+
+    @classmethod
+    def from_hierarchy(cls, continents, children):
+        """Build an index from continent names and {level: {parent: [child, ...]}} dicts"""
+        names = list(continents)
+        levels = [LEVEL_CODES['continent']] * len(names)
+        parents = [-1] * len(names)
+        child_offsets = []
+
+        # Breadth first: the children of each entity are appended in one run
+        level_start = 0
+        for level in LEVELS:
+            level_end = len(names)
+            child_level = LEVELS[LEVELS.index(level) + 1] if level != LEVELS[-1] else None
+            level_children = children.get(level, {})
+            for entity_id in range(level_start, level_end):
+                child_offsets.append(len(names))
+                if child_level is None:
+                    continue
+                for child in level_children.get(names[entity_id], []):
+                    names.append(child)
+                    levels.append(LEVEL_CODES[child_level])
+                    parents.append(entity_id)
+            level_start = level_end
+        child_offsets.append(len(names))
+
+        encoded = [name.encode('utf-8') for name in names]
+        name_offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(name) for name in encoded], out=name_offsets[1:])
+
+        return cls(
+            np.frombuffer(b''.join(encoded), dtype=np.uint8),
+            name_offsets,
+            np.array(levels, dtype=np.int8),
+            np.array(parents, dtype=np.int32),
+            np.array(child_offsets, dtype=np.int32),
+        )
+
+    @classmethod
+    def from_source(cls, source):
+        """Build an index by walking a DataSource level by level with bulk lookups"""
+        continents = source.continents()
+        children = {}
+        current = continents
+        for level in LEVELS[:-1]:
+            children[level] = source.children_of_many(level, current)
+            current = [child for names in children[level].values() for child in names]
+        return cls.from_hierarchy(continents, children)
+
+    @classmethod
+    def load(cls, path):
+        """Load an index saved with save()"""
+        with np.load(path) as arrays:
+            return cls(arrays['name_buffer'], arrays['name_offsets'], arrays['levels'],
+                       arrays['parents'], arrays['child_offsets'],
+                       arrays['hash_order'], arrays['sorted_hashes'])
+
+    def save(self, path):
+        """Save the index arrays to an .npz file"""
+        np.savez(path, name_buffer=self.name_buffer, name_offsets=self.name_offsets,
+                 levels=self.levels, parents=self.parents, child_offsets=self.child_offsets,
+                 hash_order=self._hash_order, sorted_hashes=self._sorted_hashes)
+
+    def name(self, entity_id):
+        """Return the name of an entity"""
+        start, end = self.name_offsets[entity_id], self.name_offsets[entity_id + 1]
+        return self.name_buffer[start:end].tobytes().decode('utf-8')
+
+    def level(self, entity_id):
+        """Return the level name of an entity"""
+        return LEVELS[self.levels[entity_id]]
+
+    def lookup(self, level, name, within=None):
+        """Return the id of the entity with this name at level, or -1 if there is none
+
+        Several entities may share a name; within maps known ancestor levels
+        to names to pick the one on that path, else the first one is returned.
+        """
+        return next((entity_id for entity_id in self._named(level, name)
+                     if not within or is_within(self.ancestor_names(entity_id), within)), -1)
+
+    def lookup_path(self, names):
+        """Return the ids along a path of names given from the continent down
+
+        Each name is looked up among the children of the previous one, so
+        names shared with entities on other paths resolve to this path. The
+        ids stop at the first name that is empty or not found.
+        """
+        ids = []
+        for level, name in zip(LEVELS, names):
+            if not name:
+                break
+            parent = ids[-1] if ids else -1
+            entity_id = next((entity_id for entity_id in self._named(level, name)
+                              if self.parents[entity_id] == parent), -1)
+            if entity_id < 0:
+                break
+            ids.append(entity_id)
+        return ids
+
+    def _named(self, level, name):
+        # Ids of every entity with this name at level, through the sorted hash table
+        target = name_hash(level, name)
+        position = np.searchsorted(self._sorted_hashes, target)
+        code = LEVEL_CODES[level]
+        while position < len(self._sorted_hashes) and self._sorted_hashes[position] == target:
+            entity_id = int(self._hash_order[position])
+            if self.levels[entity_id] == code and self.name(entity_id) == name:
+                yield entity_id
+            position += 1
+
+    def ids_at_level(self, level):
+        """Return the ids of every entity at level, as a contiguous range"""
+        matches = np.flatnonzero(self.levels == LEVEL_CODES[level])
+        if len(matches) == 0:
+            return np.arange(0, dtype=np.int32)
+        return np.arange(matches[0], matches[-1] + 1, dtype=np.int32)
+
+    def child_ids(self, entity_id):
+        """Return the ids of the children of an entity"""
+        return np.arange(self.child_offsets[entity_id], self.child_offsets[entity_id + 1],
+                         dtype=np.int32)
+
+    def children_of(self, level, name):
+        """Return the names of the children of the entity with this name at level"""
+        entity_id = self.lookup(level, name)
+        if entity_id < 0:
+            return []
+        return [self.name(child) for child in self.child_ids(entity_id)]
+
+    def descendant_ids(self, entity_id, level):
+        """Return the ids of the descendants of an entity at level, as a contiguous range"""
+        start, end = entity_id, entity_id + 1
+        for _ in range(LEVEL_CODES[level] - self.levels[entity_id]):
+            start, end = self.child_offsets[start], self.child_offsets[end]
+        return np.arange(start, end, dtype=np.int32)
+
+    def ancestor_ids(self, entity_id):
+        """Return the ids of the ancestors of an entity, nearest first"""
+        ancestors = []
+        parent = self.parents[entity_id]
+        while parent >= 0:
+            ancestors.append(int(parent))
+            parent = self.parents[parent]
+        return ancestors
+
+    def ancestor_names(self, entity_id):
+        """Return {level: name} for the ancestors of an entity"""
+        return {self.level(ancestor): self.name(ancestor) for ancestor in self.ancestor_ids(entity_id)}
+
+    def ancestors_of(self, level, name, within=None):
+        """Return {level: name} for the ancestors of the entity with this name at level"""
+        entity_id = self.lookup(level, name, within)
+        if entity_id < 0:
+            return {}
+        return self.ancestor_names(entity_id)
+
+    def nbytes(self):
+        """Return the memory used by the index arrays in bytes"""
+        return sum(array.nbytes for array in (
+            self.name_buffer, self.name_offsets, self.levels, self.parents,
+            self.child_offsets, self._hash_order, self._sorted_hashes
+        ))
+
+
+class GeoIndexDataSource(DataSource):
+    """Data source answering hierarchy lookups from a GeoIndex
+
+    Detail records are kept in a list aligned with the index ids.
+    """
+
+    blocking = False
+
+    def __init__(self, index, details):
+        self.index = index
+        self._details = details
+
+    @classmethod
+    def from_source(cls, source):
+        """Index every entity and detail record of another data source"""
+        index = GeoIndex.from_source(source)
+        details = [None] * len(index)
+        for level in LEVELS:
+            ids = index.ids_at_level(level)
+            records = source.details_of_many(level, [index.name(i) for i in ids])
+            for entity_id in ids:
+                details[entity_id] = records.get(index.name(entity_id)) or None
+        return cls(index, details)
+
+    def continents(self):
+        return [self.index.name(i) for i in self.index.ids_at_level('continent')]
+
+    def children_of_many(self, level, parents):
+        return {parent: self.index.children_of(level, parent) for parent in parents}
+
+    def details_of_many(self, level, names):
+        result = {}
+        for name in names:
+            entity_id = self.index.lookup(level, name)
+            result[name] = (self._details[entity_id] or {}) if entity_id >= 0 else {}
+        return result
+
+    def ancestors_of(self, level, name, within=None):
+        return self.index.ancestors_of(level, name, within)
+
+    def hierarchy_path(self, continent=None, country=None, state=None, city=None):
+        # Resolve the path by id, so names shared with other branches are not mixed in
+        ids = self.index.lookup_path([continent, country, state, city])
+        path = {'continents': self.continents()}
+        for (children_type, data_type), entity_id in zip(_PATH_DATA_TYPES, ids):
+            if children_type:
+                path[children_type] = [self.index.name(child) for child in self.index.child_ids(entity_id)]
+            path[data_type] = self._details[entity_id] or {}
+        return path
+
+    def entities_at(self, level, scope_level=None, scope_name=None):
+        if scope_level is None:
+            ids = self.index.ids_at_level(level)
+        else:
+            scope_id = self.index.lookup(scope_level, scope_name)
+            ids = self.index.descendant_ids(scope_id, level) if scope_id >= 0 else []
+        return [self.index.name(i) for i in ids]
@@ -0,0 +1,160 @@
+"""
+Hedged requests for upstream data fetches.
+Tracks the latency of every data type, and when a call runs past the usual
+percentile for its type, issues a duplicate call and takes whichever
+finishes first.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import numpy as np
+
+# Percentile of recent latencies after which a hedged duplicate is issued
+HEDGE_PERCENTILE = 95
+
+# Number of recent latencies kept per data type, and how many are needed
+# before hedging starts
+LATENCY_WINDOW = 100
+MIN_SAMPLES = 20
+
+# Number of threads available for primary and hedged upstream calls
+HEDGE_WORKERS = 32
+
+
+class LatencyTracker:
+    """Rolling window of call latencies per name"""
+
+    def __init__(self, window=LATENCY_WINDOW):
+        self._window = window
+        self._lock = threading.Lock()
+        self._samples = {}
+
+    def record(self, name, seconds):
+        """Record the latency of a completed call"""
+        with self._lock:
+            samples = self._samples.get(name)
+            if samples is None:
+                samples = self._samples[name] = deque(maxlen=self._window)
+            samples.append(seconds)
+
+    def percentile(self, name, percentile=HEDGE_PERCENTILE, min_samples=MIN_SAMPLES):
+        """Return the given latency percentile for name, or None without enough samples"""
+        with self._lock:
+            samples = list(self._samples.get(name, ()))
+        if len(samples) < min_samples:
+            return None
+        return float(np.percentile(samples, percentile))
+
+    def names(self):
+        """Return every name with recorded latencies"""
+        with self._lock:
+            return list(self._samples)
+
+
+_latencies = LatencyTracker()
+_executor = ThreadPoolExecutor(max_workers=HEDGE_WORKERS, thread_name_prefix='upstream')
+_stats_lock = threading.Lock()
+_hedged = {}
+_hedge_wins = {}
+
+
+def _reset_after_fork():
+    # A forked child (a background callback job) has none of the parent's
+    # threads, so it needs a pool of its own; the latency history is kept
+    global _executor, _stats_lock
+    _executor = ThreadPoolExecutor(max_workers=HEDGE_WORKERS, thread_name_prefix='upstream')
+    _stats_lock = threading.Lock()
+    _latencies._lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _timed(name, fn, args):
+    start = time.monotonic()
+    result = fn(*args)
+    _latencies.record(name, time.monotonic() - start)
+    return result
+
+
+def _count_hedge(name, won=False):
+    with _stats_lock:
+        counter = _hedge_wins if won else _hedged
+        counter[name] = counter.get(name, 0) + 1
+
+
+def hedged_call(name, fn, *args):
+    """Call fn(*args), issuing a duplicate call if it runs past the usual latency for name"""
+    threshold = _latencies.percentile(name)
+    if threshold is None:
+        # Not enough history to know what "slow" means yet
+        return _timed(name, fn, args)
+
+    primary = _executor.submit(_timed, name, fn, args)
+    done, _ = wait([primary], timeout=threshold)
+    if done:
+        return primary.result()
+
+    hedge = _executor.submit(_timed, name, fn, args)
+    _count_hedge(name)
+    done, _ = wait([primary, hedge], return_when=FIRST_COMPLETED)
+    first = done.pop()
+    if first.exception() is None:
+        if first is hedge:
+            _count_hedge(name, won=True)
+        return first.result()
+
+    # The first call to finish failed; use the other one instead
+    other = hedge if first is primary else primary
+    return other.result()
+
+
+async def _timed_async(name, fn, args):
+    start = time.monotonic()
+    result = await fn(*args)
+    _latencies.record(name, time.monotonic() - start)
+    return result
+
+
+async def hedged_call_async(name, fn, *args):
+    """Async variant of hedged_call for coroutine functions"""
+    threshold = _latencies.percentile(name)
+    if threshold is None:
+        return await _timed_async(name, fn, args)
+
+    primary = asyncio.ensure_future(_timed_async(name, fn, args))
+    done, _ = await asyncio.wait([primary], timeout=threshold)
+    if done:
+        return primary.result()
+
+    hedge = asyncio.ensure_future(_timed_async(name, fn, args))
+    _count_hedge(name)
+    done, _ = await asyncio.wait([primary, hedge], return_when=asyncio.FIRST_COMPLETED)
+    first = done.pop()
+    other = hedge if first is primary else primary
+    if first.exception() is None:
+        if first is hedge:
+            _count_hedge(name, won=True)
+        # Let the slower call finish in the background; nobody awaits it
+        other.add_done_callback(lambda task: task.cancelled() or task.exception())
+        return first.result()
+    return await other
+
+
+def get_hedging_stats():
+    """Return the hedge threshold and hedge counts of every tracked data type"""
+    with _stats_lock:
+        names = set(_hedged) | set(_hedge_wins) | set(_latencies.names())
+        return {
+            name: {
+                'threshold': _latencies.percentile(name),
+                'hedged': _hedged.get(name, 0),
+                'hedge_wins': _hedge_wins.get(name, 0),
+            }
+            for name in sorted(names)
+        }
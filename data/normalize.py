@@ -0,0 +1,54 @@
+"""
+Numeric normalization of detail records for the tables.
+Detail values arrive as display strings ("331 million", "$21.4 trillion",
+"1,302 km²"). When a table's rows are built (once per loaded browse level),
+they are parsed with one vectorized pass per field into numeric companion
+columns next to the formatted values, so the grid sorts and filters by
+number. Records returned by the data API keep only the formatted values.
+"""
+
+import pandas as pd
+
+# Detail fields that hold quantities
+NUMERIC_FIELDS = ('Population', 'Area', 'GDP', 'Countries', 'Year Founded', 'Founded')
+
+# Suffix of the numeric companion of a field, e.g. 'Population__value'
+VALUE_SUFFIX = '__value'
+
+# Multipliers of the scale words used in the display strings
+SCALES = {'thousand': 1e3, 'million': 1e6, 'billion': 1e9, 'trillion': 1e12}
+
+# First number in a display string, with an optional scale word
+_QUANTITY_PATTERN = r'(?P<number>\d[\d,]*(?:\.\d+)?)\s*(?P<scale>thousand|million|billion|trillion)?'
+
+
+def value_field(field):
+    """Return the name of the numeric companion of a field"""
+    return field + VALUE_SUFFIX
+
+
+def parse_quantities(values):
+    """Parse a Series of display strings into floats, NaN where there is no number"""
+    parts = values.astype('string').str.extract(_QUANTITY_PATTERN)
+    numbers = pd.to_numeric(parts['number'].str.replace(',', '', regex=False), errors='coerce')
+    scales = parts['scale'].str.lower().map(SCALES).astype('float64').fillna(1.0)
+    return (numbers * scales).astype('float64')
+
+
+def normalize_details(records):
+    """Return copies of detail records with numeric companions for their quantity fields"""
+    records = list(records)
+    frame = pd.DataFrame.from_records([record or {} for record in records])
+
+    # One vectorized parse per field covers every record
+    values = {field: parse_quantities(frame[field]) for field in NUMERIC_FIELDS if field in frame}
+
+    normalized = []
+    for position, record in enumerate(records):
+        record = dict(record or {})
+        for field, parsed in values.items():
+            value = parsed.iat[position]
+            if field in record and not pd.isna(value):
+                record[value_field(field)] = float(value)
+        normalized.append(record)
+    return normalized
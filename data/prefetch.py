@@ -0,0 +1,153 @@
+"""
+Predictive prefetching for the dashboard application.
+Warms the cache for the children of the current selection in the
+background, so the user's next pick is usually a cache hit.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from data.cache import fetch_bulk_with_cache, get_cached
+
+# Number of background threads used for prefetching
+PREFETCH_WORKERS = 4
+
+# Maximum number of children warmed per selection
+PREFETCH_LIMIT = 20
+
+# Maximum number of sessions whose prefetches are tracked at once
+MAX_TRACKED_SCOPES = 1024
+
+# Data types to warm for each child, by the level of the selected entity
+CHILD_DATA_TYPES = {
+    'continent': ['country_data', 'states'],
+    'country': ['state_data', 'cities'],
+    'state': ['city_data'],
+    'city': [],
+}
+
+# Data type of the child list of a selected entity, by its level
+CHILD_LIST_TYPES = {
+    'continent': 'countries',
+    'country': 'states',
+    'state': 'cities',
+}
+
+
+class Prefetcher:
+    """Warm cache entries on a bounded thread pool, cancelling superseded work per scope"""
+
+    def __init__(self, max_workers=PREFETCH_WORKERS):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='prefetch')
+        self._lock = threading.Lock()
+        self._scopes = OrderedDict()
+
+    def schedule(self, scope, batches):
+        """Warm (data_type, parents) batches for scope, cancelling any prefetch still pending for it
+
+        Returns one future per batch, resolving to the fetched {parent: value}
+        dict, or None if the batch was superseded or failed.
+        """
+        token = object()
+        with self._lock:
+            previous = self._scopes.pop(scope, None)
+            if previous is not None:
+                for future in previous[1]:
+                    future.cancel()
+
+            futures = [self._executor.submit(self._warm, scope, token, batch) for batch in batches]
+            self._scopes[scope] = (token, futures)
+
+            # Forget the least recently active scopes
+            while len(self._scopes) > MAX_TRACKED_SCOPES:
+                self._scopes.popitem(last=False)
+        return futures
+
+    def cancel(self, scope):
+        """Cancel every prefetch still pending for scope"""
+        self.schedule(scope, [])
+
+    def is_current(self, scope, future):
+        """Return whether future belongs to the latest prefetch scheduled for scope"""
+        with self._lock:
+            current = self._scopes.get(scope)
+        return current is not None and future in current[1]
+
+    def _warm(self, scope, token, batch):
+        # Skip the work if the selection has moved on since it was queued
+        with self._lock:
+            current = self._scopes.get(scope)
+        if current is None or current[0] is not token:
+            return None
+
+        try:
+            data_type, parents = batch
+            return fetch_bulk_with_cache(data_type, parents)
+        except Exception:
+            # Prefetching is best effort; the real request will report errors
+            return None
+
+
+_prefetcher = Prefetcher()
+
+
+def _reset_after_fork():
+    # A forked child has none of the parent's prefetch threads, and the
+    # parent's sessions are not its business
+    global _prefetcher
+    _prefetcher = Prefetcher()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def prefetch_children(scope, level, children):
+    """Warm the option lists and detail records of the children of a selection
+
+    scope identifies the client session, so a newer selection from the same
+    session cancels the prefetches of the previous one.
+    """
+    # One bulk request per data type covers every child not cached yet
+    children = list(children[:PREFETCH_LIMIT])
+    batches = []
+    for data_type in CHILD_DATA_TYPES.get(level, []) if children else []:
+        missing = [child for child in children if get_cached(data_type, child) is None]
+        if missing:
+            batches.append((data_type, missing))
+    _prefetcher.schedule(scope, batches)
+
+
+def prefetch_selection(scope, level, name):
+    """Warm the children of a selection whose child list may not be loaded yet
+
+    Unless it is cached, the child list is resolved on the prefetch pool
+    too, and its children are then warmed as by prefetch_children(), so the
+    caller never waits. Children already cached are not fetched again.
+    """
+    data_type = CHILD_LIST_TYPES.get(level)
+    if not name or data_type is None:
+        _prefetcher.cancel(scope)
+        return
+
+    # A cached child list is used at once, without a trip through the pool
+    children = get_cached(data_type, name)
+    if children is not None:
+        prefetch_children(scope, level, children)
+        return
+
+    def warm_children(future):
+        # A newer selection of the same session takes precedence
+        if future.cancelled() or not _prefetcher.is_current(scope, future):
+            return
+        children = future.result()
+        if children:
+            try:
+                prefetch_children(scope, level, children.get(name) or [])
+            except RuntimeError:
+                # The pool no longer takes work once the interpreter is shutting down
+                pass
+
+    future, = _prefetcher.schedule(scope, [(data_type, [name])])
+    future.add_done_callback(warm_children)
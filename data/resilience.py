@@ -0,0 +1,167 @@
+"""
+Resilience helpers for upstream data fetches.
+Provides bounded retries with jittered exponential backoff, and a circuit
+breaker per data type that fails fast while an endpoint keeps erroring.
+"""
+
+import asyncio
+import logging
+import random
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Retry policy for upstream calls
+MAX_ATTEMPTS = 3
+BASE_DELAY = 0.1
+MAX_DELAY = 1.0
+
+# Consecutive failures that open a circuit, and how long it stays open (seconds)
+FAILURE_THRESHOLD = 5
+RESET_TIMEOUT = 30.0
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because its circuit breaker is open"""
+
+
+class CircuitBreaker:
+    """Circuit breaker that opens after repeated consecutive failures
+
+    While open, calls are rejected immediately. After reset_timeout seconds a
+    single trial call is let through; its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, name, failure_threshold=FAILURE_THRESHOLD,
+                 reset_timeout=RESET_TIMEOUT, clock=time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+        self.rejected = 0
+        self.times_opened = 0
+
+    def allow(self):
+        """Return True if a call may proceed"""
+        with self._lock:
+            if self._state == OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+                self._state = HALF_OPEN
+                self._trial_in_flight = False
+
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+
+            self.rejected += 1
+            return False
+
+    def record_success(self):
+        """Record a successful call, closing the circuit"""
+        with self._lock:
+            if self._state != CLOSED:
+                logger.info("Circuit for %s closed", self.name)
+            self._state = CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        """Record a failed call, opening the circuit if the threshold is reached"""
+        with self._lock:
+            self._failures += 1
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    self.times_opened += 1
+                    logger.warning("Circuit for %s opened after %d consecutive failures",
+                                   self.name, self._failures)
+                self._state = OPEN
+                self._opened_at = self._clock()
+                self._trial_in_flight = False
+
+    def snapshot(self):
+        """Return the current state and counters of the breaker"""
+        with self._lock:
+            return {
+                'state': self._state,
+                'consecutive_failures': self._failures,
+                'times_opened': self.times_opened,
+                'rejected': self.rejected,
+            }
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name):
+    """Return the circuit breaker for name, creating it on first use"""
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = _breakers[name] = CircuitBreaker(name)
+        return breaker
+
+
+def get_circuit_states():
+    """Return the state of every circuit breaker, keyed by name"""
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {breaker.name: breaker.snapshot() for breaker in breakers}
+
+
+def backoff_delay(attempt):
+    """Return the jittered delay before retry number attempt (starting at 1)"""
+    # "Full jitter": a uniform delay up to the exponential cap, so retries
+    # from many workers do not arrive in synchronised waves
+    return random.uniform(0, min(MAX_DELAY, BASE_DELAY * 2 ** (attempt - 1)))
+
+
+def call_with_resilience(name, fn, *args, max_attempts=MAX_ATTEMPTS):
+    """Call fn(*args) through the circuit breaker for name, retrying failures
+
+    Raises CircuitOpenError without calling fn while the circuit is open, or
+    the last error once every attempt has failed.
+    """
+    breaker = get_breaker(name)
+    for attempt in range(1, max_attempts + 1):
+        if not breaker.allow():
+            raise CircuitOpenError(f"Circuit open for {name}; skipping upstream call")
+        try:
+            result = fn(*args)
+        except Exception:
+            breaker.record_failure()
+            if attempt == max_attempts:
+                raise
+            time.sleep(backoff_delay(attempt))
+        else:
+            breaker.record_success()
+            return result
+
+
+async def call_with_resilience_async(name, fn, *args, max_attempts=MAX_ATTEMPTS):
+    """Async variant of call_with_resilience for coroutine functions"""
+    breaker = get_breaker(name)
+    for attempt in range(1, max_attempts + 1):
+        if not breaker.allow():
+            raise CircuitOpenError(f"Circuit open for {name}; skipping upstream call")
+        try:
+            result = await fn(*args)
+        except Exception:
+            breaker.record_failure()
+            if attempt == max_attempts:
+                raise
+            await asyncio.sleep(backoff_delay(attempt))
+        else:
+            breaker.record_success()
+            return result
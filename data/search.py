@@ -0,0 +1,252 @@
+"""
+Search indexes for the dashboard application.
+Option lists are indexed once per cached list, so dropdown searches only
+ship the few matching names to the browser, however large the level is.
+Place names of every level are indexed by trigram for fuzzy search.
+"""
+
+import bisect
+import sys
+import threading
+import numpy as np
+from data import api
+from data.cache import TTLCache, fetch_data_with_cache
+from data.geo_index import GeoIndex, GeoIndexDataSource
+
+# Maximum number of matches returned by a search
+SEARCH_LIMIT = 50
+
+# Memory budget for search indexes, in bytes
+INDEX_MAX_BYTES = 64 * 1024 * 1024
+
+# Time-to-live (in seconds) of an index; it is also rebuilt whenever its list is refreshed
+INDEX_TTL = 60 * 60
+
+# Sorts after every other character, to bound a prefix range
+_MAX_CHAR = chr(0x10FFFF)
+
+# Maximum number of postings gathered as candidates per fuzzy search. Whole
+# postings of the rarest trigrams are taken until this is reached; the
+# postings of more common trigrams are never read.
+CANDIDATE_LIMIT = 40000
+
+# Maximum number of candidates scored against every query trigram per fuzzy search
+SCORED_CANDIDATES = 256
+
+# Minimum trigram similarity of a fuzzy match
+MIN_SIMILARITY = 0.2
+
+
+class PrefixIndex:
+    """Sorted array of case-folded names, searched by prefix with bisection"""
+
+    def __init__(self, names):
+        pairs = sorted((name.casefold(), name) for name in names)
+        self._keys = [key for key, _ in pairs]
+        self._names = [name for _, name in pairs]
+
+    def __len__(self):
+        return len(self._names)
+
+    def __sizeof__(self):
+        return (object.__sizeof__(self) + sys.getsizeof(self._keys) + sys.getsizeof(self._names)
+                + sum(sys.getsizeof(key) for key in self._keys))
+
+    def search(self, prefix, limit=SEARCH_LIMIT):
+        """Return up to limit names starting with prefix (case-insensitive), in sorted order"""
+        prefix = prefix.casefold()
+        start = bisect.bisect_left(self._keys, prefix)
+        end = bisect.bisect_left(self._keys, prefix + _MAX_CHAR, lo=start)
+        return self._names[start:min(end, start + limit)]
+
+
+_indexes = TTLCache(INDEX_MAX_BYTES)
+
+
+def get_prefix_index(data_type, parent):
+    """Return a prefix index of the cached option list of data_type for parent"""
+    names = fetch_data_with_cache(data_type, parent)
+    key = ('prefix', data_type, parent)
+
+    # Reuse the index only while it was built from the list currently cached
+    cached = _indexes.get(key, None)
+    if cached is not None and cached[0] is names:
+        return cached[1]
+
+    index = PrefixIndex(names)
+    _indexes.set(key, (names, index), INDEX_TTL)
+    return index
+
+
+def search_children(data_type, parent, prefix, limit=SEARCH_LIMIT):
+    """Return up to limit names in the option list of data_type for parent that start with prefix"""
+    return get_prefix_index(data_type, parent).search(prefix, limit)
+
+
+class TrigramIndex:
+    """Inverted index from byte trigrams of lower-cased names to GeoIndex entity ids
+
+    Postings are stored as one sorted id array per trigram (CSR layout). A
+    search gathers candidates from the whole postings of the query's rarest
+    trigrams, so its cost depends on CANDIDATE_LIMIT rather than on the
+    number of places. The candidates found in the most of those postings are
+    then scored against all of the query's trigrams from their own names.
+    """
+
+    def __init__(self, geo_index):
+        self.geo_index = geo_index
+        buffer, lengths = _padded_names(geo_index)
+        owners = np.repeat(np.arange(len(lengths), dtype=np.int64), lengths)
+
+        # A trigram starts at every byte except the last two of each name
+        valid = np.ones(len(buffer), dtype=bool)
+        ends = np.cumsum(lengths)
+        valid[ends - 1] = False
+        valid[ends - 2] = False
+        positions = np.flatnonzero(valid)
+        codes = (buffer[positions] << 16) | (buffer[positions + 1] << 8) | buffer[positions + 2]
+
+        # Sorting (trigram, id) pairs groups postings by trigram, each sorted by id
+        pairs = _sorted_unique((codes << 32) | owners[positions])
+        trigrams = pairs >> 32
+        starts = np.flatnonzero(np.append(True, trigrams[1:] != trigrams[:-1]))
+        self._trigrams = trigrams[starts]
+        self._offsets = np.append(starts, len(pairs)).astype(np.int64)
+        self._postings = (pairs & 0xFFFFFFFF).astype(np.int32)
+        self._trigram_counts = np.bincount(self._postings, minlength=len(lengths)).astype(np.int32)
+
+        # The padded names themselves, to score candidates without scanning postings
+        self._names = buffer.astype(np.uint8)
+        self._name_offsets = np.append(0, ends)
+
+    def search(self, query, limit=10):
+        """Return up to limit (entity id, similarity) pairs for the names most similar to query"""
+        codes = np.array(_trigrams(_pad(query.lower())), dtype=np.int64)
+        if len(codes) == 0 or len(self._trigrams) == 0 or limit <= 0:
+            return []
+
+        positions = np.minimum(np.searchsorted(self._trigrams, codes), len(self._trigrams) - 1)
+        postings = [self._postings[self._offsets[position]:self._offsets[position + 1]]
+                    for position in positions[self._trigrams[positions] == codes]]
+        if not postings:
+            return []
+
+        # Candidates are every place in the whole postings of the rarest trigrams,
+        # which are the most selective; common trigrams are never scanned
+        postings.sort(key=len)
+        used = 1
+        total = len(postings[0])
+        while used < len(postings) and total + len(postings[used]) <= CANDIDATE_LIMIT:
+            total += len(postings[used])
+            used += 1
+        gathered = np.sort(np.concatenate(postings[:used])[:CANDIDATE_LIMIT])
+        starts = np.flatnonzero(np.append(True, gathered[1:] != gathered[:-1]))
+        candidates = gathered[starts]
+
+        # Only the candidates found in the most of those postings are scored
+        if len(candidates) > SCORED_CANDIDATES:
+            hits = np.diff(np.append(starts, len(gathered)))
+            candidates = np.sort(candidates[np.argpartition(-hits, SCORED_CANDIDATES - 1)[:SCORED_CANDIDATES]])
+
+        # Score them against every query trigram from their own names
+        similarity = _jaccard(self._shared_trigrams(candidates, codes), len(codes),
+                              self._trigram_counts[candidates])
+        keep = similarity >= MIN_SIMILARITY
+        candidates, similarity = candidates[keep], similarity[keep]
+
+        # Keep the top limit without sorting every candidate; ties go to the lowest id
+        if len(similarity) > limit:
+            kth = np.partition(similarity, len(similarity) - limit)[len(similarity) - limit]
+            keep = similarity >= kth
+            candidates, similarity = candidates[keep], similarity[keep]
+        top = np.lexsort((candidates, -similarity))[:limit]
+        return [(int(candidates[i]), float(similarity[i])) for i in top]
+
+    def _shared_trigrams(self, ids, codes):
+        # Number of distinct trigrams in sorted codes that each name in ids contains
+        sizes = self._name_offsets[ids + 1] - self._name_offsets[ids] - 2
+        owners = np.repeat(np.arange(len(ids)), sizes)
+        positions = (np.arange(int(sizes.sum())) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+                     + np.repeat(self._name_offsets[ids], sizes))
+        grams = ((self._names[positions].astype(np.int64) << 16)
+                 | (self._names[positions + 1].astype(np.int64) << 8) | self._names[positions + 2])
+        found = codes[np.minimum(np.searchsorted(codes, grams), len(codes) - 1)] == grams
+        pairs = _sorted_unique((owners[found] << 24) | grams[found])
+        return np.bincount(pairs >> 24, minlength=len(ids))
+
+
+def _sorted_unique(values):
+    # np.unique hashes large integer arrays before sorting them, which is much slower
+    values = np.sort(values)
+    return values[np.append(True, values[1:] != values[:-1])]
+
+
+def _jaccard(shared, query_count, counts):
+    # Jaccard similarity of trigram sets from their sizes and the size of their intersection
+    return shared / (query_count + counts - shared)
+
+
+def _padded_names(geo_index):
+    """Return every lower-cased name padded as "  name " in one int64 byte array, with the padded lengths"""
+    names = geo_index.name_buffer
+    if len(names) == 0 or names.max() < 0x80:
+        # ASCII names are lower-cased and padded in place, without decoding them
+        lengths = np.diff(geo_index.name_offsets) + 3
+        buffer = np.full(int(lengths.sum()), ord(' '), dtype=np.int64)
+        owners = np.repeat(np.arange(len(lengths), dtype=np.int64), lengths - 3)
+        buffer[np.arange(len(names)) + 3 * owners + 2] = names
+        upper = (buffer >= ord('A')) & (buffer <= ord('Z'))
+        buffer[upper] += ord('a') - ord('A')
+        return buffer, lengths
+
+    encoded = [_pad(geo_index.name(i).lower()) for i in range(len(geo_index))]
+    lengths = np.fromiter((len(name) for name in encoded), dtype=np.int64, count=len(encoded))
+    return np.frombuffer(b''.join(encoded), dtype=np.uint8).astype(np.int64), lengths
+
+
+def _pad(name):
+    return f"  {name} ".encode('utf-8')
+
+
+def _trigrams(padded):
+    return sorted({(padded[i] << 16) | (padded[i + 1] << 8) | padded[i + 2]
+                   for i in range(len(padded) - 2)})
+
+
+_place_index = None
+_place_index_lock = threading.Lock()
+
+
+def get_place_index():
+    """Return the trigram index of every place in the current data source, building it once"""
+    global _place_index
+    source = api.get_data_source()
+    with _place_index_lock:
+        if _place_index is None or _place_index[0] is not source:
+            geo_index = source.index if isinstance(source, GeoIndexDataSource) else GeoIndex.from_source(source)
+            _place_index = (source, TrigramIndex(geo_index))
+        return _place_index[1]
+
+
+def start_place_index_build():
+    """Build the place index on a background thread, so the first search does not wait for it"""
+    thread = threading.Thread(target=get_place_index, name='place-index', daemon=True)
+    thread.start()
+    return thread
+
+
+def search_places(query, limit=10):
+    """Fuzzy-match query against place names of every level
+
+    Returns dicts with the level, name and similarity of each match, and
+    its full path as {level: name} from the continent down.
+    """
+    index = get_place_index()
+    geo_index = index.geo_index
+    results = []
+    for entity_id, similarity in index.search(query, limit):
+        path = {geo_index.level(i): geo_index.name(i) for i in reversed(geo_index.ancestor_ids(entity_id))}
+        path[geo_index.level(entity_id)] = geo_index.name(entity_id)
+        results.append({'level': geo_index.level(entity_id), 'name': geo_index.name(entity_id),
+                        'path': path, 'similarity': similarity})
+    return results
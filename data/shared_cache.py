@@ -0,0 +1,173 @@
+"""
+Cross-process cache backend for data fetching functions.
+Stores entries in an SQLite file on local disk, so every worker process on
+the host shares the results fetched by any one of them.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Expired rows are purged after this many writes
+PURGE_INTERVAL = 500
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS cache (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    stale_until REAL NOT NULL,
+    negative INTEGER NOT NULL DEFAULT 0
+)
+'''
+
+
+class SQLiteCache:
+    """Shared TTL cache stored in an SQLite database file"""
+
+    def __init__(self, path, clock=time.time):
+        self.path = path
+        self._clock = clock
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(_SCHEMA)
+
+    def get_entry(self, key):
+        """Return (value, fresh_left, stale_left, negative) for key, or None if missing
+
+        fresh_left is negative once the TTL has passed; the entry is returned
+        as stale until stale_left runs out.
+        """
+        try:
+            row = self._connect().execute(
+                'SELECT value, expires_at, stale_until, negative FROM cache WHERE key = ?',
+                (_encode_key(key),)
+            ).fetchone()
+        except sqlite3.Error as e:
+            # The shared tier is an optimisation; never fail a fetch because of it
+            self._failed('read', e)
+            return None
+
+        now = self._clock()
+        if row is None or row[2] <= now:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return json.loads(row[0]), row[1] - now, row[2] - now, bool(row[3])
+
+    def peek(self, key):
+        """Return the value of key until its TTL passes, or None, without counting a hit or miss"""
+        try:
+            row = self._connect().execute(
+                'SELECT value FROM cache WHERE key = ? AND expires_at > ?',
+                (_encode_key(key), self._clock())
+            ).fetchone()
+        except sqlite3.Error as e:
+            self._failed('read', e)
+            return None
+        return json.loads(row[0]) if row is not None else None
+
+    def set(self, key, value, ttl, negative=False, hard_ttl=None):
+        """Atomically store value under key for ttl seconds, or hard_ttl when served stale"""
+        now = self._clock()
+        try:
+            row = (_encode_key(key), json.dumps(value), now + ttl,
+                   now + max(ttl, hard_ttl or 0), int(negative))
+        except (TypeError, ValueError) as e:
+            self._failed('encode', e)
+            return
+        if not self._write('INSERT OR REPLACE INTO cache (key, value, expires_at, stale_until, negative) '
+                           'VALUES (?, ?, ?, ?, ?)', row):
+            return
+
+        with self._lock:
+            self._writes += 1
+            purge = self._writes % PURGE_INTERVAL == 0
+        if purge:
+            self.purge_expired()
+
+    def set_max(self, key, value, ttl):
+        """Atomically store the number value under key for ttl seconds, unless a larger one is stored"""
+        now = self._clock()
+        self._write('INSERT INTO cache (key, value, expires_at, stale_until, negative) VALUES (?, ?, ?, ?, 0) '
+                    'ON CONFLICT(key) DO UPDATE SET '
+                    'value = CASE WHEN stale_until > ? AND CAST(value AS REAL) > CAST(excluded.value AS REAL) '
+                    'THEN value ELSE excluded.value END, '
+                    'expires_at = excluded.expires_at, stale_until = excluded.stale_until',
+                    (_encode_key(key), json.dumps(value), now + ttl, now + ttl, now))
+
+    def invalidate(self, key):
+        """Remove key from the cache if present"""
+        self._write('DELETE FROM cache WHERE key = ?', (_encode_key(key),))
+
+    def purge_expired(self):
+        """Delete every expired row"""
+        self._write('DELETE FROM cache WHERE stale_until <= ?', (self._clock(),))
+
+    def clear(self):
+        """Remove all entries from the cache"""
+        self._write('DELETE FROM cache')
+
+    def stats(self):
+        """Return a snapshot of the cache counters"""
+        try:
+            entries = self._connect().execute('SELECT COUNT(*) FROM cache').fetchone()[0]
+        except sqlite3.Error:
+            entries = None
+        return {
+            'path': self.path,
+            'entries': entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'errors': self.errors,
+        }
+
+    def reset_connections(self):
+        """Forget the connections opened so far, e.g. those inherited by a forked child process"""
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def _write(self, sql, params=()):
+        # Run one write in its own transaction, returning False if it failed
+        try:
+            conn = self._connect()
+            with conn:
+                conn.execute(sql, params)
+        except sqlite3.Error as e:
+            # The shared tier is an optimisation; never fail a fetch because of it
+            self._failed('write', e)
+            return False
+        return True
+
+    def _failed(self, operation, error):
+        self.errors += 1
+        logger.warning("Shared cache %s failed for %s: %s", operation, self.path, error)
+
+    def _connect(self):
+        # sqlite3 connections cannot be shared between threads, so each
+        # thread keeps its own
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+
+def _encode_key(key):
+    return json.dumps(key, ensure_ascii=False)
@@ -0,0 +1,110 @@
+"""
+Versioned snapshot of the upper hierarchy levels for clientside cascades.
+The continent -> country -> state option lists rarely change, so they are
+published as one compact JSON document named by its content hash. Browsers
+cache it indefinitely and compute those dropdown cascades locally; only the
+leaf level and oversized lists still go to the server.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from flask import Response, abort
+from data import api
+from data.search import SEARCH_LIMIT
+
+# Parent levels whose child lists are included in the snapshot
+SNAPSHOT_PARENT_LEVELS = ['continent', 'country']
+
+# Child lists longer than this are left out, and served by the server instead
+SNAPSHOT_MAX_CHILDREN = 1000
+
+# Seconds before the snapshot is rebuilt from the data source
+SNAPSHOT_TTL = 6 * 60 * 60
+
+# Number of snapshot versions kept available for pages loaded before a rebuild
+SNAPSHOT_VERSIONS_KEPT = 4
+
+# Minimum seconds between rebuilds forced by requests for an unknown version
+SNAPSHOT_REBUILD_INTERVAL = 60
+
+# URL path of a snapshot version
+SNAPSHOT_ROUTE = '/_hierarchy-snapshot/<version>.json'
+
+# Set DASHAPP_HIERARCHY_SNAPSHOT=0 to resolve every dropdown level on the server
+SNAPSHOT_ENABLED = os.environ.get('DASHAPP_HIERARCHY_SNAPSHOT', '1') != '0'
+
+_lock = threading.Lock()
+_snapshots = OrderedDict()
+_current = None
+
+
+def build_snapshot(source, option_limit):
+    """Build the snapshot document of source as compact JSON bytes"""
+    document = {'continents': source.continents(), 'children': {}, 'option_limit': option_limit}
+    parents = document['continents']
+    for level in SNAPSHOT_PARENT_LEVELS:
+        children = source.children_of_many(level, parents)
+        document['children'][level] = {
+            parent: names for parent, names in children.items() if len(names) <= SNAPSHOT_MAX_CHILDREN
+        }
+        parents = [name for names in document['children'][level].values() for name in names]
+    return json.dumps(document, ensure_ascii=False, separators=(',', ':'), sort_keys=True).encode('utf-8')
+
+
+def get_snapshot_version():
+    """Return the content hash of the current snapshot, rebuilding it when it has expired"""
+    with _lock:
+        if _current is None or time.monotonic() - _current[1] > SNAPSHOT_TTL:
+            _rebuild()
+        return _current[0]
+
+
+def _rebuild():
+    # Called with _lock held. The version is a hash of the content, so every
+    # worker process building from the same data publishes the same version.
+    global _current
+    body = build_snapshot(api.get_data_source(), SEARCH_LIMIT)
+    version = hashlib.sha256(body).hexdigest()[:16]
+    _snapshots[version] = body
+    _snapshots.move_to_end(version)
+    while len(_snapshots) > SNAPSHOT_VERSIONS_KEPT:
+        _snapshots.popitem(last=False)
+    _current = (version, time.monotonic())
+
+
+def snapshot_path(version):
+    """Return the URL path of a snapshot version"""
+    return SNAPSHOT_ROUTE.replace('<version>', version)
+
+
+def serve_snapshot(version):
+    """Flask view returning a snapshot version with immutable caching headers"""
+    with _lock:
+        body = _snapshots.get(version)
+        if body is None and (_current is None
+                             or time.monotonic() - _current[1] > SNAPSHOT_REBUILD_INTERVAL):
+            # The page may have got this version from another worker process;
+            # rebuilding from the same data reproduces it here
+            _rebuild()
+            body = _snapshots.get(version)
+    if body is None:
+        abort(404)
+
+    response = Response(body, mimetype='application/json')
+    # The URL changes whenever the content does, so it can be cached forever
+    response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    response.headers['ETag'] = f'"{version}"'
+    return response
+
+
+def register_snapshot_route(app):
+    """Serve snapshot versions from the Flask server of a Dash app, below its routes prefix
+
+    Pages request them at app.get_relative_path(snapshot_path(version)).
+    """
+    route = app.config.routes_pathname_prefix.rstrip('/') + SNAPSHOT_ROUTE
+    app.server.add_url_rule(route, 'hierarchy_snapshot', serve_snapshot)
@@ -0,0 +1,352 @@
+"""
+Data source backends for the dashboard application.
+Every backend serves the same geographic hierarchy through a shared,
+bulk-capable interface, so the data API can be pointed at a different
+store without touching callbacks.
+"""
+
+import json
+import sqlite3
+import threading
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Hierarchy levels from the top down
+LEVELS = ['continent', 'country', 'state', 'city']
+
+# Display labels of the hierarchy levels
+LEVEL_LABELS = {
+    'continent': 'Continent',
+    'country': 'Country',
+    'state': 'State/Province',
+    'city': 'City',
+}
+
+# SQLite parameters per IN (...) clause, kept below the default variable limit
+_SQLITE_CHUNK = 500
+
+# Entities whose detail records are fetched and inserted at once by write_sqlite()
+_WRITE_CHUNK = 10000
+
+
+class DataSource:
+    """Base class for hierarchy data backends
+
+    Subclasses implement continents(), children_of_many() and
+    details_of_many(); the single-item lookups are built on the bulk ones.
+    """
+
+    # True if lookups may block on I/O, so async callers should run them in a thread
+    blocking = True
+
+    def continents(self):
+        """Return the names of all continents"""
+        raise NotImplementedError
+
+    def children_of_many(self, level, parents):
+        """Return a dict of parent name -> child names, for parents at the given level"""
+        raise NotImplementedError
+
+    def details_of_many(self, level, names):
+        """Return a dict of name -> detail record, for entities at the given level"""
+        raise NotImplementedError
+
+    def children_of(self, level, parent):
+        """Return the child names of a single parent at the given level"""
+        return self.children_of_many(level, [parent]).get(parent, [])
+
+    def details_of(self, level, name):
+        """Return the detail record of a single entity at the given level"""
+        return self.details_of_many(level, [name]).get(name, {})
+
+    def ancestors_of(self, level, name, within=None):
+        """Return {level: name} for every ancestor of an entity, or {} if it is unknown
+
+        Entities at one level may share a name, e.g. cities in different
+        states; within maps known ancestor levels to names to pick one.
+        """
+        raise NotImplementedError
+
+    def hierarchy_path(self, continent=None, country=None, state=None, city=None):
+        """Return the datasets of every selected level of a path, keyed by data type"""
+        path = {'continents': self.continents()}
+        if continent:
+            path['countries'] = self.children_of('continent', continent)
+            path['continent_data'] = self.details_of('continent', continent)
+        if country:
+            path['states'] = self.children_of('country', country)
+            path['country_data'] = self.details_of('country', country)
+        if state:
+            path['cities'] = self.children_of('state', state)
+            path['state_data'] = self.details_of('state', state)
+        if city:
+            path['city_data'] = self.details_of('city', city)
+        return path
+
+    def entities_at(self, level, scope_level=None, scope_name=None):
+        """Return the names of every entity at level, optionally within one ancestor"""
+        names, current = (self.continents(), 'continent') if scope_level is None else ([scope_name], scope_level)
+        while current != level:
+            children = self.children_of_many(current, names)
+            names = [child for name in names for child in children.get(name, [])]
+            current = LEVELS[LEVELS.index(current) + 1]
+        return names
+
+
+class InMemoryDataSource(DataSource):
+    """Data source backed by plain Python dicts"""
+
+    blocking = False
+
+    def __init__(self, continents, children, details):
+        # children: {level: {parent: [child, ...]}}
+        # details: {level: {name: {attribute: value}}}
+        self._continents = list(continents)
+        self._children = children
+        self._details = details
+
+        # Reverse lookup of (level, child) -> parent for ancestor walks
+        self._parents = {}
+        for parent_level, level in zip(LEVELS, LEVELS[1:]):
+            for parent, names in children.get(parent_level, {}).items():
+                for name in names:
+                    self._parents[(level, name)] = (parent_level, parent)
+
+    def continents(self):
+        return self._continents
+
+    def children_of_many(self, level, parents):
+        children = self._children.get(level, {})
+        return {parent: children.get(parent, []) for parent in parents}
+
+    def details_of_many(self, level, names):
+        details = self._details.get(level, {})
+        return {name: details.get(name, {}) for name in names}
+
+    def ancestors_of(self, level, name, within=None):
+        # Names are unique per level here, so within never changes the result
+        ancestors = {}
+        parent = self._parents.get((level, name))
+        while parent is not None:
+            ancestors[parent[0]] = parent[1]
+            parent = self._parents.get(parent)
+        return ancestors
+
+
+class SQLiteDataSource(DataSource):
+    """Data source backed by an SQLite file, see write_sqlite() for the schema"""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+
+    def continents(self):
+        rows = self._connect().execute(
+            "SELECT name FROM entities WHERE level = 'continent' ORDER BY position"
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def children_of_many(self, level, parents):
+        result = {parent: [] for parent in parents}
+        for chunk in _chunks(list(result), _SQLITE_CHUNK):
+            rows = self._connect().execute(
+                'SELECT p.name, c.name FROM entities c '
+                'JOIN entities p ON c.parent_id = p.id '
+                f'WHERE p.level = ? AND p.name IN ({_placeholders(chunk)}) '
+                'ORDER BY c.position',
+                [level, *chunk]
+            ).fetchall()
+            for parent, child in rows:
+                result[parent].append(child)
+        return result
+
+    def details_of_many(self, level, names):
+        result = {name: {} for name in names}
+        for chunk in _chunks(list(result), _SQLITE_CHUNK):
+            rows = self._connect().execute(
+                f'SELECT name, details FROM entities WHERE level = ? AND name IN ({_placeholders(chunk)})',
+                [level, *chunk]
+            ).fetchall()
+            for name, details in rows:
+                result[name] = json.loads(details) if details else {}
+        return result
+
+    def ancestors_of(self, level, name, within=None):
+        # Names are unique per level (see write_sqlite), so within never changes the result
+        rows = self._connect().execute(
+            'WITH RECURSIVE chain(id, level, name, parent_id) AS ('
+            'SELECT id, level, name, parent_id FROM entities WHERE level = ? AND name = ? '
+            'UNION ALL '
+            'SELECT e.id, e.level, e.name, e.parent_id FROM entities e '
+            'JOIN chain ON e.id = chain.parent_id) '
+            'SELECT level, name FROM chain',
+            (level, name)
+        ).fetchall()
+        return {row_level: row_name for row_level, row_name in rows[1:]}
+
+    def _connect(self):
+        # sqlite3 connections cannot be shared between threads
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(f'file:{self.path}?mode=ro', uri=True)
+        return conn
+
+
+class HTTPDataSource(DataSource):
+    """Data source that queries a JSON-over-HTTP service, such as serve_data_source()"""
+
+    def __init__(self, base_url, timeout=5.0):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+    def continents(self):
+        return self._post('/continents', {})
+
+    def children_of_many(self, level, parents):
+        return self._post('/children', {'level': level, 'names': list(parents)})
+
+    def details_of_many(self, level, names):
+        return self._post('/details', {'level': level, 'names': list(names)})
+
+    def ancestors_of(self, level, name, within=None):
+        return self._post('/ancestors', {'level': level, 'name': name, 'within': within})
+
+    def entities_at(self, level, scope_level=None, scope_name=None):
+        return self._post('/entities', {'level': level, 'scope_level': scope_level,
+                                        'scope_name': scope_name})
+
+    def _post(self, path, payload):
+        request = urllib.request.Request(
+            self.base_url + path,
+            data=json.dumps(payload).encode('utf-8'),
+            headers={'Content-Type': 'application/json'}
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return json.loads(response.read().decode('utf-8'))
+
+
+def write_sqlite(source, path):
+    """Copy every entity of source into a new SQLite file readable by SQLiteDataSource"""
+    conn = sqlite3.connect(path)
+    with conn:
+        conn.execute('DROP TABLE IF EXISTS entities')
+        conn.execute(
+            'CREATE TABLE entities ('
+            'id INTEGER PRIMARY KEY, level TEXT NOT NULL, name TEXT NOT NULL, '
+            'parent_id INTEGER, position INTEGER NOT NULL, details TEXT)'
+        )
+
+        next_id = 1
+        current = {}
+        for name in source.continents():
+            current[name] = next_id
+            next_id += 1
+        _insert_level(conn, source, 'continent', current, {})
+
+        for parent_level, level in zip(LEVELS, LEVELS[1:]):
+            children = source.children_of_many(parent_level, list(current))
+            parent_ids = {}
+            level_ids = {}
+            for parent, names in children.items():
+                for name in names:
+                    level_ids[name] = next_id
+                    parent_ids[name] = current[parent]
+                    next_id += 1
+            _insert_level(conn, source, level, level_ids, parent_ids)
+            current = level_ids
+
+        conn.execute('CREATE UNIQUE INDEX entities_level_name ON entities (level, name)')
+        conn.execute('CREATE INDEX entities_parent ON entities (parent_id)')
+    conn.close()
+
+
+def _insert_level(conn, source, level, ids, parent_ids):
+    # Chunked, so large levels never hold every detail record in memory
+    names = list(ids)
+    for offset in range(0, len(names), _WRITE_CHUNK):
+        chunk = names[offset:offset + _WRITE_CHUNK]
+        details = source.details_of_many(level, chunk)
+        conn.executemany(
+            'INSERT INTO entities (id, level, name, parent_id, position, details) '
+            'VALUES (?, ?, ?, ?, ?, ?)',
+            [(ids[name], level, name, parent_ids.get(name), offset + position,
+              json.dumps(details.get(name) or {}))
+             for position, name in enumerate(chunk)]
+        )
+
+
+class _DataSourceHandler(BaseHTTPRequestHandler):
+    """Request handler that answers HTTPDataSource queries from a wrapped source"""
+
+    source = None
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        payload = json.loads(self.rfile.read(length) or b'{}')
+
+        if self.path == '/continents':
+            result = self.source.continents()
+        elif self.path == '/children':
+            result = self.source.children_of_many(payload['level'], payload['names'])
+        elif self.path == '/details':
+            result = self.source.details_of_many(payload['level'], payload['names'])
+        elif self.path == '/ancestors':
+            result = self.source.ancestors_of(payload['level'], payload['name'], payload.get('within'))
+        elif self.path == '/entities':
+            result = self.source.entities_at(payload['level'], payload.get('scope_level'),
+                                             payload.get('scope_name'))
+        else:
+            self.send_error(404)
+            return
+
+        body = json.dumps(result).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_data_source(source, host='127.0.0.1', port=0):
+    """Serve source over HTTP on a background thread and return the server
+
+    The bound address is available as server.server_address; call
+    server.shutdown() to stop it.
+    """
+    handler = type('DataSourceHandler', (_DataSourceHandler,), {'source': source})
+    server = ThreadingHTTPServer((host, port), handler)
+    thread = threading.Thread(target=server.serve_forever, name='data-source-stub', daemon=True)
+    thread.start()
+    return server
+
+
+def is_within(ancestors, within):
+    """Return True if {level: name} ancestors agree with every named level of within"""
+    return all(ancestors.get(level) == name for level, name in (within or {}).items() if name)
+
+
+def create_data_source(spec, default):
+    """Create a data source from a spec string, or return default if spec is empty
+
+    Supported specs are 'memory', 'sqlite:///path/to/file.db' and
+    'http://host:port'.
+    """
+    if not spec or spec == 'memory':
+        return default
+    if spec.startswith('sqlite:///'):
+        return SQLiteDataSource(spec[len('sqlite:///'):])
+    if spec.startswith(('http://', 'https://')):
+        return HTTPDataSource(spec)
+    raise ValueError(f"Unsupported data source: {spec}")
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _placeholders(items):
+    return ', '.join('?' for _ in items)
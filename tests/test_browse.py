@@ -0,0 +1,58 @@
+"""
+Tests for loading whole levels into the browse table.
+"""
+
+import pytest
+from data import api, browse, cache
+from data.cache import TTLCache
+
+
+@pytest.fixture
+def level_loads(monkeypatch):
+    """Start with empty caches and return the list of levels listed by the data API"""
+    monkeypatch.setattr(api, 'SIMULATE_NETWORK', False)
+    monkeypatch.setattr(browse, '_frames', TTLCache(browse.BROWSE_MAX_BYTES))
+    cache.clear_cache()
+    loads = []
+
+    def get_scoped_level_entities(scope):
+        loads.append(scope[0])
+        return api.get_scoped_level_entities(scope)
+
+    monkeypatch.setitem(cache._FETCHERS, 'level_entities', get_scoped_level_entities)
+    yield loads
+    cache.clear_cache()
+
+
+def test_level_is_loaded_once(level_loads):
+    frame = browse.load_level_frame('country')
+    assert browse.load_level_frame('country') is frame
+    assert level_loads == ['country']
+
+
+def test_level_is_loaded_through_the_data_cache(level_loads, monkeypatch):
+    browse.load_level_frame('country')
+
+    # With the frame gone, the listing and every detail record come from the cache
+    monkeypatch.setattr(browse, '_frames', TTLCache(browse.BROWSE_MAX_BYTES))
+    monkeypatch.setattr(cache, 'get_many', lambda *args: pytest.fail("details were fetched again"))
+    frame = browse.load_level_frame('country')
+    assert level_loads == ['country']
+    assert frame['Country'].tolist() == api.get_level_entities('country')
+
+
+def test_level_larger_than_budget_is_refused(level_loads, monkeypatch):
+    monkeypatch.setattr(browse, '_frames', TTLCache(1024))
+    with pytest.raises(browse.LevelTooLarge) as refused:
+        browse.load_level_frame('country')
+    assert refused.value.row_count == len(api.get_level_entities('country'))
+
+
+def test_level_with_too_many_entities_is_refused(level_loads, monkeypatch):
+    monkeypatch.setattr(cache, 'get_many', lambda *args: pytest.fail("details were fetched"))
+    row_count = len(api.get_level_entities('country'))
+    monkeypatch.setattr(browse, 'BROWSE_MAX_ROWS', row_count - 1)
+
+    with pytest.raises(browse.LevelTooLarge) as refused:
+        browse.load_level_frame('country')
+    assert refused.value.row_count == row_count
@@ -0,0 +1,169 @@
+"""
+Tests for the in-process data cache.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from data import cache, hedging
+from data.cache import SingleFlight, TTLCache, estimate_size
+
+
+class FakeClock:
+    """Clock that only moves when told to"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_entries_expire_after_their_ttl():
+    clock = FakeClock()
+    store = TTLCache(1024 * 1024, clock=clock)
+    store.set('short', 'a', ttl=10)
+    store.set('long', 'b', ttl=60)
+
+    clock.now = 9.9
+    assert store.get('short') == 'a'
+    clock.now = 10
+    assert store.get('short', None) is None
+    assert store.get('long') == 'b'
+    assert store.stats()['expirations'] == 1
+
+
+def test_least_recently_used_entries_are_evicted_to_stay_in_budget():
+    value_size = estimate_size('x' * 100)
+    store = TTLCache(3 * value_size, clock=FakeClock())
+    for key in 'abc':
+        store.set(key, 'x' * 100, ttl=60)
+
+    # Reading 'a' makes 'b' the least recently used entry
+    store.get('a')
+    store.set('d', 'x' * 100, ttl=60)
+    assert store.get('b', None) is None
+    assert [store.get(key) for key in 'acd'] == ['x' * 100] * 3
+
+    stats = store.stats()
+    assert stats['evictions'] == 1
+    assert stats['bytes'] <= stats['max_bytes']
+
+
+def test_values_larger_than_the_budget_are_not_cached():
+    cache = TTLCache(100, clock=FakeClock())
+    cache.set('small', 1, ttl=60)
+    cache.set('huge', 'x' * 1000, ttl=60)
+    assert cache.get('huge', None) is None
+    assert cache.get('small') == 1
+
+
+def test_concurrent_calls_for_a_key_share_one_execution():
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def load():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return 'value'
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        leader = pool.submit(flight.do, 'key', load)
+        started.wait(5)
+        followers = [pool.submit(flight.do, 'key', load) for _ in range(3)]
+        while flight.coalesced < 3:
+            time.sleep(0.01)
+        release.set()
+        results = [leader.result()] + [future.result() for future in followers]
+
+    assert results == ['value'] * 4
+    assert calls == [1]
+
+    # Once finished, the key can be loaded again
+    release.set()
+    assert flight.do('key', load) == 'value'
+    assert len(calls) == 2
+
+
+def test_waiting_callers_share_the_error_of_the_call():
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+
+    def fail():
+        started.set()
+        release.wait(5)
+        raise ValueError("upstream down")
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        leader = pool.submit(flight.do, 'key', fail)
+        started.wait(5)
+        follower = pool.submit(flight.do, 'key', fail)
+        while flight.coalesced < 1:
+            time.sleep(0.01)
+        release.set()
+        for future in (leader, follower):
+            with pytest.raises(ValueError):
+                future.result()
+
+
+def test_concurrent_cache_misses_make_one_upstream_call(monkeypatch):
+    monkeypatch.setattr(hedging, '_latencies', hedging.LatencyTracker())
+    cache.clear_cache()
+    calls = []
+
+    def get_country_data(country):
+        calls.append(country)
+        time.sleep(0.2)
+        return {'Capital': 'Ottawa'}
+
+    monkeypatch.setitem(cache._FETCHERS, 'country_data', get_country_data)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda _: cache.fetch_data_with_cache('country_data', 'Canada'), range(8)))
+
+    assert results == [{'Capital': 'Ottawa'}] * 8
+    assert calls == ['Canada']
+    cache.clear_cache()
+
+
+def test_stale_values_are_served_until_their_hard_expiry():
+    clock = FakeClock()
+    store = TTLCache(1024 * 1024, clock=clock)
+    store.set('key', 'a', ttl=10, hard_ttl=100)
+
+    clock.now = 50
+    assert store.lookup('key') == ('a', True)
+    assert store.get('key', None) is None
+    clock.now = 100
+    assert store.lookup('key', None) == (None, False)
+    assert store.stats()['stale_hits'] == 2
+
+
+def test_stale_value_is_returned_at_once_and_refreshed_in_the_background(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(cache, '_cache', TTLCache(cache.CACHE_MAX_BYTES, clock=clock))
+    monkeypatch.setattr(cache, '_shared_cache', None)
+    monkeypatch.setattr(hedging, '_latencies', hedging.LatencyTracker())
+    calls = []
+
+    def get_country_data(country):
+        calls.append(country)
+        return {'Version': len(calls)}
+
+    monkeypatch.setitem(cache._FETCHERS, 'country_data', get_country_data)
+    ttl = cache.CACHE_TTLS['country_data']
+    assert cache.fetch_data_with_cache('country_data', 'Canada') == {'Version': 1}
+
+    clock.now = ttl + 1
+    assert cache.fetch_data_with_cache('country_data', 'Canada') == {'Version': 1}
+    started = time.monotonic()
+    while len(calls) < 2 or ('country_data', 'Canada') in cache._revalidating:
+        assert time.monotonic() - started < 5, "stale value was not refreshed"
+        time.sleep(0.01)
+    assert cache.fetch_data_with_cache('country_data', 'Canada') == {'Version': 2}
+
+    # Past its hard expiry, a value is fetched again before it is returned
+    clock.now += cache.HARD_EXPIRY_TTLS['country_data']
+    assert cache.fetch_data_with_cache('country_data', 'Canada') == {'Version': 3}
@@ -0,0 +1,45 @@
+"""
+Tests for the callback cascades set off by user actions.
+"""
+
+import dash
+import pytest
+from app import app
+from utils.cascade import ACTIONS, CascadeRecorder, trace_action
+
+# Server requests a dropdown or place search pick may send, all in one round-trip:
+# tables, chart, browse table, prefetch and leaf options
+SELECTION_SERVER_REQUESTS = 5
+
+
+@pytest.mark.parametrize('description, changed', [action for action in ACTIONS if 'Pick' in action[0]])
+def test_selection_completes_in_one_round_trip(description, changed):
+    fired = trace_action(app, changed)
+    server = [callback['name'] for callback in fired if not callback['clientside']]
+    assert max(callback['round_trip'] for callback in fired) == 1
+    assert len(server) <= SELECTION_SERVER_REQUESTS
+
+    # Rewriting the URL does not re-run initialization, and the picked dropdown updates in the browser
+    assert 'initialize_from_url' not in server
+    assert all(callback['clientside'] for callback in fired if callback['trigger'] in changed)
+
+
+def test_recorded_requests_are_grouped_into_round_trips():
+    recorder = CascadeRecorder(dash.Dash(__name__), clock=lambda: 0)
+
+    def record(output, started, finished):
+        recorder.record('client', {'output': output, 'triggers': [], 'request_bytes': 10,
+                                   'response_bytes': 100, 'status': 200,
+                                   'started': started, 'finished': finished})
+
+    # Two parallel requests, then one started after both had answered
+    record('tables', 0.0, 0.2)
+    record('chart', 0.05, 0.3)
+    record('options', 0.35, 0.4)
+    # A request after an idle gap starts a new action
+    record('tables', 5.0, 5.1)
+
+    first, second = recorder.summary()['client']
+    assert [callback['round_trip'] for callback in first['callbacks']] == [1, 1, 2]
+    assert (first['requests'], first['round_trips'], first['response_bytes']) == (3, 2, 300)
+    assert (second['requests'], second['round_trips']) == (1, 1)
@@ -0,0 +1,175 @@
+"""
+Parity tests for the clientside callbacks against their Python references.
+The app's inline scripts are run with node, and each clientside function is
+called with the same inputs as the server-side callback it ports, kept as a
+Python reference function.
+"""
+
+import json
+import shutil
+import subprocess
+from urllib.parse import parse_qsl
+import dash
+import plotly
+import pytest
+from dash import no_update
+from callbacks.dropdown_callbacks import get_active_tab, register_dropdown_callbacks, update_selection
+from callbacks.error_callbacks import close_error_notification, create_error_notification, register_error_callbacks
+from callbacks.url_callbacks import get_url_search, register_url_callbacks
+from data.sources import LEVELS
+
+pytestmark = pytest.mark.skipif(shutil.which('node') is None, reason="needs node")
+
+# Stands in for window.dash_clientside.no_update in the JSON exchanged with node
+NO_UPDATE = {'__no_update__': True}
+
+_RUNNER = '''
+var window = {dash_clientside: {no_update: %s}};
+%s
+var funcs = window.dash_clientside._dashprivate_clientside_funcs;
+var calls = JSON.parse(require('fs').readFileSync(0, 'utf8'));
+process.stdout.write(JSON.stringify(calls.map(function(call) {
+    window.dash_clientside.callback_context = {triggered: call[2]};
+    return funcs[call[0]].apply(null, call[1]);
+})));
+'''
+
+SELECTIONS = [
+    None,
+    {},
+    {'continent': None, 'country': None, 'state': None, 'city': None},
+    {'continent': 'Europe', 'initialized': True, 'generation': 3},
+    {'continent': 'Europe', 'country': 'France', 'state': 'Île-de-France', 'city': 'Paris',
+     'initialized': True, 'generation': 7, 'session': 'abc'},
+    {'continent': 'Europe', 'country': 'France', 'initialized': False},
+    {'continent': 'Africa', 'country': 'São Tomé & Príncipe', 'state': 'Água Grande',
+     'city': 'São Tomé ~ * + ?', 'initialized': True},
+]
+
+VALUES = [None, 'Europe', 'France', 'Île-de-France', 'Paris', 'Asia']
+
+ERRORS = [
+    None,
+    {},
+    {'show': False, 'message': '', 'type': 'error', 'id': None},
+    {'show': True},
+    {'show': True, 'message': 'Error loading continents: timeout', 'type': 'error', 'id': 'a'},
+    {'show': True, 'message': 'Using cached data', 'type': 'warning', 'id': 'b'},
+    {'show': True, 'message': '', 'type': 'info', 'id': 'c'},
+    {'show': True, 'message': None, 'type': 'notice', 'id': 'd'},
+]
+
+TRIGGERS = [
+    [],
+    [{'prop_id': 'close-error-button.n_clicks', 'value': 1}],
+    [{'prop_id': 'error-dismiss-interval.n_intervals', 'value': 3}],
+    [{'prop_id': 'error-dismiss-interval.n_intervals', 'value': 3},
+     {'prop_id': 'close-error-button.n_clicks', 'value': 1}],
+]
+
+
+@pytest.fixture(scope='module')
+def clientside():
+    """Return a function calling the clientside callback from an input to an output, once per argument list"""
+    app = dash.Dash(__name__)
+    register_dropdown_callbacks(app)
+    register_url_callbacks(app)
+    register_error_callbacks(app)
+    # Keyed by the first output, without the suffix of duplicate outputs
+    functions = {(spec['output'].strip('.').split('...')[0].split('@')[0],
+                  f"{spec['inputs'][0]['id']}.{spec['inputs'][0]['property']}"):
+                 spec['clientside_function']['function_name']
+                 for spec in app._callback_list if spec.get('clientside_function')}
+    script = _RUNNER % (json.dumps(NO_UPDATE), '\n'.join(app._inline_scripts))
+
+    def call(input_prop, output_prop, argument_lists, triggered=None):
+        calls = [[functions[output_prop, input_prop], args, (triggered or [[]] * len(argument_lists))[i]]
+                 for i, args in enumerate(argument_lists)]
+        output = subprocess.run(['node', '-e', script], input=json.dumps(calls),
+                                capture_output=True, text=True, check=True).stdout
+        return [no_update if result == NO_UPDATE else result for result in json.loads(output)]
+    return call
+
+
+def python_json(value):
+    """Return value as it would reach the browser (no_update is not serialized)"""
+    return value if value is no_update else json.loads(json.dumps(value, cls=plotly.utils.PlotlyJSONEncoder))
+
+
+def store_state(selections):
+    """Return the selected levels of a store, treating missing keys like None"""
+    return {key: value for key, value in (selections or {}).items() if value is not None}
+
+
+@pytest.mark.parametrize('level', LEVELS)
+def test_selection_callbacks_match_update_selection(clientside, level):
+    cases = [(value, selections) for value in VALUES for selections in SELECTIONS]
+    results = clientside(f'{level}-dropdown.value', 'selections-store.data', cases)
+    for (value, selections), result in zip(cases, results):
+        expected = python_json(update_selection(selections, level, value))
+        if result is no_update:
+            # A value written back from the store, which the server-side
+            # callback returned unchanged
+            assert (selections or {}).get('initialized'), (value, selections)
+            assert store_state(expected) == store_state(selections), (value, selections)
+        else:
+            # Every other selection is numbered on top of the server-side result
+            generation = ((selections or {}).get('generation') or 0) + 1
+            assert result == {**expected, 'generation': generation}, (value, selections)
+
+
+def test_store_echo_is_not_a_new_selection(clientside):
+    selections = {'continent': 'Europe', 'country': 'France', 'initialized': True, 'generation': 4}
+    assert clientside('country-dropdown.value', 'selections-store.data', [['France', selections]]) == [no_update]
+    assert update_selection(selections, 'country', 'France') == selections
+
+
+def test_unchanged_value_before_initialization_keeps_lower_levels(clientside):
+    selections = {'continent': 'Europe', 'country': 'France', 'initialized': False}
+    result, = clientside('continent-dropdown.value', 'selections-store.data', [['Europe', selections]])
+    assert result['country'] == 'France'
+    assert result == {**update_selection(selections, 'continent', 'Europe'), 'generation': 1}
+
+
+def test_every_selection_increments_the_generation(clientside):
+    selections = {'continent': 'Europe', 'country': 'France', 'state': 'Île-de-France',
+                  'initialized': True, 'generation': 4}
+    result, = clientside('country-dropdown.value', 'selections-store.data', [['Germany', selections]])
+    assert result['generation'] == 5
+    assert result['state'] is None and result['city'] is None
+
+    # Before the first selection there is no generation yet
+    result, = clientside('continent-dropdown.value', 'selections-store.data', [['Europe', None]])
+    assert result['generation'] == 1
+
+
+def test_active_tab_matches_get_active_tab(clientside):
+    results = clientside('selections-store.data', 'geo-tabs.value', [[selections] for selections in SELECTIONS])
+    assert results == [get_active_tab(selections) for selections in SELECTIONS]
+
+
+def test_url_search_matches_get_url_search(clientside):
+    results = clientside('selections-store.data', 'url.search', [[selections] for selections in SELECTIONS])
+    for selections, result in zip(SELECTIONS, results):
+        expected = get_url_search(selections)
+        if expected is no_update or not expected:
+            assert result == expected, selections
+        else:
+            # URLSearchParams and urlencode escape a few characters differently,
+            # e.g. ~ and *, but both decode to the same parameters
+            assert parse_qsl(result[1:]) == parse_qsl(expected[1:]), selections
+
+
+def test_error_notification_matches_create_error_notification(clientside):
+    results = clientside('error-store.data', 'error-notification-container.children',
+                         [[error] for error in ERRORS])
+    for error, result in zip(ERRORS, results):
+        assert result == python_json(list(create_error_notification(error))), error
+
+
+def test_error_close_matches_close_error_notification(clientside):
+    cases = [(error, triggered) for error in ERRORS for triggered in TRIGGERS]
+    results = clientside('close-error-button.n_clicks', 'error-store.data',
+                         [[1, 3, error] for error, _ in cases], [triggered for _, triggered in cases])
+    for (error, triggered), result in zip(cases, results):
+        assert result == python_json(close_error_notification(error, triggered)), (error, triggered)
@@ -0,0 +1,77 @@
+"""
+Tests for cancelling work on superseded selections across worker processes.
+"""
+
+import multiprocessing
+import time
+import pytest
+from data import deadline
+from data.deadline import SelectionGenerations, selection_cancelled
+from data.shared_cache import SQLiteCache
+
+# Seconds a process may take before it is considered hung
+PROCESS_TIMEOUT = 10
+
+
+@pytest.fixture
+def shared_path(tmp_path, monkeypatch):
+    """Share selection generations through a fresh SQLite file, as worker processes would"""
+    path = str(tmp_path / 'shared.sqlite')
+    monkeypatch.setattr(deadline, '_generations', SelectionGenerations(shared=SQLiteCache(path)))
+    return path
+
+
+def select(path, generation):
+    """Make a new selection in its own process, with its own generations registry"""
+    deadline.share_selection_generations(SQLiteCache(path))
+    selection_cancelled({'session': 'abc', 'generation': generation})
+
+
+def wait_until_cancelled(path, generation, started, result):
+    """Start work for generation in its own process, and report whether it was cancelled"""
+    deadline.share_selection_generations(SQLiteCache(path))
+    waiting = deadline.selection_deadline(PROCESS_TIMEOUT, {'session': 'abc', 'generation': generation})
+    started.set()
+    while not waiting.expired() and not waiting.cancelled():
+        time.sleep(deadline.CANCEL_POLL_INTERVAL)
+    result.put(waiting.cancelled())
+
+
+def run(target, *args):
+    """Run target in a new worker process, which shares nothing with this one but the store"""
+    process = multiprocessing.get_context('spawn').Process(target=target, args=args)
+    process.start()
+    return process
+
+
+def test_newer_selection_in_another_process_cancels_work(shared_path):
+    cancelled = selection_cancelled({'session': 'abc', 'generation': 3})
+    assert not cancelled()
+
+    process = run(select, shared_path, 4)
+    process.join(PROCESS_TIMEOUT)
+    assert process.exitcode == 0
+    assert cancelled()
+
+    # An older selection arriving late does not lower the latest generation
+    process = run(select, shared_path, 2)
+    process.join(PROCESS_TIMEOUT)
+    assert cancelled()
+    assert not selection_cancelled({'session': 'abc', 'generation': 4})()
+
+
+def test_work_in_another_process_stops_on_a_newer_selection(shared_path):
+    context = multiprocessing.get_context('spawn')
+    started, result = context.Event(), context.Queue()
+    process = run(wait_until_cancelled, shared_path, 5, started, result)
+    assert started.wait(PROCESS_TIMEOUT)
+
+    selection_cancelled({'session': 'abc', 'generation': 6})
+    assert result.get(timeout=PROCESS_TIMEOUT) is True
+    process.join(PROCESS_TIMEOUT)
+
+
+def test_sessions_do_not_cancel_each_other(shared_path):
+    cancelled = selection_cancelled({'session': 'abc', 'generation': 1})
+    selection_cancelled({'session': 'other', 'generation': 9})
+    assert not cancelled()
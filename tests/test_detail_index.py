@@ -0,0 +1,51 @@
+"""
+Tests for the full-text index over detail record attributes.
+"""
+
+from data.detail_index import DetailIndex
+
+RECORDS = {
+    'Los Angeles': {'famous_for': 'Hollywood films', 'population': '3,900,000'},
+    'Mumbai': {'famous_for': 'Bollywood films and street food'},
+    'Nice': {'famous_for': 'Beaches', 'climate': 'Mediterranean'},
+}
+
+
+def names(result):
+    return [match['name'] for match in result['results']]
+
+
+def test_matches_are_ranked_with_their_attributes():
+    index = DetailIndex()
+    index.add_many('city', RECORDS)
+
+    result = index.search('hollywood films')
+    assert names(result) == ['Los Angeles', 'Mumbai']
+    assert result['results'][0]['matches'] == {'famous_for': 'Hollywood films'}
+    assert index.search('films', level='country')['total'] == 0
+
+
+def test_reindexed_records_replace_their_tokens():
+    index = DetailIndex()
+    index.add_many('city', RECORDS)
+    assert names(index.search('films')) == ['Los Angeles', 'Mumbai']
+
+    index.add('city', 'Mumbai', {'famous_for': 'Gateway of India'})
+    assert names(index.search('films')) == ['Los Angeles']
+    assert names(index.search('gateway')) == ['Mumbai']
+    assert index.search('gateway')['results'][0]['matches'] == {'famous_for': 'Gateway of India'}
+    assert len(index) == 3
+
+
+def test_ranked_results_are_kept_until_a_record_changes():
+    index = DetailIndex()
+    index.add_many('city', RECORDS)
+    index.search('films')
+
+    # Loading the same records again, e.g. on a cache refresh, keeps cached rankings
+    index.add_many('city', RECORDS)
+    assert len(index._results) == 1
+
+    index.add_many('city', {'Nice': {'famous_for': 'Films festival'}, 'Cannes': {'famous_for': 'Films'}})
+    assert len(index._results) == 0
+    assert sorted(names(index.search('films'))) == ['Cannes', 'Los Angeles', 'Mumbai', 'Nice']
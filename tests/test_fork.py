@@ -0,0 +1,91 @@
+"""
+Tests for data fetches in forked child processes, as run by background callback jobs.
+"""
+
+import json
+import os
+import signal
+import threading
+import time
+import pytest
+from data import api, cache, hedging
+from data.deadline import Deadline
+from data.shared_cache import SQLiteCache
+
+pytestmark = pytest.mark.skipif(not hasattr(os, 'fork'), reason="needs os.fork")
+
+# Seconds the child may take before it is considered hung
+CHILD_TIMEOUT = 10
+
+
+@pytest.fixture
+def warm_parent(monkeypatch, tmp_path):
+    """Put the data layer in the state of a busy server process about to fork a job"""
+    monkeypatch.setattr(api, 'SIMULATE_NETWORK', False)
+    monkeypatch.setattr(cache, '_shared_cache', SQLiteCache(str(tmp_path / 'shared.sqlite')))
+    cache.clear_cache()
+
+    # Start threads in every pool, and give hedging enough history to use its pool
+    for _ in range(hedging.MIN_SAMPLES):
+        hedging._latencies.record('countries', 0.001)
+    cache.fetch_many_with_cache([('countries', 'Asia'), ('countries', 'Africa')])
+    cache.fetch_data_with_cache('countries', 'Oceania', deadline=Deadline(2.5))
+
+    # A call still in flight in the parent when it forks
+    release = threading.Event()
+    in_flight = threading.Thread(target=cache._flight.do,
+                                 args=(('countries', 'Europe'), lambda: release.wait() or []))
+    in_flight.start()
+    yield
+    release.set()
+    in_flight.join()
+    cache.clear_cache()
+
+
+def run_in_child(fn):
+    """Run fn in a forked child process and return its JSON result, failing if it hangs"""
+    read_end, write_end = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_end)
+        try:
+            with os.fdopen(write_end, 'w') as out:
+                json.dump(fn(), out)
+        finally:
+            os._exit(0)
+
+    os.close(write_end)
+    started = time.monotonic()
+    while os.waitpid(pid, os.WNOHANG) == (0, 0):
+        if time.monotonic() - started > CHILD_TIMEOUT:
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+            pytest.fail("fetch in the forked child hung")
+        time.sleep(0.05)
+    with os.fdopen(read_end) as result:
+        return json.loads(result.read() or 'null')
+
+
+def test_fetches_complete_in_forked_child(warm_parent):
+    def fetch():
+        started = time.monotonic()
+        return {
+            'deadline': cache.fetch_data_with_cache('countries', 'Europe', deadline=Deadline(2.5)),
+            'many': cache.fetch_many_with_cache([('countries', 'North America'),
+                                                 ('countries', 'South America')]),
+            'seconds': time.monotonic() - started,
+        }
+
+    result = run_in_child(fetch)
+    assert result is not None
+    assert result['deadline'] == api.COUNTRIES['Europe']
+    assert result['many'] == [api.COUNTRIES['North America'], api.COUNTRIES['South America']]
+    assert result['seconds'] < 2.5
+
+
+def test_child_results_reach_parent_through_shared_cache(warm_parent):
+    run_in_child(lambda: cache.fetch_data_with_cache('countries', 'North America'))
+
+    # The parent never fetched this key, so it can only come from the child
+    assert cache._cache.get(('countries', 'North America'), None) is None
+    assert cache._cache_get(('countries', 'North America')) == api.COUNTRIES['North America']
@@ -0,0 +1,65 @@
+"""
+Tests for lookups of places that share a name on different branches of the hierarchy.
+"""
+
+import pytest
+from data import api, cache
+from data.geo_index import GeoIndex, GeoIndexDataSource
+
+# A country and a state named Georgia, and two cities named Springfield in different states
+CONTINENTS = ['Asia', 'North America']
+CHILDREN = {
+    'continent': {'Asia': ['Georgia'], 'North America': ['USA']},
+    'country': {'Georgia': ['Tbilisi Region'], 'USA': ['Georgia', 'Illinois']},
+    'state': {'Tbilisi Region': ['Tbilisi'], 'Georgia': ['Atlanta', 'Springfield'],
+              'Illinois': ['Springfield', 'Chicago']},
+}
+
+
+@pytest.fixture
+def source():
+    index = GeoIndex.from_hierarchy(CONTINENTS, CHILDREN)
+    details = [{'id': i} for i in range(len(index))]
+    return GeoIndexDataSource(index, details)
+
+
+def test_ancestors_follow_the_given_path(source):
+    assert source.ancestors_of('city', 'Springfield', {'state': 'Illinois'}) == {
+        'state': 'Illinois', 'country': 'USA', 'continent': 'North America'}
+    assert source.ancestors_of('city', 'Springfield', {'country': 'USA', 'state': 'Georgia'}) == {
+        'state': 'Georgia', 'country': 'USA', 'continent': 'North America'}
+    assert source.ancestors_of('city', 'Springfield', {'state': 'Texas'}) == {}
+
+
+def test_lookup_path_resolves_each_name_under_its_parent(source):
+    index = source.index
+    ids = index.lookup_path(['North America', 'USA', 'Illinois', 'Springfield'])
+    assert [index.name(i) for i in ids] == ['North America', 'USA', 'Illinois', 'Springfield']
+    assert index.parents[ids[-1]] == ids[-2]
+
+    # The path stops at the first name that is not below the previous one
+    assert len(index.lookup_path(['Asia', 'USA', 'Illinois'])) == 1
+
+
+def test_hierarchy_path_does_not_mix_branches(source):
+    path = source.hierarchy_path('North America', 'USA', 'Georgia', 'Springfield')
+    springfield = source.index.lookup('city', 'Springfield', {'state': 'Georgia'})
+    assert path['cities'] == ['Atlanta', 'Springfield']
+    assert path['city_data'] == {'id': springfield}
+    assert springfield != source.index.lookup('city', 'Springfield', {'state': 'Illinois'})
+
+
+def test_deep_links_are_completed_through_the_cache(source, monkeypatch):
+    monkeypatch.setattr(api, 'SIMULATE_NETWORK', False)
+    monkeypatch.setattr(api, '_source', source)
+    cache.clear_cache()
+    calls = []
+    monkeypatch.setitem(cache._FETCHERS, 'ancestors',
+                        lambda path: calls.append(path) or api.get_path_ancestors(path))
+
+    path = (None, None, 'Illinois', 'Springfield')
+    expected = {'state': 'Illinois', 'country': 'USA', 'continent': 'North America'}
+    assert cache.fetch_data_with_cache('ancestors', path) == expected
+    assert cache.fetch_data_with_cache('ancestors', path) == expected
+    assert calls == [path]
+    cache.clear_cache()
@@ -0,0 +1,76 @@
+"""
+Tests for hedged upstream calls.
+"""
+
+import threading
+import time
+import pytest
+from data import hedging
+from data.hedging import LatencyTracker, hedged_call
+
+
+@pytest.fixture(autouse=True)
+def fresh_stats(monkeypatch):
+    """Give each test its own latency history and hedge counters"""
+    monkeypatch.setattr(hedging, '_latencies', LatencyTracker())
+    monkeypatch.setattr(hedging, '_hedged', {})
+    monkeypatch.setattr(hedging, '_hedge_wins', {})
+
+
+def record(name, seconds, count):
+    for _ in range(count):
+        hedging._latencies.record(name, seconds)
+
+
+def test_threshold_needs_enough_samples():
+    record('country_data', 0.01, hedging.MIN_SAMPLES - 1)
+    assert hedging._latencies.percentile('country_data') is None
+    record('country_data', 0.01, 1)
+    assert hedging._latencies.percentile('country_data') == pytest.approx(0.01)
+
+
+def test_threshold_follows_the_slowest_recent_calls():
+    record('country_data', 0.01, 90)
+    record('country_data', 1.0, 10)
+    assert hedging._latencies.percentile('country_data') == pytest.approx(1.0)
+
+    # Only the latest window of calls counts
+    record('country_data', 0.01, hedging.LATENCY_WINDOW)
+    assert hedging._latencies.percentile('country_data') == pytest.approx(0.01)
+
+
+def test_calls_are_not_hedged_without_history():
+    calls = []
+    assert hedged_call('country_data', lambda: calls.append(1) or 'value') == 'value'
+    assert calls == [1]
+    assert hedging.get_hedging_stats()['country_data']['hedged'] == 0
+
+
+def test_call_slower_than_the_threshold_is_hedged():
+    record('country_data', 0.01, hedging.MIN_SAMPLES)
+    release = threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        # The first call hangs until the hedge has answered
+        if len(calls) == 1:
+            release.wait(5)
+            return 'slow'
+        return 'fast'
+
+    started = time.monotonic()
+    assert hedged_call('country_data', fetch) == 'fast'
+    assert time.monotonic() - started < 1
+    release.set()
+
+    stats = hedging.get_hedging_stats()['country_data']
+    assert (stats['hedged'], stats['hedge_wins']) == (1, 1)
+
+
+def test_call_faster_than_the_threshold_is_not_hedged():
+    record('country_data', 1.0, hedging.MIN_SAMPLES)
+    calls = []
+    assert hedged_call('country_data', lambda: calls.append(1) or 'value') == 'value'
+    assert calls == [1]
+    assert hedging.get_hedging_stats()['country_data']['hedged'] == 0
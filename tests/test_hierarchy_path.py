@@ -0,0 +1,56 @@
+"""
+Tests for fetching a whole selection path in one request.
+"""
+
+import pytest
+from data import api, cache
+
+PATH = {'continent': 'Europe', 'country': 'Germany', 'state': 'Bavaria', 'city': 'Munich'}
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """Return the list of upstream requests made, as (function name, arguments)"""
+    monkeypatch.setattr(api, 'SIMULATE_NETWORK', False)
+    cache.clear_cache()
+    calls = []
+
+    def record(name, fn):
+        def recorded(*args):
+            calls.append((name, args))
+            return fn(*args)
+        return recorded
+
+    monkeypatch.setattr(cache, 'get_hierarchy_path', record('get_hierarchy_path', api.get_hierarchy_path))
+    monkeypatch.setattr(cache, 'get_many', record('get_many', api.get_many))
+    for data_type, fetcher in list(cache._FETCHERS.items()):
+        monkeypatch.setitem(cache._FETCHERS, data_type, record(data_type, fetcher))
+    yield calls
+    cache.clear_cache()
+
+
+def test_whole_path_comes_back_in_one_request(upstream):
+    path = cache.fetch_hierarchy_path_with_cache(**PATH)
+
+    assert upstream == [('get_hierarchy_path', tuple(PATH.values()))]
+    assert path == api.resolve_hierarchy_path(api.get_data_source(), *PATH.values())
+    assert set(path) == {data_type for data_type, _ in cache.PATH_DATA_TYPES}
+
+
+def test_path_is_cached_under_each_level(upstream):
+    path = cache.fetch_hierarchy_path_with_cache(**PATH)
+    upstream.clear()
+
+    # Each dataset is then served from the cache, alone or as a path
+    assert cache.fetch_data_with_cache('cities', 'Bavaria') == path['cities']
+    assert cache.fetch_data_with_cache('country_data', 'Germany') == path['country_data']
+    assert cache.fetch_hierarchy_path_with_cache(**PATH) == path
+    assert upstream == []
+
+
+def test_only_missing_levels_are_requested(upstream):
+    cache.fetch_hierarchy_path_with_cache(continent='Europe', country='Germany')
+    upstream.clear()
+
+    cache.fetch_hierarchy_path_with_cache(**PATH)
+    assert upstream == [('get_hierarchy_path', tuple(PATH.values()))]
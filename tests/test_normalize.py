@@ -0,0 +1,35 @@
+"""
+Tests for the numeric companion columns of the tables.
+"""
+
+import pandas as pd
+from data import api, browse
+from data.cache import TTLCache
+from data.normalize import VALUE_SUFFIX, parse_quantities, value_field
+
+
+def test_display_strings_are_parsed():
+    values = pd.Series(['331 million', '$21.4 trillion', '1,302 km²', 'Unknown', None])
+    parsed = parse_quantities(values).tolist()
+    assert parsed[:3] == [331e6, 21.4e12, 1302.0]
+    assert all(pd.isna(value) for value in parsed[3:])
+
+
+def test_data_api_records_have_no_companions(monkeypatch):
+    monkeypatch.setattr(api, 'SIMULATE_NETWORK', False)
+    for record in [api.get_continent_data('Europe'), api.get_country_data('USA'),
+                   *api.get_many('country_data', ['Germany', 'Canada']).values()]:
+        assert record
+        assert not any(field.endswith(VALUE_SUFFIX) for field in record)
+
+
+def test_browse_rows_sort_by_number(monkeypatch):
+    monkeypatch.setattr(api, 'SIMULATE_NETWORK', False)
+    monkeypatch.setattr(browse, '_frames', TTLCache(browse.BROWSE_MAX_BYTES))
+    frame = browse.load_level_frame('country')
+    assert value_field('Population') in frame
+
+    rows = browse.get_rows(frame, {'startRow': 0, 'endRow': 100,
+                                   'sortModel': [{'colId': value_field('Population'), 'sort': 'desc'}]})
+    populations = [row[value_field('Population')] for row in rows['rowData'] if value_field('Population') in row]
+    assert populations == sorted(populations, reverse=True)
@@ -0,0 +1,57 @@
+"""
+Tests for prefetching the children of a selection.
+"""
+
+import time
+import pytest
+from data import api, cache, hedging, prefetch
+from data.prefetch import Prefetcher, prefetch_selection
+
+
+@pytest.fixture
+def upstream_calls(monkeypatch):
+    """Start with an empty cache and prefetcher, and return the list of upstream calls made"""
+    monkeypatch.setattr(api, 'SIMULATE_NETWORK', False)
+    monkeypatch.setattr(prefetch, '_prefetcher', Prefetcher())
+    monkeypatch.setattr(hedging, '_latencies', hedging.LatencyTracker())
+    cache.clear_cache()
+    calls = []
+    get_many = cache.get_many
+
+    def record(data_type, parents):
+        calls.append(data_type)
+        return get_many(data_type, parents)
+
+    monkeypatch.setattr(cache, 'get_many', record)
+    for data_type, fetcher in list(cache._FETCHERS.items()):
+        monkeypatch.setitem(cache._FETCHERS, data_type,
+                            lambda parent, data_type=data_type, fetcher=fetcher:
+                            calls.append(data_type) or fetcher(parent))
+    yield calls
+    cache.clear_cache()
+
+
+def wait_until_warmed(name):
+    """Wait until the countries of continent name and their records are cached"""
+    started = time.monotonic()
+    while not all(cache.get_cached(data_type, country) is not None
+                  for country in cache.get_cached('countries', name) or [None]
+                  for data_type in prefetch.CHILD_DATA_TYPES['continent']):
+        assert time.monotonic() - started < 5, "children were not prefetched"
+        time.sleep(0.01)
+
+
+def test_children_are_warmed_in_the_background(upstream_calls):
+    prefetch_selection('abc', 'continent', 'Europe')
+    wait_until_warmed('Europe')
+    assert sorted(upstream_calls) == ['countries', 'country_data', 'states']
+
+
+def test_cached_selection_makes_no_upstream_request(upstream_calls):
+    prefetch_selection('abc', 'continent', 'Europe')
+    wait_until_warmed('Europe')
+    upstream_calls.clear()
+
+    prefetch_selection('abc', 'continent', 'Europe')
+    assert prefetch._prefetcher._scopes['abc'][1] == []
+    assert upstream_calls == []
@@ -0,0 +1,88 @@
+"""
+Tests for retries and circuit breakers around upstream calls.
+"""
+
+import pytest
+from data import resilience
+from data.resilience import CircuitBreaker, CircuitOpenError, call_with_resilience
+
+
+class FakeClock:
+    """Clock that only moves when told to"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture(autouse=True)
+def fresh_breakers(monkeypatch):
+    """Give each test its own breakers, and retry without sleeping"""
+    monkeypatch.setattr(resilience, '_breakers', {})
+    monkeypatch.setattr(resilience.time, 'sleep', lambda seconds: None)
+
+
+def flaky(failures):
+    """Return a function failing its first failures calls, and the list of its calls"""
+    calls = []
+
+    def call():
+        calls.append(1)
+        if len(calls) <= failures:
+            raise ConnectionError("upstream down")
+        return 'value'
+    return call, calls
+
+
+def test_failures_are_retried_up_to_the_attempt_limit():
+    call, calls = flaky(2)
+    assert call_with_resilience('country_data', call, max_attempts=3) == 'value'
+    assert len(calls) == 3
+
+    call, calls = flaky(3)
+    with pytest.raises(ConnectionError):
+        call_with_resilience('state_data', call, max_attempts=3)
+    assert len(calls) == 3
+
+
+def test_backoff_is_jittered_below_an_exponential_cap():
+    for attempt in range(1, 8):
+        cap = min(resilience.MAX_DELAY, resilience.BASE_DELAY * 2 ** (attempt - 1))
+        delays = [resilience.backoff_delay(attempt) for _ in range(50)]
+        assert all(0 <= delay <= cap for delay in delays)
+        assert len(set(delays)) > 1
+
+
+def test_open_circuit_fails_fast_without_calling_upstream():
+    call, calls = flaky(100)
+    for _ in range(resilience.FAILURE_THRESHOLD):
+        with pytest.raises(ConnectionError):
+            call_with_resilience('city_data', call, max_attempts=1)
+
+    with pytest.raises(CircuitOpenError):
+        call_with_resilience('city_data', call)
+    assert len(calls) == resilience.FAILURE_THRESHOLD
+    assert resilience.get_circuit_states()['city_data']['state'] == resilience.OPEN
+
+
+def test_circuit_lets_one_trial_call_through_after_its_timeout():
+    clock = FakeClock()
+    breaker = CircuitBreaker('country_data', failure_threshold=2, reset_timeout=30, clock=clock)
+    breaker.record_failure()
+    breaker.record_failure()
+    assert not breaker.allow()
+
+    clock.now = 30
+    assert breaker.allow()
+    assert not breaker.allow()
+
+    # A failed trial re-opens the circuit, a successful one closes it
+    breaker.record_failure()
+    assert not breaker.allow()
+    clock.now = 60
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.allow() and breaker.allow()
+    assert breaker.snapshot()['times_opened'] == 2
@@ -0,0 +1,55 @@
+"""
+Tests for the trigram place index.
+"""
+
+import numpy as np
+import pytest
+from data.gazetteer import SyntheticGazetteer
+from data.geo_index import GeoIndex, LEVEL_CODES
+from data.search import TrigramIndex
+
+# Enough cities that even the rarest trigrams of a name have thousands of postings
+SCALE_CITIES = 1000000
+
+# Number of cities searched for
+QUERIES = 100
+
+
+@pytest.fixture(scope='module')
+def city_index():
+    geo_index = GeoIndex.from_source(SyntheticGazetteer({'city': SCALE_CITIES}))
+    return TrigramIndex(geo_index)
+
+
+@pytest.fixture(scope='module')
+def sampled_cities(city_index):
+    cities = np.flatnonzero(city_index.geo_index.levels == LEVEL_CODES['city'])
+    return [int(i) for i in np.random.default_rng(0).choice(cities, QUERIES, replace=False)]
+
+
+def typo(name):
+    """Replace the middle letter of name with one no synthetic name contains"""
+    middle = len(name) // 2
+    return name[:middle] + 'x' + name[middle + 1:]
+
+
+def recall(index, queries):
+    """Return the share of (query, entity id) pairs whose entity is in the top 10 results"""
+    return np.mean([entity_id in [i for i, _ in index.search(query, 10)] for query, entity_id in queries])
+
+
+def test_exact_names_are_found_at_scale(city_index, sampled_cities):
+    geo_index = city_index.geo_index
+    assert recall(city_index, [(geo_index.name(i), i) for i in sampled_cities]) == 1.0
+
+
+def test_names_with_a_typo_are_found_at_scale(city_index, sampled_cities):
+    geo_index = city_index.geo_index
+    assert recall(city_index, [(typo(geo_index.name(i)), i) for i in sampled_cities]) >= 0.95
+
+
+def test_results_are_ranked_by_similarity(city_index, sampled_cities):
+    name = city_index.geo_index.name(sampled_cities[0])
+    results = city_index.search(name.upper(), 10)
+    assert results[0] == (sampled_cities[0], 1.0)
+    assert [similarity for _, similarity in results] == sorted((s for _, s in results), reverse=True)
@@ -0,0 +1,67 @@
+"""
+Tests for the data cache shared between worker processes.
+"""
+
+import multiprocessing
+from data import api, cache
+from data.cache import TTLCache
+from data.shared_cache import SQLiteCache
+
+# Seconds a process may take before it is considered hung
+PROCESS_TIMEOUT = 30
+
+
+class FakeClock:
+    """Clock that only moves when told to"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def fetch_in_worker(path):
+    """Fetch a record in a worker process sharing the cache at path"""
+    api.SIMULATE_NETWORK = False
+    cache.enable_shared_cache(path)
+    cache.fetch_data_with_cache('country_data', 'Canada')
+
+
+def test_value_fetched_by_one_process_is_served_to_another(tmp_path, monkeypatch):
+    path = str(tmp_path / 'shared.sqlite')
+    process = multiprocessing.get_context('spawn').Process(target=fetch_in_worker, args=(path,))
+    process.start()
+    process.join(PROCESS_TIMEOUT)
+    assert process.exitcode == 0
+
+    # This process has nothing cached locally, and must not call upstream
+    monkeypatch.setattr(cache, '_cache', TTLCache(cache.CACHE_MAX_BYTES))
+    monkeypatch.setattr(cache, '_shared_cache', SQLiteCache(path))
+    calls = []
+    monkeypatch.setitem(cache._FETCHERS, 'country_data', lambda country: calls.append(country))
+
+    monkeypatch.setattr(api, 'SIMULATE_NETWORK', False)
+    assert cache.fetch_data_with_cache('country_data', 'Canada') == api.get_country_data('Canada')
+    assert calls == []
+    assert cache.get_cache_stats()['shared']['hits'] == 1
+
+
+def test_entries_are_stale_after_their_ttl_and_gone_after_their_hard_expiry(tmp_path):
+    clock = FakeClock()
+    store = SQLiteCache(str(tmp_path / 'shared.sqlite'), clock=clock)
+    store.set(('country_data', 'Canada'), {'Capital': 'Ottawa'}, ttl=60, hard_ttl=600)
+
+    clock.now += 30
+    value, fresh_left, stale_left, negative = store.get_entry(('country_data', 'Canada'))
+    assert value == {'Capital': 'Ottawa'}
+    assert (fresh_left, stale_left, negative) == (30, 570, False)
+
+    clock.now += 60
+    assert store.get_entry(('country_data', 'Canada'))[1] < 0
+    assert store.peek(('country_data', 'Canada')) is None
+
+    clock.now += 600
+    assert store.get_entry(('country_data', 'Canada')) is None
+    store.purge_expired()
+    assert store.stats()['entries'] == 0
@@ -0,0 +1,50 @@
+"""
+Tests for the versioned hierarchy snapshot.
+"""
+
+import json
+from collections import OrderedDict
+import dash
+import pytest
+from flask import Flask
+from data import snapshot
+
+
+@pytest.fixture
+def worker(monkeypatch):
+    """Return a function creating the Flask client of a fresh worker process"""
+    def create(**config):
+        monkeypatch.setattr(snapshot, '_snapshots', OrderedDict())
+        monkeypatch.setattr(snapshot, '_current', None)
+        app = dash.Dash(__name__, server=Flask(__name__), **config)
+        app.layout = dash.html.Div()
+        snapshot.register_snapshot_route(app)
+        return app.server.test_client()
+    return create
+
+
+def test_version_published_by_another_worker_is_served(worker):
+    first = worker()
+    version = snapshot.get_snapshot_version()
+    body = first.get(snapshot.snapshot_path(version)).data
+
+    # A second worker has never built a snapshot, but rebuilds the same content
+    second = worker()
+    response = second.get(snapshot.snapshot_path(version))
+    assert response.status_code == 200
+    assert response.data == body
+    assert 'immutable' in response.headers['Cache-Control']
+    assert 'Europe' in json.loads(response.data)['children']['continent']
+
+
+def test_unknown_version_is_not_found(worker):
+    client = worker()
+    assert client.get(snapshot.snapshot_path('0' * 16)).status_code == 404
+
+
+def test_route_is_served_below_the_app_prefix(worker):
+    client = worker(url_base_pathname='/geo/')
+    app_path = dash.Dash(__name__, url_base_pathname='/geo/').get_relative_path(
+        snapshot.snapshot_path(snapshot.get_snapshot_version()))
+    assert app_path.startswith('/geo/')
+    assert client.get(app_path).status_code == 200
@@ -0,0 +1,210 @@
+"""
+Callback cascade analysis for the dashboard application.
+CascadeRecorder records the callback requests each user action actually
+sends to the server (with their bytes and server time); trace_action()
+walks the callback graph to show which callbacks an action sets off, where
+they run, and how many sequential round-trips it takes.
+
+Run `python -m utils.cascade` to trace the common user actions.
+"""
+
+import threading
+import time
+from collections import deque
+from flask import g, jsonify, request
+
+# Seconds without callback requests from a client after which its next request starts a new action
+ACTION_IDLE_GAP = 1.0
+
+# Number of recorded actions kept per client
+MAX_RECORDED_ACTIONS = 50
+
+# User actions traced by the command line tool: (description, changed properties)
+ACTIONS = [
+    ("Pick a continent", ['continent-dropdown.value']),
+    ("Pick a country", ['country-dropdown.value']),
+    ("Pick a state", ['state-dropdown.value']),
+    ("Pick a city", ['city-dropdown.value']),
+    ("Pick a place search result", ['place-search-dropdown.value']),
+    ("Switch tab", ['geo-tabs.value']),
+]
+
+_UPDATE_PATH = '_dash-update-component'
+
+
+class CascadeRecorder:
+    """Record the callback requests of each client, grouped into user actions
+
+    Requests from one client belong to the same action until it has been
+    idle for ACTION_IDLE_GAP. A request is in a later round-trip than every
+    request of its action that finished before it started.
+    """
+
+    def __init__(self, app, clock=time.monotonic):
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._actions = {}
+        app.server.before_request(self._before)
+        app.server.after_request(self._after)
+        app.server.add_url_rule(app.config.routes_pathname_prefix + '_cascades', 'cascades',
+                                lambda: jsonify(self.summary()))
+
+    def _before(self):
+        if request.path.endswith(_UPDATE_PATH):
+            g.cascade_started = self._clock()
+
+    def _after(self, response):
+        started = g.pop('cascade_started', None)
+        if started is None:
+            return response
+
+        body = request.get_json(silent=True) or {}
+        entry = {
+            'output': body.get('output'),
+            'triggers': body.get('changedPropIds', []),
+            'request_bytes': request.content_length or 0,
+            'response_bytes': response.calculate_content_length() or 0,
+            'status': response.status_code,
+            'started': started,
+            'finished': self._clock(),
+        }
+        self.record(request.remote_addr, entry)
+        return response
+
+    def record(self, client, entry):
+        """Add one callback request of client to its current action"""
+        with self._lock:
+            actions = self._actions.setdefault(client, deque(maxlen=MAX_RECORDED_ACTIONS))
+            if not actions or entry['started'] - actions[-1][-1]['finished'] > ACTION_IDLE_GAP:
+                actions.append([])
+            action = actions[-1]
+            entry['round_trip'] = 1 + max((other['round_trip'] for other in action
+                                           if other['finished'] <= entry['started']), default=0)
+            action.append(entry)
+
+    def summary(self):
+        """Return {client: [action summaries]}, oldest action first"""
+        with self._lock:
+            return {client: [summarize_action(action) for action in actions]
+                    for client, actions in self._actions.items()}
+
+
+def summarize_action(entries):
+    """Return the totals of one recorded action, with its requests in order"""
+    return {
+        'requests': len(entries),
+        'round_trips': max((entry['round_trip'] for entry in entries), default=0),
+        'request_bytes': sum(entry['request_bytes'] for entry in entries),
+        'response_bytes': sum(entry['response_bytes'] for entry in entries),
+        'server_ms': round(sum(entry['finished'] - entry['started'] for entry in entries) * 1000, 1),
+        'callbacks': [{'output': entry['output'], 'triggers': entry['triggers'],
+                       'round_trip': entry['round_trip'], 'status': entry['status'],
+                       'request_bytes': entry['request_bytes'], 'response_bytes': entry['response_bytes'],
+                       'server_ms': round((entry['finished'] - entry['started']) * 1000, 1)}
+                      for entry in entries],
+    }
+
+
+def _split_props(output):
+    # Multi-output keys look like "..a.value...b.data@hash.."
+    parts = output[2:-2].split('...') if output.startswith('..') else [output]
+    return [part.split('@')[0] for part in parts]
+
+
+def callback_graph(app):
+    """Return one dict per registered callback with its name, inputs, outputs and where it runs"""
+    callbacks = []
+    for spec in app._callback_list:
+        server_callback = app.callback_map.get(spec['output'], {}).get('callback')
+        outputs = [] if spec.get('no_output') else _split_props(spec['output'])
+        callbacks.append({
+            'name': getattr(server_callback, '__name__', None) or 'clientside: ' + ', '.join(outputs),
+            'inputs': [f"{item['id']}.{item['property']}" for item in spec['inputs']],
+            'outputs': outputs,
+            'clientside': spec.get('clientside_function') is not None,
+        })
+    return callbacks
+
+
+def trace_action(app, changed):
+    """Trace the callbacks set off by a change of the given "id.property" strings
+
+    Returns the fired callbacks in firing order, each with the property that
+    triggered it and the round-trip it completes in (0 for callbacks that
+    run in the browser before any server response). As in the Dash renderer,
+    a callback waits while any of its inputs may still be written by another
+    pending callback. Every written output is treated as changed, and each
+    callback runs at most once per action, so callbacks that return
+    no_update make the real cascade shorter than traced.
+    """
+    callbacks = callback_graph(app)
+    by_input = {}
+    for callback in callbacks:
+        for prop in callback['inputs']:
+            by_input.setdefault(prop, []).append(callback)
+
+    ready_at = {prop: 0 for prop in changed}
+    pending = []
+    fired = []
+    seen = set()
+
+    def trigger(prop):
+        for callback in by_input.get(prop, []):
+            if id(callback) not in seen:
+                seen.add(id(callback))
+                pending.append((callback, prop))
+
+    for prop in changed:
+        trigger(prop)
+
+    while pending:
+        # Properties the pending callbacks may still write, directly or downstream
+        blocked = {}
+        for callback, _ in pending:
+            frontier = list(callback['outputs'])
+            reached = set()
+            while frontier:
+                prop = frontier.pop()
+                if prop in reached:
+                    continue
+                reached.add(prop)
+                for downstream in by_input.get(prop, []):
+                    if id(downstream) not in seen or any(downstream is other for other, _ in pending):
+                        frontier.extend(downstream['outputs'])
+            blocked[id(callback)] = reached
+
+        ready = [(callback, prop) for callback, prop in pending
+                 if not any(input_prop in blocked[id(other)]
+                            for other, _ in pending if other is not callback
+                            for input_prop in callback['inputs'])]
+        ready = ready or pending[:1]
+
+        for callback, prop in ready:
+            pending.remove((callback, prop))
+            start = max(ready_at.get(input_prop, 0) for input_prop in callback['inputs'])
+            done = start + (0 if callback['clientside'] else 1)
+            fired.append({'name': callback['name'], 'trigger': prop,
+                          'clientside': callback['clientside'], 'round_trip': done})
+            for output in callback['outputs']:
+                ready_at[output] = max(ready_at.get(output, 0), done)
+                trigger(output)
+    return fired
+
+
+def format_trace(description, fired):
+    """Return a printable report of a traced action"""
+    server = [callback for callback in fired if not callback['clientside']]
+    lines = [f"{description}: {len(server)} server request(s), "
+             f"{max((callback['round_trip'] for callback in fired), default=0)} round-trip(s)"]
+    for callback in fired:
+        where = 'browser' if callback['clientside'] else f"server #{callback['round_trip']}"
+        lines.append(f"    {where:<10} {callback['name']:<45} <- {callback['trigger']}")
+    return '\n'.join(lines)
+
+
+if __name__ == '__main__':
+    from app import app as dash_app
+
+    for description, changed in ACTIONS:
+        print(format_trace(description, trace_action(dash_app, changed)))
+        print()
@@ -49,6 +49,17 @@ header_style = {
     'boxShadow': '0 2px 5px rgba(0,0,0,0.1)'
 }
 
+# Spinner shown with the progress of background callbacks
+spinner_style = {
+    'width': '32px',
+    'height': '32px',
+    'margin': '0 auto 10px',
+    'border': f"4px solid {colors['border']}",
+    'borderTopColor': colors['primary'],
+    'borderRadius': '50%',
+    'animation': 'spin 1s linear infinite'
+}
+
 # AG Grid default column definition
 default_col_def = {
     "resizable": True,